@@ -0,0 +1,282 @@
+"""
+Dòng lệnh xử lý hàng loạt, không cần giao diện:
+
+    python -m app.cli ingest <thư mục>   thêm sách vào thư viện (metadata + ảnh bìa)
+    python -m app.cli warm-cache         dựng sẵn cache nội dung EPUB/MOBI và ảnh thu nhỏ trang PDF / truyện tranh
+    python -m app.cli index              dựng chỉ mục tìm kiếm toàn văn
+    python -m app.cli verify             kiểm tra thư viện / cache / chỉ mục
+    python -m app.cli stats              tóm tắt thư viện và số liệu đọc
+
+Các bước nặng chạy song song trên mọi nhân CPU (--jobs để giới hạn).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import formats
+from .models.book import Book
+from .services.catalog_service import catalog_service
+from .utils import tracing
+
+# Số trang đầu (PDF, truyện tranh) được làm sẵn ảnh thu nhỏ
+DEFAULT_PDF_THUMB_PAGES = 20
+
+
+# ==========================================
+# HÀM CHẠY TRONG TIẾN TRÌNH WORKER
+# ==========================================
+def _ingest_one(path):
+    from .services.metadata_service import read_book_info
+
+    return read_book_info(path)
+
+
+def _warm_one(path, pdf_pages):
+    from .utils.fingerprint import book_fingerprint
+
+    ext = os.path.splitext(path)[1].lower()
+    fingerprint = book_fingerprint(path)
+    backend = formats.backend_for(ext)
+    if backend is not None and backend.paged:
+        return _warm_page_thumbs(path, fingerprint, pdf_pages)
+
+    from .services.content_cache import is_cached_ext, has_cached_html, get_book_html
+
+    if is_cached_ext(ext) and not has_cached_html(fingerprint):
+        get_book_html(path, ext, fingerprint)
+        return 1
+    return 0
+
+
+def _warm_page_thumbs(path, fingerprint, pages):
+    from PIL import Image
+
+    from .services.thumbnail_service import page_thumb_path, page_thumb_zoom
+
+    made = 0
+    with formats.open_document(path, fingerprint) as doc:
+        if doc.page_count() == 0:
+            return 0
+        # Cùng tỉ lệ với dải trang trong app (tính theo trang đầu)
+        zoom = page_thumb_zoom(doc.page_size(0)[0])
+        for idx in range(min(pages, doc.page_count())):
+            out = page_thumb_path(fingerprint, idx)
+            if os.path.exists(out):
+                continue
+            samples, width, height, stride, alpha = doc.render(idx, zoom)
+            mode = "RGBA" if alpha else "RGB"
+            Image.frombuffer(mode, (width, height), samples, "raw", mode, stride, 1).save(
+                out, "JPEG", quality=80
+            )
+            made += 1
+    return made
+
+
+def _extract_one(path):
+    from .services.search_index import extract_text
+    from .utils.fingerprint import book_fingerprint
+
+    fingerprint = book_fingerprint(path)
+    ext = os.path.splitext(path)[1].lower()
+    return fingerprint, extract_text(path, ext, fingerprint)
+
+
+# ==========================================
+# CÁC LỆNH
+# ==========================================
+def _run_parallel(fn, items, jobs, on_result, label):
+    """Chạy fn(*item) trên process pool, gọi on_result(item, kết quả) ở tiến trình chính"""
+    if not items:
+        print(f"{label}: không có gì để làm")
+        return 0
+    started = time.perf_counter()
+    failed = 0
+    # spawn: tiến trình chính có luồng nền (state store), fork lúc đó không an toàn
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context, initializer=tracing.configure_logging
+    ) as pool:
+        futures = {pool.submit(fn, *item): item for item in items}
+        for done, future in enumerate(as_completed(futures), 1):
+            item = futures[future]
+            try:
+                on_result(item, future.result())
+            except Exception as e:
+                failed += 1
+                print(f"  lỗi {item[0]}: {e}", file=sys.stderr)
+            if done % 100 == 0 or done == len(items):
+                print(f"{label}: {done}/{len(items)}")
+    print(f"{label}: xong trong {time.perf_counter() - started:.1f}s, lỗi {failed}")
+    return failed
+
+
+def cmd_ingest(args):
+    known = catalog_service.paths()
+    paths = []
+    for root, _, files in os.walk(args.directory):
+        for name in sorted(files):
+            path = os.path.abspath(os.path.join(root, name))
+            if name.lower().endswith(formats.supported_exts()) and path not in known:
+                paths.append((path,))
+
+    def add(item, result):
+        book = Book(result[0], item[0])
+        book.author, book.cover = result[1], result[2]
+        catalog_service.add_book(book)
+
+    return _run_parallel(_ingest_one, paths, args.jobs, add, "ingest")
+
+
+def _existing_catalog_paths():
+    return [book.path for book in catalog_service.load_books() if os.path.exists(book.path)]
+
+
+def cmd_warm_cache(args):
+    made = []
+    items = [(path, args.pdf_pages) for path in _existing_catalog_paths()]
+    failed = _run_parallel(
+        _warm_one, items, args.jobs, lambda item, n: made.append(n), "warm-cache"
+    )
+    print(f"Đã tạo {sum(made)} mục cache mới")
+    return failed
+
+
+def cmd_index(args):
+    from .services.search_index import search_index
+    from .utils.fingerprint import book_fingerprint
+
+    books = {b.path: b for b in catalog_service.load_books() if os.path.exists(b.path)}
+    done = set() if args.force else search_index.fingerprints()
+    items = [(path,) for path in books if book_fingerprint(path) not in done]
+
+    batch = []
+
+    def collect(item, result):
+        book = books[item[0]]
+        batch.append((result[0], book.title, book.author, result[1]))
+        # Ghi theo lô để một transaction không quá lớn
+        if len(batch) >= 50:
+            search_index.add_many(batch)
+            batch.clear()
+
+    failed = _run_parallel(_extract_one, items, args.jobs, collect, "index")
+    if batch:
+        search_index.add_many(batch)
+    print(f"Chỉ mục có {search_index.count()} sách")
+    return failed
+
+
+def cmd_verify(args):
+    from .services.content_cache import is_cached_ext, has_cached_html
+    from .services.search_index import search_index
+    from .utils.fingerprint import book_fingerprint
+
+    indexed = search_index.fingerprints()
+    problems = Counter()
+    books = catalog_service.load_books()
+    for book in books:
+        if not os.path.exists(book.path):
+            problems["mất file"] += 1
+            print(f"  mất file: {book.path}")
+            continue
+        fingerprint = book_fingerprint(book.path)
+        if is_cached_ext(book.ext) and not has_cached_html(fingerprint):
+            problems["chưa có cache nội dung"] += 1
+        if fingerprint not in indexed:
+            problems["chưa vào chỉ mục"] += 1
+        if book.cover and not os.path.exists(book.cover):
+            problems["mất ảnh bìa"] += 1
+            print(f"  mất ảnh bìa: {book.path}")
+
+    print(f"Đã kiểm tra {len(books)} sách")
+    for name, count in problems.items():
+        print(f"  {name}: {count}")
+    if not problems:
+        print("  Không có vấn đề")
+    return 1 if problems else 0
+
+
+def _dir_size(path):
+    total = files = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            total += os.path.getsize(os.path.join(root, name))
+            files += 1
+    return files, total
+
+
+def cmd_stats(args):
+    from .services.reading_stats_service import reading_stats
+    from .services.search_index import search_index
+    from .utils.paths import user_cache_dir
+
+    books = catalog_service.load_books()
+    print(f"Thư viện: {len(books)} sách")
+    for ext, count in sorted(Counter(b.ext for b in books).items()):
+        print(f"  {ext}: {count}")
+
+    for name in ("content", "page_thumbs"):
+        files, size = _dir_size(user_cache_dir(name))
+        print(f"Cache {name}: {files} file, {size / 1024 / 1024:.1f} MB")
+    print(f"Chỉ mục tìm kiếm: {search_index.count()} sách")
+
+    rows = reading_stats.books()
+    seconds = sum(row[2] for row in rows)
+    pages = sum(row[3] for row in rows)
+    current, longest = reading_stats.streak()
+    print(f"Đã đọc: {seconds / 3600:.1f} giờ, {pages} trang, {len(rows)} sách")
+    print(f"Chuỗi ngày: hiện tại {current}, dài nhất {longest}")
+    return 0
+
+
+# ==========================================
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--log-level", default="WARNING",
+                        help="mức log ra stderr (TRACE để xem mọi span)")
+    parser.add_argument("--trace", help="ghi file trace Chrome/Perfetto của tiến trình chính")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def jobs_arg(p):
+        p.add_argument("--jobs", type=int, default=os.cpu_count(), help="số tiến trình song song")
+
+    p = sub.add_parser("ingest", help="thêm mọi sách trong thư mục vào thư viện")
+    p.add_argument("directory")
+    jobs_arg(p)
+    p.set_defaults(func=cmd_ingest)
+
+    p = sub.add_parser("warm-cache", help="dựng sẵn cache nội dung và ảnh thu nhỏ trang")
+    p.add_argument("--pdf-pages", type=int, default=DEFAULT_PDF_THUMB_PAGES)
+    jobs_arg(p)
+    p.set_defaults(func=cmd_warm_cache)
+
+    p = sub.add_parser("index", help="dựng chỉ mục tìm kiếm toàn văn")
+    p.add_argument("--force", action="store_true", help="làm lại cả sách đã có trong chỉ mục")
+    jobs_arg(p)
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("verify", help="kiểm tra thư viện, cache và chỉ mục")
+    p.set_defaults(func=cmd_verify)
+
+    p = sub.add_parser("stats", help="tóm tắt thư viện và số liệu đọc")
+    p.set_defaults(func=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Tiến trình worker (spawn) đọc mức log từ biến môi trường khi khởi tạo
+    os.environ["EBOOK_LOG_LEVEL"] = args.log_level
+    tracing.configure_logging()
+    if args.trace:
+        tracing.start_trace(args.trace)
+    with tracing.span(f"cli.{args.command}"):
+        return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
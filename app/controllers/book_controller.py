@@ -1,26 +1,43 @@
-from ..services.txt_service import read_txt
-from ..services.pdf_service import create_pdf_view
-from ..services.epub_service import read_epub
-from ..services.mobi_service import read_mobi
+import os
+
+from .. import formats
+from ..services.catalog_service import catalog_service
+from ..services.content_cache import get_book_html
 from ..services.cover_service import get_cover
+from ..services.job_scheduler import PRIORITY_BACKGROUND, job_scheduler
+from ..utils.tracing import span
 
 
-def load_book(book):
-    # PDF xử lý riêng (viewer), return widget cho UI xử lý
-    if book.ext == ".pdf":
-        return create_pdf_view
+def load_book(book, on_cover=None):
+    """
+    HTML của sách văn bản; sách theo trang (PDF, truyện tranh) do ReaderPage tự render.
+    on_cover(book): gọi trên luồng giao diện khi vừa trích được ảnh bìa còn thiếu
+    """
+    backend = formats.backend_for(book.ext)
+    if backend is None:
+        return "Định dạng chưa hỗ trợ"
 
-    # các loại text => trả lại chuỗi HTML
-    if book.ext in [".txt", ".md"]:
-        text = read_txt(book.path)
-    elif book.ext == ".epub":
-        text = read_epub(book.path)
-    elif book.ext in [".mobi", ".azw3"]:
-        text = read_mobi(book.path)
-    else:
-        text = "Định dạng chưa hỗ trợ"
+    with span("load_book", ext=book.ext):
+        # các loại text => trả lại chuỗi HTML (EPUB/MOBI lấy từ cache nếu đã chuyển đổi)
+        text = get_book_html(book.path, book.ext, book.fingerprint)
 
-    # cover chỉ áp dụng cho EPUB/MOBI,… không áp dụng PDF viewer
-    book.cover = get_cover(book.path, book.ext)
+        # Ảnh bìa đã trích lúc thêm sách thì thôi, không phân tích lại file mỗi lần mở;
+        # chưa có thì trích ở việc nền, không bắt người đọc chờ
+        if not (book.cover and os.path.exists(book.cover)):
+            job = job_scheduler.submit(
+                get_cover, book.path, book.ext, fingerprint=book.fingerprint,
+                priority=PRIORITY_BACKGROUND, name="cover",
+            )
+            job.finished.connect(lambda cover: _save_cover(book, cover, on_cover))
 
     return text
+
+
+def _save_cover(book, cover, on_cover):
+    # Lưu vào catalog để lần mở sau (cả sau khi khởi động lại app) khỏi trích lại
+    if cover is None:
+        return
+    book.cover = cover
+    catalog_service.set_cover(book)
+    if on_cover is not None:
+        on_cover(book)
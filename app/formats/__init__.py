@@ -0,0 +1,67 @@
+"""
+Các định dạng sách đọc được, mỗi định dạng là một lớp con của Document.
+
+    doc = open_document(path)          # None nếu đuôi file chưa hỗ trợ
+    doc.metadata(), doc.cover(), doc.toc(), doc.chapters(), doc.text()
+
+Thêm định dạng mới: viết lớp con Document trong package này rồi register() đuôi file.
+Module định dạng chỉ được import khi gặp đuôi file của nó, còn thư viện nặng
+(ebooklib, fitz, mobi, lxml) thì import trong từng hàm như các service khác.
+"""
+import importlib
+import importlib.util
+import os
+
+from .base import Chapter, Document, TocEntry
+
+__all__ = [
+    "Chapter",
+    "Document",
+    "TocEntry",
+    "backend_for",
+    "open_document",
+    "register",
+    "supported_exts",
+]
+
+_backends = {}  # đuôi file -> lớp Document hoặc "module:Lớp" chưa import
+
+
+def register(exts, backend):
+    """backend: lớp Document hoặc chuỗi "module:Lớp" (module trong package này)"""
+    for ext in exts:
+        _backends[ext.lower()] = backend
+
+
+def backend_for(ext):
+    """Lớp Document xử lý đuôi file ext, None nếu chưa hỗ trợ"""
+    ext = ext.lower()
+    backend = _backends.get(ext)
+    if isinstance(backend, str):
+        module, name = backend.split(":")
+        backend = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+        _backends[ext] = backend
+    return backend
+
+
+def supported_exts():
+    return tuple(_backends)
+
+
+def open_document(path, fingerprint=None):
+    backend = backend_for(os.path.splitext(path)[1])
+    if backend is None:
+        return None
+    return backend(path, fingerprint)
+
+
+register((".epub",), "epub:EpubDocument")
+register((".pdf",), "pdf:PdfDocument")
+register((".mobi", ".azw3"), "mobi:MobiDocument")
+register((".txt", ".md"), "txt:TxtDocument")
+register((".fb2", ".fbz"), "fb2:Fb2Document")
+register((".cbz",), "comic:CbzDocument")
+# .cbr cần thư viện rarfile (không có trong requirements.txt, kèm công cụ unrar/bsdtar
+# trên máy): chưa cài thì không nhận đuôi file này, để khỏi hiện trong hộp chọn file
+if importlib.util.find_spec("rarfile") is not None:
+    register((".cbr",), "comic:CbrDocument")
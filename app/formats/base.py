@@ -0,0 +1,127 @@
+from typing import NamedTuple
+
+from ..utils import tracing
+from ..utils.tracing import logger
+
+
+class Chapter(NamedTuple):
+    id: str  # anchor trong HTML ghép (vd. tên file chương trong EPUB)
+    title: str
+    html: str
+
+
+class TocEntry(NamedTuple):
+    title: str
+    target: object  # anchor (sách văn bản) hoặc số trang bắt đầu từ 0 (sách theo trang)
+    level: int = 0
+
+
+class Document:
+    """
+    Giao thức chung của mọi định dạng sách. Tạo Document không đọc file: mỗi phần
+    (metadata, ảnh bìa, mục lục, nội dung) chỉ được đọc khi gọi tới, phần phân tích
+    dùng chung giữa các lần gọi trên cùng một Document.
+
+    Sách văn bản (paged = False) trả nội dung qua chapters(); sách theo trang
+    (paged = True: PDF, truyện tranh) qua page_count() / page_size() / render(),
+    ảnh trang được render trong tiến trình worker (pdf_render_worker).
+    """
+
+    label = ""  # tên định dạng để log
+    paged = False
+    # HTML chuyển đổi tốn thời gian, nên lưu vào content_cache
+    cache_html = False
+    # Sách theo trang có lớp chữ: đọc được ở chế độ dàn chữ (reflow_html)
+    reflowable = False
+
+    def __init__(self, path, fingerprint=None):
+        self.path = path
+        self._fingerprint = fingerprint
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            from ..utils.fingerprint import book_fingerprint
+
+            self._fingerprint = book_fingerprint(self.path)
+        return self._fingerprint
+
+    # --- THÔNG TIN ---
+    def metadata(self):
+        """{'title': str, 'author': str}, chuỗi rỗng nếu file không ghi"""
+        return {"title": "", "author": ""}
+
+    def cover(self):
+        """Ảnh bìa dạng bytes (jpg/png), None nếu không có"""
+        return None
+
+    def toc(self):
+        """[TocEntry] theo thứ tự trong sách"""
+        return []
+
+    def resource(self, name):
+        """Ảnh nhúng mà HTML trỏ tới bằng src="book:<name>" (bytes), None nếu không có"""
+        return None
+
+    # --- NỘI DUNG ---
+    def chapters(self):
+        """Các chương lần lượt, đọc tới đâu xử lý tới đó (sách văn bản)"""
+        raise NotImplementedError
+
+    def page_count(self):
+        raise NotImplementedError
+
+    def page_text(self, index):
+        raise NotImplementedError
+
+    def page_size(self, index):
+        """(rộng, cao) của trang ở zoom 1.0, đơn vị point (1/72 inch) như PDF"""
+        raise NotImplementedError
+
+    def render(self, index, zoom, dpr=1.0, clip=None):
+        """
+        Ảnh trang ở tỉ lệ zoom × dpr: (samples, rộng, cao, stride, alpha) như
+        pdf_raster.pack. clip: (x0, y0, x1, y1) theo đơn vị của page_size.
+        """
+        raise NotImplementedError
+
+    def reflow_html(self, index):
+        """Chữ của trang dàn lại thành HTML để đọc như sách văn bản"""
+        raise NotImplementedError
+
+    def html(self):
+        """Cả cuốn sách thành một chuỗi HTML để hiển thị; lỗi thì raise"""
+        return "<hr>".join(chapter.html for chapter in self.chapters())
+
+    def text(self):
+        """Văn bản thuần từng phần (chương / trang) cho chỉ mục tìm kiếm"""
+        if self.paged:
+            for index in range(self.page_count()):
+                yield self.page_text(index)
+            return
+        from bs4 import BeautifulSoup
+
+        for chapter in self.chapters():
+            yield BeautifulSoup(chapter.html, "html.parser").get_text(" ")
+
+    def read_html(self):
+        """Như html() nhưng không raise: lỗi thì trả về trang báo lỗi màu đỏ"""
+        with tracing.span(f"{self.label}.html"):
+            try:
+                return self.html()
+            except Exception as e:
+                logger.warning("Lỗi đọc {} {}: {}", self.label, self.path, e)
+                return self.error_html(e)
+
+    def error_html(self, error):
+        return f"<h3 style='color:red'>Lỗi đọc file: {error}</h3>"
+
+    # --- DỌN DẸP ---
+    def close(self):
+        """Bỏ phần đã phân tích / file đang mở; gọi lại các hàm trên sẽ đọc lại"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,128 @@
+import warnings
+
+from .base import Chapter, Document, TocEntry
+
+# Tắt cảnh báo phiền phức
+warnings.filterwarnings("ignore")
+
+DOCUMENT_MEDIA_TYPES = ("application/xhtml+xml", "text/html")
+
+
+class EpubDocument(Document):
+    label = "epub"
+    cache_html = True
+
+    def __init__(self, path, fingerprint=None):
+        super().__init__(path, fingerprint)
+        self._book = None
+
+    @property
+    def book(self):
+        # epub.read_epub giải nén và phân tích cả file: chỉ làm một lần cho mọi phần
+        if self._book is None:
+            from ebooklib import epub
+
+            self._book = epub.read_epub(self.path)
+        return self._book
+
+    def metadata(self):
+        meta = super().metadata()
+        # Dublin Core
+        creators = self.book.get_metadata("DC", "creator")
+        if creators:
+            meta["author"] = creators[0][0]
+        titles = self.book.get_metadata("DC", "title")
+        if titles:
+            meta["title"] = titles[0][0]
+        return meta
+
+    def cover(self):
+        """Ảnh bìa (tìm kiếm thông minh)"""
+        from ebooklib import ITEM_IMAGE
+
+        cover_item = None
+
+        # CÁCH 1: Lấy theo metadata chuẩn
+        # (Thường trả về None nếu sách làm không chuẩn)
+        try:
+            cover_item = self.book.get_item_with_id("cover")
+        except Exception:
+            pass
+
+        # CÁCH 2: Nếu không có, duyệt tìm ảnh có tên là 'cover'
+        if not cover_item:
+            for item in self.book.get_items_of_type(ITEM_IMAGE):
+                name = item.get_name().lower()
+                if "cover" in name or "bia" in name:
+                    cover_item = item
+                    break
+
+        # CÁCH 3: Vẫn không có? Lấy đại ảnh đầu tiên (thường là bìa)
+        if not cover_item:
+            images = list(self.book.get_items_of_type(ITEM_IMAGE))
+            if images:
+                cover_item = images[0]
+
+        return cover_item.get_content() if cover_item else None
+
+    def toc(self):
+        from ebooklib import epub
+
+        entries = []
+
+        def walk(nodes, level):
+            for node in nodes:
+                if isinstance(node, tuple):
+                    section, children = node
+                    entries.append(TocEntry(section.title, section.href, level))
+                    walk(children, level + 1)
+                elif isinstance(node, epub.Link):
+                    entries.append(TocEntry(node.title, node.href, level))
+
+        walk(self.book.toc, 0)
+        return entries
+
+    def _document_items(self):
+        from ebooklib import ITEM_DOCUMENT
+
+        # Cách 1: Duyệt qua tất cả items được đánh dấu là DOCUMENT
+        # ITEM_DOCUMENT bao gồm HTML và XHTML
+        items = list(self.book.get_items_of_type(ITEM_DOCUMENT))
+
+        # Cách 2: Nếu Cách 1 không thấy gì, duyệt thủ công qua media_type
+        if not items:
+            items = [
+                item for item in self.book.get_items()
+                if item.media_type in DOCUMENT_MEDIA_TYPES
+            ]
+        return items
+
+    def chapters(self):
+        from bs4 import BeautifulSoup
+
+        titles = {entry.target.split("#")[0]: entry.title for entry in self.toc()}
+        for item in self._document_items():
+            soup = BeautifulSoup(item.get_content(), "html.parser")
+
+            # Xóa bớt các script/style thừa để sạch giao diện
+            for s in soup(["script", "style", "title", "meta"]):
+                s.decompose()
+
+            # Ưu tiên lấy body, nếu không thì lấy hết
+            body = soup.find("body")
+            content_str = str(body) if body else str(soup)
+            file_id = item.file_name
+            yield Chapter(
+                file_id,
+                titles.get(file_id, ""),
+                f'<div id="{file_id}" class="chapter-container">{content_str}</div>',
+            )
+
+    def html(self):
+        html = super().html()
+        if not html:
+            return "<h3 style='color:red'>Không tìm thấy nội dung văn bản.</h3>"
+        return html
+
+    def close(self):
+        self._book = None
@@ -0,0 +1,356 @@
+"""
+FictionBook 2 (.fb2, và .fbz là file .fb2 nén zip).
+
+FB2 là một file XML: <description> (thông tin sách), các <body> (nội dung, chia
+<section> lồng nhau) rồi tới các <binary> (ảnh base64, thường chiếm phần lớn file).
+Không dựng cây XML cả file: lxml.etree.iterparse đọc tới đâu xử lý tới đó rồi xóa
+phần đã xong, nên bộ nhớ chỉ cỡ một đoạn văn. metadata() dừng ngay sau <title-info>,
+mục lục / nội dung dừng ở <binary> đầu tiên, ảnh chỉ được giải mã base64 khi cần và
+chỉ giữ lại một ít ảnh đã giải mã (LRU), ảnh khác đọc lại từ file khi được hỏi tới.
+"""
+import base64
+import zipfile
+from collections import OrderedDict
+from contextlib import contextmanager
+from html import escape
+
+from .base import Chapter, Document, TocEntry
+
+# Khối được chuyển sang HTML trọn vẹn khi đọc xong thẻ (nội dung bên trong nhỏ)
+BLOCKS = {"p", "v", "subtitle", "text-author", "date", "empty-line", "title", "image", "table"}
+# Thẻ bao ngoài: mở / đóng thẻ HTML tương ứng ngay khi gặp, con được xử lý dần
+CONTAINERS = {
+    "epigraph": ("<blockquote>", "</blockquote>"),
+    "cite": ("<blockquote>", "</blockquote>"),
+    "poem": ("<div>", "</div>"),
+    "stanza": ("<div>", "</div><br>"),
+    "annotation": ("<div>", "</div>"),
+}
+INLINE_TAGS = {
+    "emphasis": "i",
+    "strong": "b",
+    "strikethrough": "s",
+    "sub": "sub",
+    "sup": "sup",
+    "code": "code",
+}
+# Ảnh nhúng trong HTML trỏ về resource(); khung đọc hỏi tới khi cần hiện
+IMAGE_SCHEME = "book:"
+# Tổng số byte ảnh đã giải mã giữ lại trong một Document
+RESOURCE_CACHE_BYTES = 16 * 1024 * 1024
+
+
+def _local(elem):
+    """Tên thẻ bỏ namespace (FB2 có file khai báo namespace, có file không)"""
+    tag = elem.tag
+    if not isinstance(tag, str):
+        return ""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _href(elem):
+    # l:href / xlink:href: tiền tố tùy file, chỉ chắc phần tên thuộc tính
+    for key, value in elem.attrib.items():
+        if key == "href" or key.endswith("}href"):
+            return value
+    return ""
+
+
+def _plain(elem):
+    return " ".join(" ".join(elem.itertext()).split())
+
+
+def _drop(elem):
+    """Xóa phần cây đã xử lý xong để bộ nhớ không tăng theo độ dài sách"""
+    elem.clear(keep_tail=True)
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def _img(elem):
+    href = _href(elem)
+    src = IMAGE_SCHEME + href[1:] if href.startswith("#") else href
+    return f'<img src="{escape(src)}">'
+
+
+def _inline(elem):
+    parts = [escape(elem.text or "", quote=False)]
+    for child in elem:
+        tag = _local(child)
+        if tag == "a":
+            parts.append(f'<a href="{escape(_href(child))}">{_inline(child)}</a>')
+        elif tag == "image":
+            parts.append(_img(child))
+        elif tag in INLINE_TAGS:
+            html_tag = INLINE_TAGS[tag]
+            parts.append(f"<{html_tag}>{_inline(child)}</{html_tag}>")
+        elif tag:
+            parts.append(_inline(child))
+        parts.append(escape(child.tail or "", quote=False))
+    return "".join(parts)
+
+
+def _block(elem, tag, depth):
+    """Một khối FB2 thành HTML; depth: số section đang mở (chọn cỡ tiêu đề)"""
+    if tag == "title":
+        lines = [_inline(child) for child in elem if _local(child) == "p"]
+        level = min(depth + 1, 6)
+        return f"<h{level}>{'<br>'.join(lines)}</h{level}>"
+    if tag == "subtitle":
+        return f'<h4 align="center">{_inline(elem)}</h4>'
+    if tag == "text-author":
+        return f'<p align="right"><i>{_inline(elem)}</i></p>'
+    if tag == "date":
+        return f'<p align="right">{_inline(elem)}</p>'
+    if tag == "empty-line":
+        return "<br>"
+    if tag == "image":
+        return f'<p align="center">{_img(elem)}</p>'
+    if tag == "table":
+        rows = []
+        for row in elem:
+            cells = "".join(
+                f"<{_local(cell)}>{_inline(cell)}</{_local(cell)}>"
+                for cell in row
+                if _local(cell) in ("td", "th")
+            )
+            rows.append(f"<tr>{cells}</tr>")
+        return f'<table border="1" cellpadding="4">{"".join(rows)}</table>'
+    # p, v (dòng thơ)
+    return f"<p>{_inline(elem)}</p>"
+
+
+class Fb2Document(Document):
+    label = "fb2"
+    cache_html = True
+
+    def __init__(self, path, fingerprint=None):
+        super().__init__(path, fingerprint)
+        self._info = None
+        self._binary_ids = None  # id các <binary> theo thứ tự, có sau một lượt đọc hết file
+        self._images = OrderedDict()  # id -> ảnh đã giải mã (LRU, tối đa RESOURCE_CACHE_BYTES)
+        self._images_bytes = 0
+
+    @contextmanager
+    def _open(self):
+        if zipfile.is_zipfile(self.path):
+            with zipfile.ZipFile(self.path) as archive:
+                names = [name for name in archive.namelist() if name.lower().endswith(".fb2")]
+                if not names:
+                    raise ValueError("Không tìm thấy file .fb2 trong file nén")
+                with archive.open(names[0]) as f:
+                    yield f
+        else:
+            with open(self.path, "rb") as f:
+                yield f
+
+    def _parse(self, events=("start", "end")):
+        """(sự kiện, phần tử, tên thẻ) theo thứ tự trong file"""
+        from lxml import etree
+
+        with self._open() as f:
+            # recover: nhiều file FB2 ngoài đời có lỗi XML nhỏ (thẻ lệch, ký tự lạ)
+            for event, elem in etree.iterparse(
+                f, events=events, recover=True, huge_tree=True,
+                remove_comments=True, remove_pis=True,
+            ):
+                yield event, elem, _local(elem)
+
+    # --- THÔNG TIN ---
+    def _title_info(self):
+        """Tên, tác giả, id ảnh bìa trong <title-info>; không đọc tới phần nội dung"""
+        if self._info is None:
+            info = {"title": "", "author": "", "cover": ""}
+            for event, elem, tag in self._parse():
+                if tag == "body":
+                    break
+                if event != "end" or tag != "title-info":
+                    continue
+                authors = []
+                for child in elem:
+                    name = _local(child)
+                    if name == "book-title":
+                        info["title"] = _plain(child)
+                    elif name == "author":
+                        fields = {_local(part): _plain(part) for part in child}
+                        full = " ".join(
+                            fields[key]
+                            for key in ("first-name", "middle-name", "last-name")
+                            if fields.get(key)
+                        )
+                        full = full or fields.get("nickname", "")
+                        if full:
+                            authors.append(full)
+                    elif name == "coverpage":
+                        images = [_href(image) for image in child if _local(image) == "image"]
+                        if images:
+                            info["cover"] = images[0].lstrip("#")
+                info["author"] = ", ".join(authors)
+                break
+            self._info = info
+        return self._info
+
+    def metadata(self):
+        meta = super().metadata()
+        info = self._title_info()
+        meta["title"] = info["title"]
+        meta["author"] = info["author"]
+        return meta
+
+    def _iter_binaries(self):
+        """(id, chuỗi base64) của từng <binary>; phần nội dung phải đọc qua nhưng không giữ"""
+        for event, elem, tag in self._parse(("end",)):
+            if tag == "binary":
+                yield elem.get("id", ""), elem.text or ""
+            _drop(elem)
+
+    def _remember(self, binary_id, data):
+        if binary_id in self._images or len(data) > RESOURCE_CACHE_BYTES:
+            return
+        self._images[binary_id] = data
+        self._images_bytes += len(data)
+        while self._images_bytes > RESOURCE_CACHE_BYTES:
+            self._images_bytes -= len(self._images.popitem(last=False)[1])
+
+    def _scan(self, wanted, prefetch=False):
+        """
+        Đọc lại file tới ảnh đầu tiên có wanted(id), trả về ảnh đã giải mã (None nếu không
+        có). prefetch: giải mã luôn các ảnh kế tiếp vào LRU (khung đọc hỏi ảnh theo thứ tự
+        trong sách). Đọc hết file thì nhớ id các ảnh để lần sau khỏi tìm ảnh không có.
+        """
+        found = None
+        ids = []
+        room = RESOURCE_CACHE_BYTES
+        for binary_id, text in self._iter_binaries():
+            ids.append(binary_id)
+            if found is None:
+                if wanted(binary_id):
+                    found = base64.b64decode(text) if text else b""
+                    room -= len(found)
+                    self._remember(binary_id, found)
+                continue
+            if not prefetch or room <= 0:
+                break
+            if text and binary_id not in self._images:
+                data = base64.b64decode(text)
+                room -= len(data)
+                if room >= 0:
+                    self._remember(binary_id, data)
+        else:
+            self._binary_ids = ids
+        return found or None
+
+    def resource(self, name):
+        data = self._images.get(name)
+        if data is not None:
+            self._images.move_to_end(name)
+            return data
+        if self._binary_ids is not None and name not in self._binary_ids:
+            return None
+        return self._scan(lambda binary_id: binary_id == name, prefetch=True)
+
+    def cover(self):
+        """Ảnh trong <coverpage>, không có thì ảnh có id chứa 'cover'"""
+        name = self._title_info()["cover"]
+
+        def is_cover(binary_id):
+            return binary_id == name or (not name and "cover" in binary_id.lower())
+
+        if self._binary_ids is not None:
+            # Đã biết id các ảnh: lấy từ LRU hoặc chỉ đọc lại tới đúng ảnh đó
+            cover_id = next((i for i in self._binary_ids if is_cover(i)), None)
+            return None if cover_id is None else self.resource(cover_id)
+        return self._scan(is_cover)
+
+    # --- NỘI DUNG ---
+    def _walk(self, html=True):
+        """
+        Đọc lần lượt các <body>, sinh ("toc", TocEntry) khi gặp tiêu đề section và
+        ("chapter", Chapter) khi hết một section cấp ngoài cùng. Body có tên (chú
+        thích, bình luận) gộp thành một chương. html=False: chỉ lấy mục lục.
+        """
+        parts = []
+        anchors = []  # anchor của các section đang mở
+        sections = 0
+        in_body = False
+        notes = ""  # tên body chú thích đang đọc
+        in_block = 0
+        chapter_title = ""
+        for event, elem, tag in self._parse():
+            if not in_body:
+                if tag == "body" and event == "start":
+                    in_body = True
+                    notes = elem.get("name", "")
+                    if notes and html:
+                        parts.append(f'<div id="{escape(notes)}">')
+                elif tag == "binary":
+                    # Ảnh nằm sau mọi body: khỏi đọc tiếp
+                    break
+                elif event == "end":
+                    _drop(elem)
+                continue
+
+            if tag in BLOCKS:
+                if event == "start":
+                    in_block += 1
+                    continue
+                in_block -= 1
+                if in_block:
+                    continue
+                if tag == "title":
+                    title = _plain(elem)
+                    if anchors and not notes:
+                        yield "toc", TocEntry(title, anchors[-1], len(anchors) - 1)
+                    if len(anchors) == (0 if notes else 1):
+                        chapter_title = title
+                if html:
+                    parts.append(_block(elem, tag, len(anchors)))
+                _drop(elem)
+            elif in_block:
+                continue
+            elif tag == "section":
+                if event == "start":
+                    sections += 1
+                    anchors.append(elem.get("id") or f"section-{sections}")
+                    if html:
+                        parts.append(f'<div id="{escape(anchors[-1])}">')
+                    continue
+                anchor = anchors.pop()
+                if html:
+                    parts.append("</div>")
+                _drop(elem)
+                if not anchors and not notes:
+                    yield "chapter", Chapter(anchor, chapter_title, "".join(parts))
+                    parts = []
+                    chapter_title = ""
+            elif tag == "body" and event == "end":
+                in_body = False
+                if notes:
+                    if html:
+                        parts.append("</div>")
+                    yield "toc", TocEntry(chapter_title or notes, notes, 0)
+                if parts:
+                    yield "chapter", Chapter(notes, chapter_title, "".join(parts))
+                parts = []
+                chapter_title = ""
+                _drop(elem)
+            elif tag in CONTAINERS:
+                if html:
+                    parts.append(CONTAINERS[tag][event == "end"])
+                if event == "end":
+                    _drop(elem)
+
+    def toc(self):
+        return [item for kind, item in self._walk(html=False) if kind == "toc"]
+
+    def chapters(self):
+        for kind, item in self._walk():
+            if kind == "chapter":
+                yield item
+
+    def close(self):
+        self._binary_ids = None
+        self._images.clear()
+        self._images_bytes = 0
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+from ..utils.tracing import use_app_sinks
+from .base import Chapter, Document
+
+
+class MobiDocument(Document):
+    """
+    .mobi / .azw3:
+    1. Giải nén bằng mobi.extract
+    2. Dùng BeautifulSoup lọc bỏ CSS/Font rác để tránh lỗi hiển thị trên Qt
+    """
+
+    label = "mobi"
+    cache_html = True
+
+    def _extract(self):
+        use_app_sinks()
+        import mobi
+
+        # 1. Giải nén file
+        temp_dir, filepath = mobi.extract(self.path)
+        try:
+            if not filepath or not os.path.exists(filepath):
+                raise ValueError("Không trích xuất được nội dung file Mobi/Azw3")
+
+            # 2. Đọc nội dung HTML thô
+            with open(filepath, "r", encoding="utf-8", errors="ignore") as f:
+                return f.read()
+        finally:
+            # 3. Dọn dẹp thư mục tạm ngay lập tức
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def chapters(self):
+        from bs4 import BeautifulSoup
+
+        # 4. XỬ LÝ HTML (Quan trọng để fix lỗi font)
+        soup = BeautifulSoup(self._extract(), "html.parser")
+
+        # Xóa các thẻ chứa định dạng font/css gây nhiễu
+        # (script, style, link, meta, xml...)
+        for s in soup(["script", "style", "meta", "link", "xml", "head", "title"]):
+            s.decompose()
+
+        # Xóa các thuộc tính style="..." trong từng thẻ HTML (inline css)
+        # để app tự dùng font mặc định của hệ thống cho dễ đọc
+        for tag in soup.find_all(True):
+            for attr in ("class", "style", "width", "height"):
+                tag.attrs.pop(attr, None)
+
+        # Lấy nội dung body (hoặc cả soup nếu không tìm thấy body)
+        body = soup.find("body")
+        title = os.path.splitext(os.path.basename(self.path))[0]
+        yield Chapter("", title, str(body) if body else str(soup))
+
+    def error_html(self, error):
+        return f"""
+        <div style='color:red; padding:20px;'>
+            <h3>Không thể đọc file Mobi/Azw3 này</h3>
+            <p>Lỗi hệ thống: {error}</p>
+            <p><i>Gợi ý: File có thể bị lỗi định dạng hoặc bị mã hóa (DRM).</i></p>
+        </div>
+        """
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+from .base import Document, TocEntry
+
+# Ảnh bìa render từ trang đầu, rộng chừng này pixel (gallery hiện thẻ 150 px)
+COVER_WIDTH = 300
+# Số trang giữ DisplayList (dùng trong worker render)
+DISPLAY_LIST_PAGES = 8
+
+
+class PdfDocument(Document):
+    label = "pdf"
+    paged = True
+    reflowable = True
+
+    def __init__(self, path, fingerprint=None):
+        super().__init__(path, fingerprint)
+        self._doc = None
+        self._display_lists = OrderedDict()  # page_index -> fitz.DisplayList
+
+    @property
+    def doc(self):
+        """fitz.Document, mở khi cần lần đầu"""
+        if self._doc is None:
+            import fitz  # PyMuPDF
+
+            self._doc = fitz.open(self.path)
+        return self._doc
+
+    def metadata(self):
+        meta = super().metadata()
+        info = self.doc.metadata or {}
+        meta["author"] = info.get("author") or ""
+        meta["title"] = info.get("title") or ""
+        return meta
+
+    def cover(self):
+        if self.doc.page_count == 0:
+            return None
+        from ..services.pdf_raster import rasterize
+
+        page = self.doc.load_page(0)
+        pix = rasterize(page, COVER_WIDTH / max(page.rect.width, 1))
+        return pix.tobytes(output="jpg", jpg_quality=85)
+
+    def toc(self):
+        # get_toc: [level (từ 1), tiêu đề, trang (từ 1)]
+        return [
+            TocEntry(title, page - 1, level - 1)
+            for level, title, page in self.doc.get_toc()
+        ]
+
+    def page_count(self):
+        return self.doc.page_count
+
+    def page_text(self, index):
+        return self.doc.load_page(index).get_text()
+
+    def reflow_html(self, index):
+        from ..services.pdf_reflow import page_html
+
+        return page_html(self.doc.load_page(index))
+
+    def page_size(self, index):
+        rect = self.doc.load_page(index).rect
+        return rect.width, rect.height
+
+    def _display_list(self, index):
+        """
+        DisplayList của trang: content stream chỉ phải parse một lần,
+        các lần render sau (zoom khác, từng ô) chỉ còn bước rasterize.
+        """
+        dl = self._display_lists.get(index)
+        if dl is None:
+            dl = self.doc.load_page(index).get_displaylist()
+            self._display_lists[index] = dl
+            if len(self._display_lists) > DISPLAY_LIST_PAGES:
+                self._display_lists.popitem(last=False)
+        else:
+            self._display_lists.move_to_end(index)
+        return dl
+
+    def render(self, index, zoom, dpr=1.0, clip=None):
+        from ..services.pdf_raster import pack, rasterize
+
+        return pack(rasterize(self._display_list(index), zoom, dpr, clip=clip))
+
+    def close(self):
+        self._display_lists.clear()
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
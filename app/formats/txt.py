@@ -0,0 +1,19 @@
+import os
+
+from .base import Chapter, Document
+
+
+class TxtDocument(Document):
+    label = "txt"
+
+    def _read(self):
+        with open(self.path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+
+    def chapters(self):
+        # Cả file là một chương
+        title = os.path.splitext(os.path.basename(self.path))[0]
+        yield Chapter("", title, self._read().replace("\n", "<br>"))
+
+    def text(self):
+        yield self._read()
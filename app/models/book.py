@@ -1,5 +1,7 @@
 from pathlib import Path
 
+from ..utils.fingerprint import book_fingerprint
+
 
 class Book:
     def __init__(self, title, path):
@@ -8,3 +10,11 @@ class Book:
         self.ext = Path(path).suffix.lower()
         self.cover = None
         self.author = "Unknown Author"  # <--- Thêm trường này
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        # Tính khi cần lần đầu rồi giữ lại
+        if self._fingerprint is None:
+            self._fingerprint = book_fingerprint(self.path)
+        return self._fingerprint
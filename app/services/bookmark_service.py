@@ -0,0 +1,80 @@
+import json
+import time
+import uuid
+
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading_positions (
+    book TEXT PRIMARY KEY,
+    position TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id TEXT PRIMARY KEY,
+    book TEXT NOT NULL,
+    name TEXT NOT NULL,
+    position TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS bookmarks_by_book ON bookmarks (book, created);
+"""
+
+
+class BookmarkService:
+    """
+    Vị trí đọc cuối và các bookmark có tên, theo fingerprint của sách.
+    Mỗi lần lưu chỉ ghi đúng một dòng của một cuốn, không viết lại cả file.
+    Vị trí là dict do ReaderPage định nghĩa (vd {"page": 3, "zoom": 1.2} hoặc {"char": 1520}).
+    """
+
+    def __init__(self, store=state_store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+        self._positions = {}  # book -> vị trí đã đọc/ghi gần nhất
+
+    # ------------------------------
+    # VỊ TRÍ ĐỌC CUỐI
+    # ------------------------------
+    def load_position(self, book):
+        if book not in self._positions:
+            rows = self.store.query(
+                "SELECT position FROM reading_positions WHERE book = ?", (book,)
+            )
+            self._positions[book] = json.loads(rows[0][0]) if rows else None
+        return self._positions[book]
+
+    def save_position(self, book, position):
+        if position is None or self._positions.get(book) == position:
+            return
+        self._positions[book] = position
+        self.store.write(
+            "INSERT OR REPLACE INTO reading_positions (book, position, updated) VALUES (?, ?, ?)",
+            (book, json.dumps(position), time.time()),
+        )
+
+    # ------------------------------
+    # BOOKMARK CÓ TÊN
+    # ------------------------------
+    def add_bookmark(self, book, name, position):
+        bookmark_id = uuid.uuid4().hex
+        self.store.write(
+            "INSERT INTO bookmarks (id, book, name, position, created) VALUES (?, ?, ?, ?, ?)",
+            (bookmark_id, book, name, json.dumps(position), time.time()),
+        )
+        return bookmark_id
+
+    def list_bookmarks(self, book):
+        """[(id, tên, vị trí)] theo thứ tự tạo"""
+        rows = self.store.query(
+            "SELECT id, name, position FROM bookmarks WHERE book = ? ORDER BY created",
+            (book,),
+        )
+        return [(bookmark_id, name, json.loads(pos)) for bookmark_id, name, pos in rows]
+
+    def remove_bookmark(self, bookmark_id):
+        self.store.write("DELETE FROM bookmarks WHERE id = ?", (bookmark_id,))
+
+
+bookmark_service = LazySingleton(BookmarkService)
@@ -0,0 +1,54 @@
+import time
+
+from ..models.book import Book
+from ..utils.lazy import LazySingleton
+from ..utils.tracing import traced
+from .state_store import state_store
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    path TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    author TEXT,
+    cover TEXT,
+    added REAL NOT NULL
+);
+"""
+
+
+class CatalogService:
+    """Danh sách sách trong thư viện, lưu lại để mở app là có ngay (không đọc lại metadata)"""
+
+    def __init__(self, store=state_store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+
+    @traced("catalog.load")
+    def load_books(self):
+        rows = self.store.query("SELECT path, title, author, cover FROM catalog ORDER BY added")
+        books = []
+        for path, title, author, cover in rows:
+            book = Book(title, path)
+            book.author = author or book.author
+            book.cover = cover
+            books.append(book)
+        return books
+
+    def paths(self):
+        return {row[0] for row in self.store.query("SELECT path FROM catalog")}
+
+    def add_book(self, book):
+        self.store.write(
+            "INSERT OR REPLACE INTO catalog (path, title, author, cover, added) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (book.path, book.title, book.author, book.cover, time.time()),
+        )
+
+    def set_cover(self, book):
+        self.store.write("UPDATE catalog SET cover = ? WHERE path = ?", (book.cover, book.path))
+
+    def remove_book(self, book):
+        self.store.write("DELETE FROM catalog WHERE path = ?", (book.path,))
+
+
+catalog_service = LazySingleton(CatalogService)
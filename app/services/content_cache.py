@@ -0,0 +1,79 @@
+"""
+Cache nội dung HTML đã chuyển đổi của sách văn bản (EPUB/MOBI), theo fingerprint.
+Chuyển EPUB/MOBI sang HTML tốn hàng trăm ms tới vài giây; lần mở sau đọc thẳng từ cache.
+Không import Qt: dùng được cả trong CLI.
+"""
+import gzip
+import os
+
+from .. import formats
+from ..utils import tracing
+from ..utils.paths import user_cache_dir
+from ..utils.tracing import logger
+
+# Tăng khi đổi cách chuyển đổi để bỏ qua cache cũ
+CACHE_VERSION = 1
+
+
+def is_cached_ext(ext):
+    """Định dạng có HTML chuyển đổi tốn thời gian (Document.cache_html) thì được cache"""
+    backend = formats.backend_for(ext)
+    return backend is not None and backend.cache_html
+
+
+def _cache_path(fingerprint):
+    return os.path.join(user_cache_dir("content"), f"{fingerprint}.v{CACHE_VERSION}.html.gz")
+
+
+def has_cached_html(fingerprint):
+    return os.path.exists(_cache_path(fingerprint))
+
+
+def load_cached_html(fingerprint):
+    try:
+        with gzip.open(_cache_path(fingerprint), "rt", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, EOFError):
+        return None
+
+
+def save_cached_html(fingerprint, html):
+    path = _cache_path(fingerprint)
+    tmp = path + ".tmp"
+    try:
+        # compresslevel thấp: nén nhanh, vẫn nhỏ hơn ~4 lần
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=3) as f:
+            f.write(html)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Lỗi lưu cache nội dung: {}", e)
+
+
+def _looks_like_error(html):
+    # read_epub / read_mobi trả về trang báo lỗi màu đỏ thay vì raise
+    return "style='color:red" in html[:200]
+
+
+def extract_html(path, ext):
+    """Chuyển sách văn bản sang HTML (không qua cache)"""
+    backend = formats.backend_for(ext)
+    if backend is None or backend.paged:
+        return "Định dạng chưa hỗ trợ"
+    with backend(path) as document:
+        return document.read_html()
+
+
+def get_book_html(path, ext, fingerprint):
+    """HTML của sách: lấy từ cache nếu có, không thì chuyển đổi rồi lưu lại"""
+    if not is_cached_ext(ext):
+        return extract_html(path, ext)
+    with tracing.span("content_cache.get", ext=ext) as info:
+        html = load_cached_html(fingerprint)
+        info["hit"] = html is not None
+        tracing.count("cache nội dung: trúng" if html is not None else "cache nội dung: trượt")
+        if html is None:
+            html = extract_html(path, ext)
+            if not _looks_like_error(html):
+                save_cached_html(fingerprint, html)
+        info["chars"] = len(html)
+    return html
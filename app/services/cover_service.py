@@ -1,58 +1,47 @@
 import os
-from ebooklib import epub, ITEM_IMAGE
+import tempfile
 
+from .. import formats
+from ..utils.paths import user_data_dir
+from ..utils.tracing import logger, traced
 
-def get_cover(path, ext):
-    """
-    Trích xuất ảnh bìa EPUB (Phiên bản tìm kiếm thông minh)
-    """
-    # 1. Chuẩn bị thư mục
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    app_dir = os.path.dirname(current_dir)
-    save_dir = os.path.join(app_dir, "assets", "covers")
 
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
+def cover_path(fingerprint):
+    # Theo fingerprint: hai sách trùng tên file ở hai thư mục không ghi đè ảnh của nhau
+    return os.path.join(user_data_dir("covers"), f"{fingerprint}.jpg")
 
-    try:
-        if ext == ".epub":
-            book = epub.read_epub(path)
-            cover_item = None
-
-            # CÁCH 1: Lấy theo metadata chuẩn
-            # (Thường trả về None nếu sách làm không chuẩn)
-            try:
-                cover_item = book.get_item_with_id("cover")
-            except:
-                pass
-
-            # CÁCH 2: Nếu không có, duyệt tìm ảnh có tên là 'cover'
-            if not cover_item:
-                for item in book.get_items_of_type(ITEM_IMAGE):
-                    name = item.get_name().lower()
-                    if "cover" in name or "bia" in name:
-                        cover_item = item
-                        break
-
-            # CÁCH 3: Vẫn không có? Lấy đại ảnh đầu tiên (thường là bìa)
-            if not cover_item:
-                images = list(book.get_items_of_type(ITEM_IMAGE))
-                if images:
-                    cover_item = images[0]
-
-            # === LƯU ẢNH ===
-            if cover_item:
-                # Tạo tên file output duy nhất
-                safe_name = os.path.basename(path).replace(" ", "_") + ".jpg"
-                out_path = os.path.join(save_dir, safe_name)
-
-                with open(out_path, "wb") as f:
-                    f.write(cover_item.get_content())
-
-                return out_path
 
-        return None
+@traced()
+def get_cover(path, ext, document=None, fingerprint=None):
+    """
+    Trích xuất ảnh bìa vào thư mục dữ liệu người dùng (covers/), trả về đường dẫn file
+    (None nếu không có).
+    document: formats.Document đã mở của sách này (dùng lại phần đã phân tích).
+    """
+    try:
+        if document is None:
+            backend = formats.backend_for(ext)
+            if backend is None:
+                return None
+            with backend(path, fingerprint) as doc:
+                data = doc.cover()
+                fingerprint = doc.fingerprint
+        else:
+            data = document.cover()
+            fingerprint = document.fingerprint
+
+        # === LƯU ẢNH ===
+        if not data:
+            return None
+        out_path = cover_path(fingerprint)
+        # Ghi file tạm rồi đổi tên: worker khác (cùng một sách) không đọc phải ảnh dở dang
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, out_path)
+
+        return out_path
 
     except Exception as e:
-        print(f"Lỗi lấy cover: {e}")
+        logger.warning("Lỗi lấy cover {}: {}", path, e)
         return None
@@ -0,0 +1,120 @@
+"""
+Dùng chung tài liệu đã mở giữa các cửa sổ đọc cùng một cuốn sách.
+
+    handle = document_pool.acquire(("pdf", book.fingerprint), lambda: fitz.open(path),
+                                   close=fitz.Document.close)
+    doc = handle.document
+    ...
+    handle.release()        # hoặc: with document_pool.acquire(...) as doc:
+
+Mỗi lần acquire tăng số người dùng, release giảm. Khi không còn ai dùng, tài liệu
+được giữ thêm GRACE_SECONDS (mở lại ngay thì không phải đọc file lần nữa) rồi mới
+đóng. Chỉ dùng trên luồng giao diện: hẹn giờ đóng bằng QTimer, và PyMuPDF không an
+toàn khi hai luồng cùng đụng vào.
+"""
+from PySide6.QtCore import QCoreApplication, QTimer
+
+from ..utils.tracing import count
+
+# Giữ tài liệu không còn ai dùng thêm bao lâu (giây) trước khi đóng hẳn
+GRACE_SECONDS = 30
+
+
+class DocumentHandle:
+    """Một lượt mượn tài liệu từ pool; gọi release() (hoặc thoát khối with) để trả"""
+
+    def __init__(self, pool, key, document):
+        self._pool = pool
+        self.key = key
+        self.document = document
+
+    def release(self):
+        # Gọi nhiều lần cũng chỉ trả một lần
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            self.document = None
+            pool._release(self.key)
+
+    def __enter__(self):
+        return self.document
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class _Entry:
+    __slots__ = ("document", "close", "refs", "timer")
+
+    def __init__(self, document, close):
+        self.document = document
+        self.close = close
+        self.refs = 0
+        self.timer = None
+
+
+class DocumentPool:
+    def __init__(self, grace_seconds=GRACE_SECONDS):
+        self.grace_seconds = grace_seconds
+        self._entries = {}  # key -> _Entry
+
+    def acquire(self, key, opener, close=None):
+        """
+        Lấy tài liệu theo key (vd. ("pdf", fingerprint)); chưa có thì gọi opener() để mở.
+        close(document) được gọi khi tài liệu bị đóng hẳn (None nếu không cần dọn gì).
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry(opener(), close)
+            self._entries[key] = entry
+            count("tài liệu: mở mới")
+        else:
+            count("tài liệu: dùng lại")
+            if entry.timer is not None:
+                entry.timer.stop()
+                entry.timer = None
+        entry.refs += 1
+        return DocumentHandle(self, key, entry.document)
+
+    def _release(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+        # Không có event loop (vd. script) thì không hẹn giờ được: đóng luôn
+        if self.grace_seconds <= 0 or QCoreApplication.instance() is None:
+            self._expire(key)
+            return
+        entry.timer = QTimer()
+        entry.timer.setSingleShot(True)
+        entry.timer.timeout.connect(lambda: self._expire(key))
+        entry.timer.start(int(self.grace_seconds * 1000))
+
+    def _expire(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.refs > 0:
+            return
+        del self._entries[key]
+        entry.timer = None
+        if entry.close is not None:
+            entry.close(entry.document)
+
+    def close_idle(self):
+        """Đóng ngay mọi tài liệu không còn ai dùng (không đợi hết thời gian giữ)"""
+        for key, entry in list(self._entries.items()):
+            if entry.refs == 0:
+                if entry.timer is not None:
+                    entry.timer.stop()
+                self._expire(key)
+
+    def stats(self):
+        """(số tài liệu đang mở, số tài liệu còn người dùng)"""
+        in_use = sum(1 for entry in self._entries.values() if entry.refs > 0)
+        return len(self._entries), in_use
+
+    def __len__(self):
+        return len(self._entries)
+
+
+document_pool = DocumentPool()
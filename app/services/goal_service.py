@@ -1,37 +1,30 @@
-import json
-import os
 from datetime import datetime
 
-DATA_FILE = "user_data.json"
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
+
+NAMESPACE = "goal"
 
 
 class GoalService:
-    def __init__(self):
+    def __init__(self, store=state_store):
+        self.store = store
         self.data = self.load_data()
         self.check_new_day()
 
     def load_data(self):
         default = {"date": "", "minutes_read": 0, "daily_goal": 30}
-        if not os.path.exists(DATA_FILE):
-            return default
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                # QUAN TRỌNG: Kiểm tra xem file cũ có key "date" không
-                if "date" not in data:
-                    return default  # Reset nếu file cũ không tương thích
-                return data
-        except:
-            return default
+        default.update(self.store.get_namespace(NAMESPACE))
+        return default
 
     def save_data(self):
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.data, f)
+        # Chỉ ghi namespace "goal", không đè lên dữ liệu của service khác
+        self.store.update(NAMESPACE, self.data)
 
     def check_new_day(self):
         today = datetime.now().strftime("%Y-%m-%d")
 
-        # Dùng .get() để an toàn hơn, tránh crash nếu file lỗi
+        # Dùng .get() để an toàn hơn, tránh crash nếu dữ liệu lỗi
         current_date = self.data.get("date", "")
 
         if current_date != today:
@@ -50,4 +43,4 @@ class GoalService:
 
 
 # Khởi tạo object
-goal_service = GoalService()
+goal_service = LazySingleton(GoalService)
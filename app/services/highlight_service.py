@@ -0,0 +1,59 @@
+import time
+import uuid
+
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
+
+# Độ dài tối đa đoạn trích lưu kèm để tìm lại highlight khi nội dung thay đổi
+QUOTE_CHARS = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS highlights (
+    id TEXT PRIMARY KEY,
+    book TEXT NOT NULL,
+    chapter TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    quote TEXT NOT NULL,
+    color TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS highlights_by_book ON highlights (book, chapter, start);
+"""
+
+
+class HighlightService:
+    """
+    Highlight của sách văn bản, theo fingerprint của sách.
+    Vị trí lưu dạng (chương, khoảng ký tự tính từ đầu chương) nên không phụ thuộc
+    bố cục / cỡ chữ, kèm đoạn trích ngắn để tìm lại nếu vị trí bị lệch.
+    """
+
+    def __init__(self, store=state_store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+
+    def add_highlight(self, book, chapter, start, end, quote, color):
+        highlight_id = uuid.uuid4().hex
+        self.store.write(
+            "INSERT INTO highlights (id, book, chapter, start, end, quote, color, created) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (highlight_id, book, chapter, start, end, quote[:QUOTE_CHARS], color, time.time()),
+        )
+        return highlight_id
+
+    def list_highlights(self, book):
+        """[(id, chương, start, end, trích, màu)] theo thứ tự trong sách"""
+        return self.store.query(
+            "SELECT id, chapter, start, end, quote, color FROM highlights "
+            "WHERE book = ? ORDER BY chapter, start",
+            (book,),
+        )
+
+    def remove_highlights(self, highlight_ids):
+        self.store.write_many(
+            "DELETE FROM highlights WHERE id = ?", [(hid,) for hid in highlight_ids]
+        )
+
+
+highlight_service = LazySingleton(HighlightService)
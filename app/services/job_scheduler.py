@@ -0,0 +1,304 @@
+"""
+Lịch chạy việc nền dùng chung cho cả app: mọi việc nặng (đọc metadata, trích ảnh bìa,
+phân tích nội dung, mục lục, dàn chữ, mở sẵn sách...) đi qua đây thay vì mỗi tính
+năng tự mở luồng riêng.
+
+    job = job_scheduler.submit(get_cover, path, ext, priority=PRIORITY_BACKGROUND)
+    job.finished.connect(self.on_cover)      # nhận kết quả trên luồng giao diện
+    job.failed.connect(self.on_error)        # (thông báo lỗi)
+    ...
+    job.cancel()                             # không cần kết quả nữa
+
+- Độ ưu tiên (số nhỏ chạy trước): trang đang thấy, sách người dùng vừa mở, đọc
+  trước, rồi tới việc nền (chỉ mục, ảnh thu nhỏ, mở sẵn). Cùng mức thì theo thứ tự gửi.
+- Luồng (mặc định) cho việc chủ yếu là I/O / thư viện nhả GIL; process=True chạy ở
+  tiến trình worker cho việc giữ GIL lâu (PyMuPDF): hàm và tham số phải pickle được.
+- CancelToken dùng chung cho một nhóm job: job chưa chạy thì bỏ, job đang chạy thì
+  kết quả bị bỏ qua (hàm chạy lâu có thể tự kiểm tra token.cancelled).
+- Khi có khung đọc đang mở (reader_opened / reader_closed), việc nền chỉ chạy từng
+  việc một và chỉ khi không có việc ưu tiên cao hơn đang chạy.
+
+Kết quả được đưa về luồng giao diện bằng signal của Job; job hoàn tất khi event loop
+chạy tới. Ngoài Qt (CLI, script) dùng job.future.result() như concurrent.futures.
+"""
+import atexit
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from PySide6.QtCore import QCoreApplication, QObject, Signal
+
+from ..utils import tracing
+from ..utils.lazy import LazySingleton
+from ..utils.tracing import logger
+
+# Độ ưu tiên: số nhỏ chạy trước
+PRIORITY_VISIBLE = 0  # thứ đang hiện trên màn hình
+PRIORITY_OPEN = 10  # người dùng vừa bấm (mở sách, thêm sách)
+PRIORITY_PREFETCH = 20  # đọc trước phần sắp tới
+PRIORITY_BACKGROUND = 30  # chỉ mục, ảnh thu nhỏ, mở sẵn: chạy khi rảnh
+
+THREAD_WORKERS = max(2, min(4, os.cpu_count() or 1))
+PROCESS_WORKERS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+
+class CancelToken:
+    """Cờ hủy, dùng chung được cho nhiều job"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+
+class Job(QObject):
+    """Một việc đã gửi cho scheduler; finished / failed phát trên luồng giao diện"""
+
+    finished = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, task):
+        super().__init__()
+        self.priority = task.priority
+        self.token = task.token
+        self.name = task.name
+        self.future = task.future
+        app = QCoreApplication.instance()
+        if app is not None and self.thread() is not app.thread():
+            # Gửi từ luồng phụ: signal vẫn phải về luồng giao diện
+            self.moveToThread(app.thread())
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+    def cancel(self):
+        self.token.cancel()
+
+
+class _Task:
+    """Phần worker thấy của một Job: không giữ QObject, để Job chỉ bị hủy trên luồng giao diện"""
+
+    __slots__ = ("id", "fn", "args", "kwargs", "priority", "token", "process", "name",
+                 "future", "submitted")
+
+    def __init__(self, task_id, fn, args, kwargs, priority, token, process, name):
+        self.id = task_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.token = token or CancelToken()
+        self.process = process
+        self.name = name or getattr(fn, "__name__", "job")
+        self.future = Future()
+        self.submitted = time.perf_counter_ns()
+
+    @property
+    def cancelled(self):
+        return self.token.cancelled
+
+
+class _Bridge(QObject):
+    """Chuyển kết quả từ luồng worker về luồng giao diện rồi mới phát signal của Job"""
+
+    done = Signal(int, bool, object)
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.jobs = {}  # id -> Job chưa báo kết quả
+        self.done.connect(self._deliver)
+
+    def _deliver(self, task_id, ok, value):
+        with self.lock:
+            job = self.jobs.pop(task_id, None)
+        if job is None or job.cancelled:
+            return
+        if ok:
+            job.finished.emit(value)
+        else:
+            job.failed.emit(value)
+
+
+class JobScheduler:
+    def __init__(self, thread_workers=THREAD_WORKERS, process_workers=PROCESS_WORKERS):
+        self.thread_workers = thread_workers
+        self.process_workers = process_workers
+        self._cond = threading.Condition()
+        self._ids = itertools.count()
+        self._queues = {False: [], True: []}  # process? -> heap (priority, id, _Task)
+        self._running = {False: [], True: []}  # process? -> [_Task đang chạy]
+        self._readers = 0
+        self._closed = False
+        self._executor = None
+        self._threads = []
+        self._bridge = _Bridge()
+        app = QCoreApplication.instance()
+        if app is not None:
+            self._bridge.moveToThread(app.thread())
+        atexit.register(self.shutdown)
+
+    # ------------------------------
+    def submit(self, fn, *args, priority=PRIORITY_BACKGROUND, token=None, process=False,
+               name=None, **kwargs):
+        """Xếp fn(*args, **kwargs) vào hàng đợi, trả về Job (gọi trên luồng giao diện)"""
+        task = _Task(next(self._ids), fn, args, kwargs, priority, token, process, name)
+        job = Job(task)
+        with self._cond:
+            if self._closed:
+                task.future.cancel()
+                return job
+            with self._bridge.lock:
+                self._bridge.jobs[task.id] = job
+            heapq.heappush(self._queues[process], (priority, task.id, task))
+            if not process and len(self._threads) < self.thread_workers:
+                self._start_thread()
+            self._cond.notify_all()
+        if process:
+            self._pump_processes()
+        tracing.count("lịch việc: gửi")
+        return job
+
+    def reader_opened(self):
+        with self._cond:
+            self._readers += 1
+
+    def reader_closed(self):
+        with self._cond:
+            self._readers = max(0, self._readers - 1)
+            self._cond.notify_all()
+        self._pump_processes()
+
+    def pending(self):
+        """Số job đang chờ và đang chạy"""
+        with self._cond:
+            return sum(len(q) for q in self._queues.values()) + sum(
+                len(r) for r in self._running.values()
+            )
+
+    def shutdown(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            for queue in self._queues.values():
+                for _, _, task in queue:
+                    task.future.cancel()
+                queue.clear()
+            self._cond.notify_all()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------
+    def _allowed(self, task, process):
+        """Việc nền bị kìm lại khi đang có khung đọc mở (gọi khi giữ self._cond)"""
+        running = self._running[process]
+        limit = self.process_workers if process else self.thread_workers
+        if task.priority < PRIORITY_BACKGROUND:
+            return len(running) < limit
+        background = [r for r in running if r.priority >= PRIORITY_BACKGROUND]
+        if self._readers:
+            return not running
+        # Luôn chừa một chỗ cho việc người dùng đang chờ
+        return len(running) < limit and len(background) < max(1, limit - 1)
+
+    def _pop(self, process):
+        """Việc kế tiếp được phép chạy (gọi khi giữ self._cond), None nếu chưa có"""
+        queue = self._queues[process]
+        while queue:
+            task = queue[0][2]
+            if task.cancelled:
+                heapq.heappop(queue)
+                task.future.cancel()
+                # Để luồng giao diện bỏ Job khỏi danh sách chờ báo kết quả
+                self._bridge.done.emit(task.id, False, None)
+                continue
+            if not self._allowed(task, process):
+                return None
+            heapq.heappop(queue)
+            self._running[process].append(task)
+            return task
+        return None
+
+    def _start_thread(self):
+        thread = threading.Thread(
+            target=self._thread_main, name=f"job-{len(self._threads) + 1}", daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _thread_main(self):
+        while True:
+            with self._cond:
+                task = None
+                while not self._closed:
+                    task = self._pop(False)
+                    if task is not None:
+                        break
+                    self._cond.wait()
+                if task is None:
+                    return
+            started = time.perf_counter_ns()
+            try:
+                result, error = task.fn(*task.args, **task.kwargs), None
+            except Exception as e:
+                result, error = None, e
+            self._finish(task, started, result, error)
+
+    def _pump_processes(self):
+        with self._cond:
+            while not self._closed:
+                task = self._pop(True)
+                if task is None:
+                    return
+                if self._executor is None:
+                    # spawn: tiến trình chính có luồng nền và Qt, fork lúc đó không an toàn
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.process_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=tracing.configure_logging,
+                    )
+                started = time.perf_counter_ns()
+                future = self._executor.submit(task.fn, *task.args, **task.kwargs)
+                future.add_done_callback(lambda f, t=task, s=started: self._process_done(t, s, f))
+
+    def _process_done(self, task, started, future):
+        # Chạy trên luồng quản lý của executor
+        if future.cancelled():
+            result, error = None, RuntimeError("đã hủy")
+        else:
+            error = future.exception()
+            result = None if error is not None else future.result()
+        self._finish(task, started, result, error)
+        self._pump_processes()
+
+    def _finish(self, task, started, result, error):
+        with self._cond:
+            self._running[task.process].remove(task)
+            self._cond.notify_all()
+        tracing.record(
+            f"job.{task.name}", started, time.perf_counter_ns(),
+            priority=task.priority, waited_ms=round((started - task.submitted) / 1e6, 1),
+            cancelled=task.cancelled,
+        )
+        if error is not None:
+            logger.warning("Lỗi việc nền {}: {}", task.name, error)
+            task.future.set_exception(error)
+            self._bridge.done.emit(task.id, False, str(error))
+        else:
+            task.future.set_result(result)
+            self._bridge.done.emit(task.id, True, result)
+
+
+job_scheduler = LazySingleton(JobScheduler)
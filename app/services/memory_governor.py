@@ -0,0 +1,123 @@
+"""
+Ngân sách bộ nhớ chung cho mọi cache trong app (ảnh trang PDF, ô, trang văn bản,
+ảnh thu nhỏ, ảnh bìa...). Mỗi cache tự giới hạn theo byte như trước, thêm vào đó
+tổng của tất cả không vượt ngân sách: khi vượt, mục dùng lâu nhất trong toàn bộ
+các cache bị bỏ trước, bất kể thuộc cache nào.
+
+Ngân sách: biến môi trường EBOOK_MEMORY_MB (mặc định DEFAULT_BUDGET_MB).
+EBOOK_MEMORY_DEBUG=1 bật tracemalloc để xem phần bộ nhớ Python tăng lên ở đâu.
+"""
+import itertools
+import os
+import weakref
+
+from ..utils.tracing import logger
+
+DEFAULT_BUDGET_MB = 512
+
+
+class MemoryGovernor:
+    """
+    Cache đăng ký vào đây cần có: name, max_bytes, current_bytes, hits, misses,
+    __len__, oldest_tick() (None nếu rỗng) và evict_oldest() trả về số byte đã bỏ.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.evictions = 0
+        self._caches = weakref.WeakSet()
+        self._ticks = itertools.count()
+        self._last_snapshot = None
+        self._debug = False
+
+    def register(self, cache):
+        self._caches.add(cache)
+
+    def unregister(self, cache):
+        self._caches.discard(cache)
+
+    def caches(self):
+        return list(self._caches)
+
+    def next_tick(self):
+        """Đồng hồ dùng chung: mục có tick nhỏ hơn là mục dùng lâu hơn, so được giữa các cache"""
+        return next(self._ticks)
+
+    def used_bytes(self):
+        return sum(cache.current_bytes for cache in self.caches())
+
+    def set_budget(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.enforce()
+
+    def enforce(self):
+        """Bỏ các mục dùng lâu nhất (trong mọi cache) cho tới khi tổng nằm trong ngân sách"""
+        caches = self.caches()
+        used = sum(cache.current_bytes for cache in caches)
+        while used > self.budget_bytes:
+            candidates = [c for c in caches if len(c)]
+            if not candidates:
+                break
+            victim = min(candidates, key=lambda c: c.oldest_tick())
+            used -= victim.evict_oldest()
+            self.evictions += 1
+
+    def report(self):
+        """Gộp theo tên cache: {tên: {caches, entries, bytes, max_bytes, hits, misses}}"""
+        stats = {}
+        for cache in self.caches():
+            entry = stats.setdefault(
+                cache.name,
+                {"caches": 0, "entries": 0, "bytes": 0, "max_bytes": 0, "hits": 0, "misses": 0},
+            )
+            entry["caches"] += 1
+            entry["entries"] += len(cache)
+            entry["bytes"] += cache.current_bytes
+            entry["max_bytes"] += cache.max_bytes
+            entry["hits"] += cache.hits
+            entry["misses"] += cache.misses
+        return dict(sorted(stats.items(), key=lambda item: item[1]["bytes"], reverse=True))
+
+    # --- GỠ LỖI BẰNG TRACEMALLOC (import ~10 ms nên chỉ nạp khi bật) ---
+    def enable_debug(self, frames=1):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        self._debug = True
+
+    def debug_enabled(self):
+        return self._debug
+
+    def log_snapshot(self, label, limit=10):
+        """Log các dòng code cấp phát thêm nhiều nhất kể từ lần chụp trước (chỉ khi bật debug)"""
+        if not self._debug:
+            return
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),)
+        )
+        if self._last_snapshot is None:
+            stats = snapshot.statistics("lineno")
+        else:
+            stats = snapshot.compare_to(self._last_snapshot, "lineno")
+        self._last_snapshot = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"{label}: Python {current / 1e6:.1f} MB (đỉnh {peak / 1e6:.1f} MB), "
+                 f"cache {self.used_bytes() / 1e6:.1f}/{self.budget_bytes / 1e6:.0f} MB"]
+        lines += [f"  {stat}" for stat in stats[:limit]]
+        logger.info("\n".join(lines))
+
+
+def _budget_from_env():
+    try:
+        return int(float(os.environ.get("EBOOK_MEMORY_MB", DEFAULT_BUDGET_MB)) * 1024 * 1024)
+    except ValueError:
+        return DEFAULT_BUDGET_MB * 1024 * 1024
+
+
+memory_governor = MemoryGovernor(_budget_from_env())
+if os.environ.get("EBOOK_MEMORY_DEBUG"):
+    memory_governor.enable_debug()
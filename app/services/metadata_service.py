@@ -1,51 +1,46 @@
-import fitz  # PyMuPDF
-from ebooklib import epub
 import os
 
+from .. import formats
+from ..utils.tracing import logger, traced
 
-def get_book_metadata(path, ext):
-    """Trả về dict: {'author': str, 'title': str}"""
+
+@traced()
+def get_book_metadata(path, ext, document=None):
+    """
+    Trả về dict: {'author': str, 'title': str}
+    document: formats.Document đã mở của sách này (dùng lại phần đã phân tích).
+    """
     meta = {"author": "Unknown", "title": ""}
 
     try:
-        # === EPUB ===
-        if ext == ".epub":
-            try:
-                book = epub.read_epub(path)
-                # Lấy tác giả (Dublin Core)
-                creators = book.get_metadata("DC", "creator")
-                if creators:
-                    meta["author"] = creators[0][0]
-
-                # Lấy title chuẩn trong metadata nếu có
-                titles = book.get_metadata("DC", "title")
-                if titles:
-                    meta["title"] = titles[0][0]
-            except:
-                pass
-
-        # === PDF ===
-        elif ext == ".pdf":
-            try:
-                doc = fitz.open(path)
-                if doc.metadata:
-                    meta["author"] = doc.metadata.get("author", "")
-                    t = doc.metadata.get("title", "")
-                    if t:
-                        meta["title"] = t
-                doc.close()
-            except:
-                pass
-
-        # === MOBI / AZW3 (Cơ bản) ===
-        # Các định dạng này xử lý phức tạp hơn, tạm thời lấy mặc định
-        # hoặc dùng thư viện 'mobi' nếu đã cài deep
-
+        if document is None:
+            backend = formats.backend_for(ext)
+            if backend is not None:
+                with backend(path) as doc:
+                    meta.update(doc.metadata())
+        else:
+            meta.update(document.metadata())
     except Exception as e:
-        print(f"Metadata error: {e}")
+        logger.warning("Không đọc được metadata {}: {}", path, e)
 
     # Fallback nếu không tìm thấy tác giả
     if not meta["author"] or meta["author"] == "Unknown":
         meta["author"] = "Unknown Author"
 
     return meta
+
+
+def read_book_info(path):
+    """
+    (tên, tác giả, đường dẫn ảnh bìa) của file sách, dùng khi thêm sách vào thư viện.
+    Một Document cho cả metadata lẫn ảnh bìa: file chỉ bị phân tích một lần.
+    Không import Qt: chạy được ở luồng nền hay tiến trình worker.
+    """
+    from .cover_service import get_cover
+
+    title = os.path.splitext(os.path.basename(path))[0]
+    ext = os.path.splitext(path)[1].lower()
+    with formats.open_document(path) as document:
+        meta = get_book_metadata(path, ext, document)
+        cover = get_cover(path, ext, document)
+    return meta["title"] or title, meta["author"], cover
@@ -0,0 +1,56 @@
+"""
+Hàm dùng chung để rasterize trang PDF và chuyển sang ảnh Qt.
+
+Phần fitz không import Qt (tiến trình worker dùng được mà khởi động nhanh),
+phần chuyển sang QImage/QPixmap import Qt khi cần.
+"""
+import fitz  # PyMuPDF
+
+
+def rasterize(page, zoom=1.0, dpr=1.0, clip=None, alpha=False):
+    """
+    Render trang ra fitz.Pixmap ở tỉ lệ zoom × dpr (pixel thiết bị).
+    page có thể là fitz.Page hoặc fitz.DisplayList của trang đó.
+    Mặc định không có kênh alpha: trang PDF vốn nền trắng, bỏ alpha
+    giúp ảnh nhỏ hơn 25% và Qt không phải premultiply.
+    """
+    scale = zoom * dpr
+    if clip is not None:
+        clip = fitz.Rect(clip) & page.rect
+    return page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, alpha=alpha)
+
+
+def pack(pix):
+    """Đóng gói pixmap để gửi qua tiến trình, theo đúng thứ tự tham số của image_from_buffer"""
+    return pix.samples, pix.width, pix.height, pix.stride, pix.alpha
+
+
+def image_from_buffer(buffer, width, height, stride, alpha=False, dpr=1.0):
+    """
+    QImage đọc thẳng trên buffer, không sao chép.
+    PySide giữ tham chiếu tới buffer cho tới khi QImage (và các bản chia sẻ) bị hủy.
+    """
+    from PySide6.QtGui import QImage
+
+    fmt = QImage.Format_RGBA8888 if alpha else QImage.Format_RGB888
+    img = QImage(buffer, width, height, stride, fmt)
+    img.setDevicePixelRatio(dpr)
+    return img
+
+
+def to_qpixmap(pix, dpr=1.0):
+    """
+    fitz.Pixmap -> QPixmap, chỉ một lần sao chép (lúc Qt chuyển sang định dạng của nó).
+    samples_mv không giữ pix sống nên QImage tạm chỉ được dùng trong hàm này.
+    """
+    from PySide6.QtGui import QPixmap
+
+    img = image_from_buffer(
+        pix.samples_mv, pix.width, pix.height, pix.stride, pix.alpha, dpr
+    )
+    return QPixmap.fromImage(img)
+
+
+def render_qpixmap(page, zoom=1.0, dpr=1.0, clip=None, alpha=False):
+    """Render trang thẳng ra QPixmap (chạy trên luồng GUI)"""
+    return to_qpixmap(rasterize(page, zoom, dpr, clip, alpha), dpr)
@@ -0,0 +1,206 @@
+"""
+Dàn lại chữ của trang PDF thành HTML (chế độ "Dàn chữ" của khung đọc).
+
+Lấy các khối chữ của trang bằng page.get_text("dict"), nối các dòng thành đoạn văn
+(bỏ gạch nối cuối dòng, đoạn bị cắt giữa hai khối thì nối lại), nhận tiêu đề theo cỡ
+chữ lớn hơn thân bài và bỏ số trang ở đầu/cuối trang. HTML được hiển thị bằng khung
+đọc văn bản nên chữ to nhỏ theo cỡ chữ người dùng chọn, không phải render ảnh trang.
+
+Không import Qt: chạy được trong tiến trình worker. HTML từng trang được lưu trên
+đĩa theo fingerprint, mở lại sách không phải trích lại.
+"""
+import os
+from collections import Counter
+from html import escape
+
+from ..utils.paths import user_cache_dir
+from ..utils.tracing import logger
+
+# Tăng khi đổi cách dàn chữ để bỏ qua cache cũ
+REFLOW_VERSION = 1
+
+# Chữ to hơn thân bài chừng này lần thì coi là tiêu đề (h3), to hơn nữa là h2
+HEADING_RATIO = 1.2
+MAJOR_HEADING_RATIO = 1.5
+# Khối chỉ có số nằm trong dải này (tỉ lệ chiều cao trang) ở đầu/cuối trang là số trang
+MARGIN_BAND = 0.1
+# Ký tự kết thúc câu: dòng ngắn kết thúc bằng các ký tự này là hết đoạn
+SENTENCE_END = ".!?:;…\"'”’»)"
+
+# span["flags"] của PyMuPDF
+FLAG_ITALIC = 2
+FLAG_BOLD = 16
+
+
+def _span_html(spans):
+    """Các span của một dòng thành HTML, gộp các span liền nhau cùng kiểu chữ"""
+    texts = [span["text"] for span in spans]
+    if not texts:
+        return ""
+    texts[0] = texts[0].lstrip()
+    texts[-1] = texts[-1].rstrip()
+    styles = [(bool(s["flags"] & FLAG_BOLD), bool(s["flags"] & FLAG_ITALIC)) for s in spans]
+    # Ký tự lẻ lấy từ font dự phòng (vd. chữ có dấu) mất kiểu đậm/nghiêng: theo kiểu hai bên
+    for i in range(1, len(spans) - 1):
+        if (
+            styles[i] == (False, False)
+            and styles[i - 1] == styles[i + 1] != styles[i]
+            and len(texts[i].strip()) <= 2
+        ):
+            styles[i] = styles[i - 1]
+
+    parts = []
+    style, text = None, ""
+    for span_text, span_style in zip(texts, styles):
+        if span_style != style and text:
+            parts.append(_styled(text, style))
+            text = ""
+        style = span_style
+        text += span_text
+    if text:
+        parts.append(_styled(text, style))
+    return "".join(parts)
+
+
+def _styled(text, style):
+    bold, italic = style
+    html = escape(text, quote=False)
+    if italic:
+        html = f"<i>{html}</i>"
+    if bold:
+        html = f"<b>{html}</b>"
+    return html
+
+
+def _line_text(line):
+    return "".join(span["text"] for span in line["spans"])
+
+
+def _line_size(line):
+    """Cỡ chữ chủ đạo của dòng (theo số ký tự)"""
+    sizes = Counter()
+    for span in line["spans"]:
+        sizes[round(span["size"])] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+
+def _body_size(blocks):
+    sizes = Counter()
+    for block in blocks:
+        for line in block["lines"]:
+            for span in line["spans"]:
+                sizes[round(span["size"])] += len(span["text"].strip())
+    return sizes.most_common(1)[0][0] if sizes else 0
+
+
+def _is_page_number(block, page_height):
+    text = " ".join(_line_text(line) for line in block["lines"]).strip()
+    if not text.isdigit():
+        return False
+    top, bottom = block["bbox"][1], block["bbox"][3]
+    return bottom < page_height * MARGIN_BAND or top > page_height * (1 - MARGIN_BAND)
+
+
+class _Paragraphs:
+    """Gom các dòng thành đoạn: [(thẻ, html)]"""
+
+    def __init__(self):
+        self.items = []
+        self.tag = None
+        self.html = ""
+        self.plain = ""
+
+    def flush(self):
+        if self.plain.strip():
+            self.items.append((self.tag, self.html.strip()))
+        self.tag, self.html, self.plain = None, "", ""
+
+    def add(self, tag, html, plain):
+        if self.tag != tag:
+            self.flush()
+            self.tag = tag
+        if self.plain.endswith("-") and plain[:1].islower() and self.plain[-2:-1].isalpha():
+            # Từ bị ngắt bằng gạch nối cuối dòng: nối liền lại
+            self.html = self.html[: self.html.rindex("-")] + self.html[self.html.rindex("-") + 1:]
+            self.plain = self.plain[:-1]
+        elif self.plain:
+            self.html += " "
+            self.plain += " "
+        self.html += html
+        self.plain += plain
+
+    def ends_sentence(self):
+        return self.plain.rstrip().endswith(tuple(SENTENCE_END))
+
+
+def page_html(page):
+    """HTML dàn lại của một fitz.Page; trang không có lớp chữ (ảnh scan) trả về chuỗi rỗng"""
+    data = page.get_text("dict", sort=True)
+    blocks = [b for b in data["blocks"] if b.get("type") == 0 and b.get("lines")]
+    height = page.rect.height
+    blocks = [b for b in blocks if not _is_page_number(b, height)]
+    body = _body_size(blocks)
+    if not body:
+        return ""
+
+    paragraphs = _Paragraphs()
+    for block in blocks:
+        x0, x1 = block["bbox"][0], block["bbox"][2]
+        new_block = True
+        for line in block["lines"]:
+            plain = _line_text(line).strip()
+            if not plain:
+                continue
+            size = _line_size(line)
+            if size >= body * MAJOR_HEADING_RATIO:
+                tag = "h2"
+            elif size >= body * HEADING_RATIO:
+                tag = "h3"
+            else:
+                tag = "p"
+
+            if tag == "p" and paragraphs.tag == "p":
+                indented = line["bbox"][0] > x0 + size * 1.5
+                # Khối mới: đoạn trước chưa hết câu và dòng này viết thường -> vẫn là một đoạn
+                continues = not paragraphs.ends_sentence() and plain[:1].islower()
+                if (new_block and not continues) or (indented and not new_block):
+                    paragraphs.flush()
+            elif tag != "p" and new_block:
+                paragraphs.flush()
+            paragraphs.add(tag, _span_html(line["spans"]), plain)
+            new_block = False
+
+            # Dòng ngắn hẳn so với khối và kết thúc câu: hết đoạn
+            if tag == "p" and line["bbox"][2] < x1 - size * 2 and paragraphs.ends_sentence():
+                paragraphs.flush()
+    paragraphs.flush()
+    return "".join(f"<{tag}>{html}</{tag}>" for tag, html in paragraphs.items)
+
+
+# ==========================================
+# CACHE TRÊN ĐĨA
+# ==========================================
+def reflow_cache_path(fingerprint, page_index):
+    return os.path.join(
+        user_cache_dir("reflow", fingerprint), f"{page_index}.v{REFLOW_VERSION}.html"
+    )
+
+
+def load_reflow_html(fingerprint, page_index):
+    """HTML đã lưu của trang, None nếu chưa trích"""
+    try:
+        with open(reflow_cache_path(fingerprint, page_index), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def save_reflow_html(fingerprint, page_index, html):
+    path = reflow_cache_path(fingerprint, page_index)
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning("Lỗi lưu cache dàn chữ: {}", e)
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+from . import pdf_render_worker
+# Cùng thang độ ưu tiên với job_scheduler (số nhỏ chạy trước)
+from .job_scheduler import PRIORITY_PREFETCH, PRIORITY_VISIBLE  # noqa: F401
+from .pdf_raster import image_from_buffer
+from .render_cache import PageRenderCache
+from ..utils import tracing
+
+# Kích thước một ô (pixel thiết bị) khi render theo ô ở zoom cao
+TILE_SIZE = 512
+
+
+class PdfRenderService(QObject):
+    """
+    Render trang PDF ngoài luồng giao diện.
+
+    Dùng tiến trình thay vì luồng vì PyMuPDF giữ GIL trong lúc rasterize,
+    luồng phụ vẫn làm giật giao diện. Mỗi worker tự mở fitz.Document riêng.
+    Yêu cầu được xếp hàng theo độ ưu tiên và chỉ gửi sang worker khi có
+    worker rảnh, nhờ vậy các trang không còn cần có thể bị hủy (retain).
+    Worker gắn với một cuốn sách (giữ DisplayList của các trang vừa render) nên có
+    pool riêng thay vì chạy qua job_scheduler, nhưng dùng cùng thang độ ưu tiên.
+    """
+
+    # (key, QImage) – key = (trang, zoom, dpr) hoặc (trang, zoom, dpr, tx, ty) với ô
+    pageRendered = Signal(object, object)
+    renderFailed = Signal(object, str)
+
+    def __init__(self, path, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.max_workers = max_workers or max(1, min(2, (os.cpu_count() or 1) - 1))
+
+        self._lock = threading.RLock()
+        self._queue = []  # heap (priority, seq, key)
+        self._queued = {}  # key -> priority
+        self._running = set()
+        self._discarded = set()  # đang chạy nhưng không còn cần kết quả
+        self._submitted = {}  # key -> thời điểm gửi cho worker (perf_counter_ns)
+        self._seq = itertools.count()
+        self._closed = False
+
+        # "spawn" để tiến trình con không thừa hưởng trạng thái Qt của tiến trình chính
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=pdf_render_worker.init_worker,
+            initargs=(path,),
+        )
+
+    # ------------------------------
+    def request(self, page_index, zoom, dpr=1.0, priority=PRIORITY_VISIBLE, tile=None):
+        key = PageRenderCache.make_key(page_index, zoom, dpr)
+        if tile is not None:
+            key += tuple(tile)
+        with self._lock:
+            if self._closed:
+                return key
+            if key in self._running:
+                self._discarded.discard(key)
+                return key
+            old = self._queued.get(key)
+            if old is not None and old <= priority:
+                return key
+            # Mục cũ (nếu có) trong heap sẽ bị bỏ qua khi lấy ra
+            self._queued[key] = priority
+            heapq.heappush(self._queue, (priority, next(self._seq), key))
+        self._pump()
+        return key
+
+    def is_pending(self, key):
+        with self._lock:
+            return key in self._queued or (
+                key in self._running and key not in self._discarded
+            )
+
+    def retain(self, keys):
+        """Hủy mọi yêu cầu không nằm trong keys (người dùng đã lật qua)"""
+        keys = set(keys)
+        with self._lock:
+            for key in list(self._queued):
+                if key not in keys:
+                    del self._queued[key]
+            self._discarded = {k for k in self._running if k not in keys}
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            self._queue.clear()
+            self._queued.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------
+    def _pump(self):
+        """Gửi yêu cầu ưu tiên cao nhất cho worker khi còn chỗ trống"""
+        with self._lock:
+            while not self._closed and len(self._running) < self.max_workers:
+                key = self._pop_next()
+                if key is None:
+                    return
+                self._running.add(key)
+                self._submitted[key] = time.perf_counter_ns()
+                if len(key) == 5:
+                    future = self._executor.submit(
+                        pdf_render_worker.render_tile, *key, TILE_SIZE
+                    )
+                else:
+                    future = self._executor.submit(pdf_render_worker.render_page, *key)
+                future.add_done_callback(
+                    lambda f, k=key: self._on_done(k, f)
+                )
+
+    def _pop_next(self):
+        while self._queue:
+            priority, _, key = heapq.heappop(self._queue)
+            if self._queued.get(key) == priority:
+                del self._queued[key]
+                return key
+        return None
+
+    def _on_done(self, key, future):
+        # Chạy trên luồng quản lý của executor, signal sẽ được đưa về luồng GUI
+        with self._lock:
+            self._running.discard(key)
+            stale = key in self._discarded
+            self._discarded.discard(key)
+            closed = self._closed
+            submitted = self._submitted.pop(key, None)
+
+        if closed or future.cancelled():
+            return
+        if submitted is not None:
+            # Từ lúc gửi tới lúc worker trả về (gồm cả chuyển ảnh giữa hai tiến trình)
+            tracing.record(
+                "pdf.render", submitted, time.perf_counter_ns(),
+                page=key[0] + 1, zoom=key[1], tile=len(key) == 5, stale=stale,
+            )
+
+        if not stale:
+            try:
+                # QImage dùng thẳng bytes nhận từ worker, không .copy()
+                img = image_from_buffer(*future.result(), dpr=key[2])
+                self.pageRendered.emit(key, img)
+            except Exception as e:
+                self.renderFailed.emit(key, str(e))
+
+        self._pump()
@@ -0,0 +1,78 @@
+"""
+Phần chạy trong tiến trình worker của PdfRenderService và của job_scheduler.
+Không import Qt ở đây để tiến trình con khởi động nhanh.
+"""
+from collections import OrderedDict
+
+from .. import formats
+
+# Mỗi tiến trình worker giữ một Document riêng (PyMuPDF không an toàn khi
+# dùng chung giữa các luồng); Document tự giữ phần đã phân tích giữa các lần render
+_doc = None
+
+
+def init_worker(path):
+    global _doc
+    _doc = formats.open_document(path)
+
+
+def render_page(page_index, zoom, dpr=1.0):
+    """Trả về (samples, width, height, stride, alpha) để gửi về tiến trình chính"""
+    return _doc.render(page_index, zoom, dpr)
+
+
+def render_tile(page_index, zoom, dpr, tx, ty, tile_size):
+    """Render một ô vuông tile_size×tile_size (pixel thiết bị) của trang"""
+    scale = zoom * dpr
+    clip = (
+        tx * tile_size / scale,
+        ty * tile_size / scale,
+        (tx + 1) * tile_size / scale,
+        (ty + 1) * tile_size / scale,
+    )
+    return _doc.render(page_index, zoom, dpr, clip=clip)
+
+
+# ==========================================
+# JOB CHẠY Ở TIẾN TRÌNH CỦA JOB_SCHEDULER
+# ==========================================
+# Tiến trình của job_scheduler phục vụ nhiều sách: giữ vài Document mở gần nhất
+OPEN_DOCUMENTS = 4
+_documents = OrderedDict()  # path -> Document
+
+
+def _document(path):
+    document = _documents.get(path)
+    if document is None:
+        document = formats.open_document(path)
+        _documents[path] = document
+        if len(_documents) > OPEN_DOCUMENTS:
+            _documents.popitem(last=False)[1].close()
+    else:
+        _documents.move_to_end(path)
+    return document
+
+
+def extract_reflow_page(path, fingerprint, page_index):
+    """Trích HTML dàn chữ của trang và lưu vào cache đĩa, trả về HTML"""
+    from .pdf_reflow import save_reflow_html
+
+    html = _document(path).reflow_html(page_index)
+    save_reflow_html(fingerprint, page_index, html)
+    return html
+
+
+def render_warm_page(path, page_index, zoom, dpr, max_pixels):
+    """
+    (trang, zoom, buffer) của trang đang đọc dở để prewarm_service mở sẵn.
+    Trang lớn hơn max_pixels (trang scan ở zoom cao) thì hạ zoom cho vừa.
+    """
+    document = _document(path)
+    page_index = min(page_index, document.page_count() - 1)
+    if page_index < 0:
+        return None
+    width, height = document.page_size(page_index)
+    scale = (max_pixels / max(1.0, width * height * (zoom * dpr) ** 2)) ** 0.5
+    if scale < 1:
+        zoom *= scale
+    return page_index, zoom, document.render(page_index, zoom, dpr)
@@ -0,0 +1,158 @@
+"""
+Mở sẵn các sách đọc gần đây lúc app rảnh, để bấm vào là đọc tiếp ngay.
+
+Sau khi thư viện đã lên giao diện, job_scheduler (mức việc nền, bị kìm lại khi đang
+đọc sách) đi lần lượt từng cuốn trong danh sách gần đây, mỗi lần một cuốn, nghỉ giữa
+hai cuốn: nạp vị trí đọc đã lưu, HTML đã chuyển đổi và mục lục của sách văn bản, hoặc
+ảnh trang đang đọc dở của PDF (đúng zoom đã lưu; render ở tiến trình worker vì
+PyMuPDF giữ GIL, chạy ở luồng sẽ làm giật giao diện).
+Kết quả được đưa về luồng giao diện: tài liệu/HTML được giữ trong document_pool, ảnh
+trang trong một PageRenderCache (tính vào ngân sách bộ nhớ chung). Khung đọc lấy phần
+đã mở sẵn bằng take() khi mở sách, xong thì release().
+"""
+from PySide6.QtCore import QTimer
+
+from .. import formats
+from ..utils import tracing
+from ..utils.lazy import LazySingleton
+from ..utils.tracing import logger
+from . import pdf_render_worker
+from .bookmark_service import bookmark_service
+from .content_cache import get_book_html
+from .document_pool import document_pool
+from .job_scheduler import PRIORITY_BACKGROUND, job_scheduler
+from .pdf_raster import image_from_buffer
+from .render_cache import PageRenderCache
+
+# Số sách gần đây được mở sẵn
+PREWARM_BOOKS = 3
+# Nghỉ giữa hai cuốn (ms) để phần việc nền không dồn vào một lúc
+PREWARM_GAP_MS = 500
+# Ảnh trang lớn hơn chừng này pixel (trang scan ở zoom cao) thì chỉ mở sẵn bản nhỏ
+MAX_WARM_PIXELS = 4_000_000
+WARM_PAGE_CACHE_BYTES = 48 * 1024 * 1024
+
+
+class WarmBook:
+    """Phần đã mở sẵn của một cuốn sách"""
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.toc = None  # [TocEntry] của sách văn bản
+        self.page = None  # (key trang, QPixmap) của sách theo trang, có sau take()
+        self.handle = None  # lượt mượn document_pool giữ HTML / Document đã mở
+
+    def release(self):
+        if self.handle is not None:
+            self.handle.release()
+            self.handle = None
+
+
+class PrewarmService:
+    def __init__(self):
+        self._warm = {}  # fingerprint -> WarmBook
+        self._queue = []
+        self._dpr = 1.0
+        self._taken = set()  # fingerprint đã được khung đọc mở (khỏi mở sẵn nữa)
+        self.pages = PageRenderCache(max_bytes=WARM_PAGE_CACHE_BYTES, name="trang mở sẵn")
+
+    def start(self, books, dpr=1.0):
+        """Mở sẵn các sách (mới đọc nhất trước); gọi trên luồng giao diện"""
+        self._dpr = dpr
+        self._queue = list(books[:PREWARM_BOOKS])
+        self._next()
+
+    def take(self, fingerprint):
+        """WarmBook của sách (None nếu chưa mở sẵn); khung đọc gọi release() khi đã mượn xong"""
+        self._taken.add(fingerprint)
+        warm = self._warm.pop(fingerprint, None)
+        if warm is None:
+            return None
+        if warm.page is not None:
+            # Ảnh có thể đã bị bỏ khi hết ngân sách bộ nhớ chung
+            pixmap = self.pages.get((fingerprint,) + warm.page)
+            self.pages.discard((fingerprint,) + warm.page)
+            warm.page = (warm.page, pixmap) if pixmap is not None else None
+        tracing.count("mở sẵn: dùng")
+        return warm
+
+    # ------------------------------
+    def _next(self):
+        while self._queue:
+            book = self._queue.pop(0)
+            if book.path and book.fingerprint not in self._taken:
+                job = job_scheduler.submit(
+                    self._load, book, priority=PRIORITY_BACKGROUND, name="prewarm"
+                )
+                job.finished.connect(lambda result, b=book: self._on_warmed(b, result))
+                return
+
+    def _load(self, book):
+        # Chạy trên luồng của job_scheduler: chỉ đọc file, không đụng widget hay document_pool
+        result = {}
+        try:
+            with tracing.span("prewarm.load", ext=book.ext):
+                position = bookmark_service.load_position(book.fingerprint) or {}
+                backend = formats.backend_for(book.ext)
+                if backend is not None and backend.paged:
+                    # Ảnh trang render ở tiến trình worker (xem _on_warmed)
+                    result["position"] = position
+                elif backend is not None:
+                    result["html"] = get_book_html(book.path, book.ext, book.fingerprint)
+                    with backend(book.path, book.fingerprint) as document:
+                        result["toc"] = document.toc()
+        except Exception as e:
+            logger.warning("Lỗi mở sẵn {}: {}", book.path, e)
+            result = {}
+        return result
+
+    def _on_warmed(self, book, result):
+        fingerprint = book.fingerprint
+        if fingerprint in self._taken or fingerprint in self._warm:
+            result = {}
+        if "position" in result:
+            position = result["position"]
+            job = job_scheduler.submit(
+                pdf_render_worker.render_warm_page, book.path, position.get("page", 0),
+                position.get("zoom", 1.0), self._dpr, MAX_WARM_PIXELS,
+                priority=PRIORITY_BACKGROUND, process=True, name="prewarm_page",
+            )
+            job.finished.connect(lambda rendered, b=book: self._on_page_rendered(b, rendered))
+            job.failed.connect(lambda _error: self._schedule_next())
+            return
+        if "html" in result:
+            warm = WarmBook(fingerprint)
+            html = result["html"]
+            warm.handle = document_pool.acquire(("html", fingerprint), lambda: html)
+            warm.toc = result["toc"]
+            self._warm[fingerprint] = warm
+            tracing.count("mở sẵn: sách")
+        self._schedule_next()
+
+    def _on_page_rendered(self, book, rendered):
+        fingerprint = book.fingerprint
+        if rendered and fingerprint not in self._taken and fingerprint not in self._warm:
+            from PySide6.QtGui import QPixmap
+
+            page, zoom, buffer = rendered
+            key = PageRenderCache.make_key(page, zoom, self._dpr)
+            image = image_from_buffer(*buffer, dpr=self._dpr)
+            warm = WarmBook(fingerprint)
+            warm.page = key
+            self.pages.put((fingerprint,) + key, QPixmap.fromImage(image))
+            # Document mở sẵn trên luồng giao diện (PyMuPDF không dùng chung giữa các luồng)
+            warm.handle = document_pool.acquire(
+                ("doc", fingerprint),
+                lambda: formats.open_document(book.path, fingerprint),
+                close=lambda doc: doc.close(),
+            )
+            warm.handle.document.page_count()
+            self._warm[fingerprint] = warm
+            tracing.count("mở sẵn: sách")
+        self._schedule_next()
+
+    def _schedule_next(self):
+        QTimer.singleShot(PREWARM_GAP_MS, self._next)
+
+
+prewarm_service = LazySingleton(PrewarmService)
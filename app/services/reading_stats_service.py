@@ -0,0 +1,214 @@
+import atexit
+import time
+from datetime import date, timedelta
+
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
+
+NAMESPACE = "stats"
+# Khoảng lặng dài hơn mức này coi như người đọc đã rời máy, chỉ tính tối đa chừng này giây
+IDLE_CAP_S = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    book TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    page INTEGER,
+    chapter TEXT
+);
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day TEXT PRIMARY KEY,
+    seconds REAL NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS weekly_stats (
+    week TEXT PRIMARY KEY,
+    seconds REAL NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS book_stats (
+    book TEXT PRIMARY KEY,
+    title TEXT,
+    seconds REAL NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 0,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    last_read REAL,
+    last_page INTEGER,
+    total_pages INTEGER
+);
+"""
+
+_UPSERT_DAY = (
+    "INSERT INTO daily_stats (day, seconds, pages) VALUES (?, ?, ?) "
+    "ON CONFLICT(day) DO UPDATE SET seconds = seconds + excluded.seconds, "
+    "pages = pages + excluded.pages"
+)
+_UPSERT_WEEK = (
+    "INSERT INTO weekly_stats (week, seconds, pages) VALUES (?, ?, ?) "
+    "ON CONFLICT(week) DO UPDATE SET seconds = seconds + excluded.seconds, "
+    "pages = pages + excluded.pages"
+)
+
+
+def week_key(day):
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+class ReadingStatsService:
+    """
+    Ghi lại phiên đọc vào nhật ký sự kiện (chỉ thêm, không sửa) và cập nhật
+    ngay các bảng tổng hợp theo ngày / tuần / sách.
+    Màn thống kê chỉ đọc bảng tổng hợp nên không phải quét lại lịch sử.
+    """
+
+    def __init__(self, store=state_store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+        self.sessions = {}  # book -> {"last_ts", "page", "chapter"}
+        atexit.register(self.stop_all)
+
+    # ------------------------------
+    # GHI SỰ KIỆN
+    # ------------------------------
+    def start_session(self, book, title, page=0, total_pages=None):
+        ts = time.time()
+        if book in self.sessions:
+            self.stop_session(book)
+        self.sessions[book] = {"last_ts": ts, "page": page, "chapter": None}
+        self.store.write(
+            "INSERT INTO book_stats (book, title, sessions, last_read, last_page, total_pages) "
+            "VALUES (?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT(book) DO UPDATE SET title = excluded.title, "
+            "sessions = sessions + 1, last_read = excluded.last_read, "
+            "total_pages = COALESCE(excluded.total_pages, total_pages)",
+            (book, title, ts, page, total_pages),
+        )
+        self._log(ts, book, "start", page)
+
+    def page_turn(self, book, page, total_pages=None):
+        session = self.sessions.get(book)
+        if session is None or page == session["page"]:
+            return
+        ts = time.time()
+        # Chỉ tính trang đọc tiếp theo, nhảy trang / lùi lại không tính
+        pages = 1 if page == session["page"] + 1 else 0
+        session["page"] = page
+        self._account(book, session, ts, pages)
+        if total_pages:
+            self.store.write(
+                "UPDATE book_stats SET total_pages = ? WHERE book = ?", (total_pages, book)
+            )
+        self._log(ts, book, "page", page)
+
+    def chapter_change(self, book, chapter):
+        session = self.sessions.get(book)
+        if session is None or not chapter or chapter == session["chapter"]:
+            return
+        ts = time.time()
+        session["chapter"] = chapter
+        self._account(book, session, ts, 0)
+        self._log(ts, book, "chapter", session["page"], chapter)
+
+    def stop_session(self, book):
+        session = self.sessions.pop(book, None)
+        if session is None:
+            return
+        ts = time.time()
+        self._account(book, session, ts, 0)
+        self._log(ts, book, "stop", session["page"])
+
+    def stop_all(self):
+        for book in list(self.sessions):
+            self.stop_session(book)
+
+    # ------------------------------
+    # ĐỌC SỐ LIỆU TỔNG HỢP
+    # ------------------------------
+    def daily(self, days=14):
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        return self.store.query(
+            "SELECT day, seconds, pages FROM daily_stats WHERE day >= ? ORDER BY day DESC",
+            (since,),
+        )
+
+    def weekly(self, weeks=8):
+        since = week_key(date.today() - timedelta(weeks=weeks - 1))
+        return self.store.query(
+            "SELECT week, seconds, pages FROM weekly_stats WHERE week >= ? ORDER BY week DESC",
+            (since,),
+        )
+
+    def books(self):
+        return self.store.query(
+            "SELECT book, title, seconds, pages, sessions, last_read, last_page, total_pages "
+            "FROM book_stats ORDER BY last_read DESC"
+        )
+
+    def streak(self):
+        """(chuỗi ngày hiện tại, chuỗi dài nhất). Chuỗi bị đứt nếu hôm qua không đọc"""
+        current = self.store.get(NAMESPACE, "streak", 0)
+        last_day = self.store.get(NAMESPACE, "last_day")
+        if last_day and date.fromisoformat(last_day) < date.today() - timedelta(days=1):
+            current = 0
+        return current, self.store.get(NAMESPACE, "longest_streak", 0)
+
+    def time_left(self, book):
+        """Ước lượng số giây còn lại để đọc hết sách, theo tốc độ đọc của chính sách đó"""
+        rows = self.store.query(
+            "SELECT seconds, pages, last_page, total_pages FROM book_stats WHERE book = ?",
+            (book,),
+        )
+        if not rows:
+            return None
+        return estimate_time_left(*rows[0])
+
+    # ------------------------------
+    def _log(self, ts, book, kind, page=None, chapter=None):
+        self.store.write(
+            "INSERT INTO reading_events (ts, book, kind, page, chapter) VALUES (?, ?, ?, ?, ?)",
+            (ts, book, kind, page, chapter),
+        )
+
+    def _account(self, book, session, ts, pages):
+        """Cộng thời gian từ sự kiện trước (và số trang) vào các bảng tổng hợp"""
+        seconds = min(max(0.0, ts - session["last_ts"]), IDLE_CAP_S)
+        session["last_ts"] = ts
+        if seconds <= 0 and pages == 0:
+            return
+        day = date.fromtimestamp(ts)
+        self.store.write(_UPSERT_DAY, (day.isoformat(), seconds, pages))
+        self.store.write(_UPSERT_WEEK, (week_key(day), seconds, pages))
+        self.store.write(
+            "UPDATE book_stats SET seconds = seconds + ?, pages = pages + ?, "
+            "last_read = ?, last_page = ? WHERE book = ?",
+            (seconds, pages, ts, session["page"], book),
+        )
+        self._touch_streak(day)
+
+    def _touch_streak(self, day):
+        last_day = self.store.get(NAMESPACE, "last_day")
+        if last_day == day.isoformat():
+            return
+        current = self.store.get(NAMESPACE, "streak", 0)
+        if last_day == (day - timedelta(days=1)).isoformat():
+            current += 1
+        else:
+            current = 1
+        longest = max(current, self.store.get(NAMESPACE, "longest_streak", 0))
+        self.store.update(
+            NAMESPACE,
+            {"last_day": day.isoformat(), "streak": current, "longest_streak": longest},
+        )
+
+
+def estimate_time_left(seconds, pages, last_page, total_pages):
+    if not pages or not total_pages or last_page is None:
+        return None
+    remaining = max(0, total_pages - last_page - 1)
+    return seconds / pages * remaining
+
+
+reading_stats = LazySingleton(ReadingStatsService)
@@ -0,0 +1,46 @@
+import time
+
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
+
+# Số sách gần đây được giữ lại (và hiện trong danh sách "Gần đây")
+MAX_RECENT = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recent_books (
+    path TEXT PRIMARY KEY,
+    opened REAL NOT NULL
+);
+"""
+
+
+class RecentService:
+    """Các sách mở gần đây (mới nhất trước), lưu lại để lần chạy sau mở sẵn"""
+
+    def __init__(self, store=state_store):
+        self.store = store
+        self.store.ensure_schema(SCHEMA)
+
+    def recent_paths(self, limit=MAX_RECENT):
+        rows = self.store.query(
+            "SELECT path FROM recent_books ORDER BY opened DESC LIMIT ?", (limit,)
+        )
+        return [row[0] for row in rows]
+
+    def touch(self, book):
+        """Đưa sách lên đầu danh sách; sách cũ quá MAX_RECENT bị bỏ"""
+        self.store.write(
+            "INSERT OR REPLACE INTO recent_books (path, opened) VALUES (?, ?)",
+            (book.path, time.time()),
+        )
+        self.store.write(
+            "DELETE FROM recent_books WHERE path NOT IN "
+            "(SELECT path FROM recent_books ORDER BY opened DESC LIMIT ?)",
+            (MAX_RECENT,),
+        )
+
+    def remove(self, book):
+        self.store.write("DELETE FROM recent_books WHERE path = ?", (book.path,))
+
+
+recent_service = LazySingleton(RecentService)
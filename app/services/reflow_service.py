@@ -0,0 +1,60 @@
+from PySide6.QtCore import QObject, Signal
+
+from . import pdf_render_worker
+from .job_scheduler import PRIORITY_PREFETCH, job_scheduler
+from .pdf_reflow import load_reflow_html
+from ..utils import tracing
+
+
+class ReflowService(QObject):
+    """
+    Trích chữ dàn lại (pdf_reflow) của các trang sắp đọc ở tiến trình worker của
+    job_scheduler: get_text của PyMuPDF giữ GIL nên không chạy ở luồng phụ.
+    Mỗi lần xin thì trang không còn trong danh sách bị hủy (chỉ trích trước theo vị trí
+    đọc mới nhất); worker lưu HTML trích xong xuống đĩa rồi báo pageReady.
+    """
+
+    pageReady = Signal(int, str)
+
+    def __init__(self, path, fingerprint, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.fingerprint = fingerprint
+        self._jobs = {}  # trang -> Job đang chờ / đang chạy
+        self._closed = False
+
+    def cached_html(self, page_index):
+        """HTML đã trích (từ đĩa), None nếu chưa có"""
+        return load_reflow_html(self.fingerprint, page_index)
+
+    def request(self, pages):
+        """Trích trước các trang theo thứ tự; trang đã có trên đĩa thì bỏ qua"""
+        if self._closed:
+            return
+        pages = list(pages)
+        for page in list(self._jobs):
+            if page not in pages:
+                self._jobs.pop(page).cancel()
+        for page in pages:
+            if page in self._jobs or load_reflow_html(self.fingerprint, page) is not None:
+                continue
+            job = job_scheduler.submit(
+                pdf_render_worker.extract_reflow_page, self.path, self.fingerprint, page,
+                priority=PRIORITY_PREFETCH, process=True, name="reflow",
+            )
+            job.finished.connect(lambda html, p=page: self._on_done(p, html))
+            # Lỗi đã được job_scheduler ghi log: chỉ bỏ khỏi danh sách đang chờ
+            job.failed.connect(lambda _error, p=page: self._jobs.pop(p, None))
+            self._jobs[page] = job
+
+    def shutdown(self):
+        self._closed = True
+        for job in self._jobs.values():
+            job.cancel()
+        self._jobs = {}
+
+    # ------------------------------
+    def _on_done(self, page, html):
+        self._jobs.pop(page, None)
+        tracing.count("dàn chữ: trích trước")
+        self.pageReady.emit(page, html)
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+
+from .memory_governor import memory_governor
+
+# Mặc định ~96 MB cho ảnh trang đã render (đủ cho vài trang scan lớn)
+DEFAULT_MAX_BYTES = 96 * 1024 * 1024
+
+
+def pixmap_cost(pix):
+    """Ước lượng số byte một QPixmap/QImage chiếm trong bộ nhớ"""
+    if pix is None or pix.isNull():
+        return 0
+    return pix.width() * pix.height() * max(pix.depth(), 8) // 8
+
+
+class PageRenderCache:
+    """
+    LRU cache ảnh trang đã render, key = (trang, zoom, device pixel ratio).
+    Giới hạn theo tổng số byte chứ không theo số trang, vì một trang scan
+    ở zoom 3.0 có thể nặng bằng hàng chục trang văn bản.
+
+    Mọi cache đăng ký với memory_governor: ngoài giới hạn riêng, tổng của tất cả
+    cache không vượt ngân sách chung. on_evict(key) được gọi khi một mục bị bỏ
+    vì hết chỗ, để widget đang hiện ảnh đó trả về ảnh tạm.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, name="pages", on_evict=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.on_evict = on_evict
+        self._items = OrderedDict()  # key -> (pixmap, cost, tick lần dùng cuối)
+        memory_governor.register(self)
+
+    @staticmethod
+    def make_key(page_index, zoom, dpr=1.0):
+        # Làm tròn để 1.1000000001 và 1.1 cùng một key
+        return (page_index, round(zoom, 3), round(dpr, 3))
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        entry = self._items.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._items[key] = (entry[0], entry[1], memory_governor.next_tick())
+        self._items.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def find_page(self, page_index):
+        """Ảnh lớn nhất đang có của trang ở bất kỳ zoom nào (dùng làm ảnh tạm)"""
+        best, best_cost = None, -1
+        for key, (pixmap, cost, _) in self._items.items():
+            if key[0] == page_index and cost > best_cost:
+                best, best_cost = pixmap, cost
+        return best
+
+    def put(self, key, pixmap, cost=None):
+        if pixmap is None:
+            return
+        if cost is None:
+            cost = pixmap_cost(pixmap)
+
+        # Ảnh lớn hơn cả ngân sách thì không cache
+        if cost > self.max_bytes:
+            self.discard(key)
+            return
+
+        self.discard(key)
+        self._items[key] = (pixmap, cost, memory_governor.next_tick())
+        self.current_bytes += cost
+        self._evict()
+        memory_governor.enforce()
+
+    def discard(self, key):
+        entry = self._items.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+
+    def clear(self):
+        self._items.clear()
+        self.current_bytes = 0
+
+    def oldest_tick(self):
+        """Tick của mục dùng lâu nhất (None nếu rỗng), để governor so giữa các cache"""
+        for _, _, tick in self._items.values():
+            return tick
+        return None
+
+    def evict_oldest(self):
+        """Bỏ mục dùng lâu nhất, trả về số byte giải phóng"""
+        key, (_, cost, _) = self._items.popitem(last=False)
+        self.current_bytes -= cost
+        if self.on_evict is not None:
+            self.on_evict(key)
+        return cost
+
+    def _evict(self):
+        # Bỏ các trang dùng lâu nhất cho tới khi nằm trong ngân sách
+        while self.current_bytes > self.max_bytes and self._items:
+            self.evict_oldest()
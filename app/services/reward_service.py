@@ -1,26 +1,21 @@
-import json
-import os
+from ..utils.lazy import LazySingleton
+from .state_store import state_store
 
-# File lưu dữ liệu người dùng
-DATA_FILE = "user_data.json"
+NAMESPACE = "reward"
 
 
 class RewardService:
-    def __init__(self):
+    def __init__(self, store=state_store):
+        self.store = store
         self.data = self.load_data()
 
     def load_data(self):
-        if not os.path.exists(DATA_FILE):
-            return {"exp": 0, "level": 1}
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return {"exp": 0, "level": 1}
+        data = {"exp": 0, "level": 1}
+        data.update(self.store.get_namespace(NAMESPACE))
+        return data
 
     def save_data(self):
-        with open(DATA_FILE, "w", encoding="utf-8") as f:
-            json.dump(self.data, f)
+        self.store.update(NAMESPACE, self.data)
 
     def get_exp(self):
         return self.data.get("exp", 0)
@@ -42,4 +37,4 @@ class RewardService:
         return leveled_up
 
 
-reward_service = RewardService()
+reward_service = LazySingleton(RewardService)
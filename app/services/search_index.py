@@ -0,0 +1,110 @@
+"""
+Chỉ mục tìm kiếm toàn văn (SQLite FTS5) trên nội dung sách.
+Là dữ liệu dẫn xuất nên nằm trong thư mục cache, xóa đi thì chạy lại `python -m app.cli index`.
+"""
+import os
+import sqlite3
+import threading
+
+from ..utils.lazy import LazySingleton
+from ..utils.paths import user_cache_dir
+from ..utils.tracing import traced
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS book_text USING fts5(
+    fingerprint UNINDEXED,
+    title,
+    author,
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def extract_text(path, ext, fingerprint):
+    """Văn bản thuần của sách để đưa vào chỉ mục"""
+    from .. import formats
+    from .content_cache import is_cached_ext, load_cached_html
+
+    document = formats.open_document(path, fingerprint)
+    if document is None:
+        return ""
+    # HTML đã chuyển đổi sẵn thì lấy chữ từ đó, khỏi phân tích lại file gốc
+    if is_cached_ext(ext):
+        html = load_cached_html(fingerprint)
+        if html is not None:
+            from bs4 import BeautifulSoup
+
+            return BeautifulSoup(html, "html.parser").get_text(" ")
+    with document:
+        return "\n".join(document.text())
+
+
+class SearchIndex:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def has(self, fingerprint):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM book_text WHERE fingerprint = ? LIMIT 1", (fingerprint,)
+            ).fetchone()
+        return row is not None
+
+    def fingerprints(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT fingerprint FROM book_text")}
+
+    def add_many(self, docs):
+        """docs: [(fingerprint, title, author, body)], ghi trong một transaction"""
+        with self._lock, self._conn:
+            for fingerprint, title, author, body in docs:
+                self._conn.execute("DELETE FROM book_text WHERE fingerprint = ?", (fingerprint,))
+                self._conn.execute(
+                    "INSERT INTO book_text (fingerprint, title, author, body) VALUES (?, ?, ?, ?)",
+                    (fingerprint, title, author, body),
+                )
+
+    @traced("search.query")
+    def search(self, query, limit=20):
+        """[(fingerprint, title, đoạn trích)] xếp theo độ liên quan"""
+        # Đặt từng từ trong ngoặc kép để ký tự đặc biệt của FTS không gây lỗi cú pháp
+        terms = " ".join('"' + t.replace('"', "") + '"' for t in query.split() if t)
+        if not terms:
+            return []
+        with self._lock:
+            return self._conn.execute(
+                "SELECT fingerprint, title, snippet(book_text, 3, '[', ']', '…', 12) "
+                "FROM book_text WHERE book_text MATCH ? ORDER BY rank LIMIT ?",
+                (terms, limit),
+            ).fetchall()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM book_text").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def search_books(query, books, limit=50):
+    """
+    {book.path: đoạn trích} của các sách trong books có nội dung khớp query.
+    Chạy ở luồng nền: fingerprint của sách chưa tính sẽ phải đọc file.
+    """
+    hits = {}
+    for fingerprint, _title, snippet in search_index.search(query, limit):
+        hits.setdefault(fingerprint, snippet)
+    if not hits:
+        return {}
+    return {book.path: hits[book.fingerprint] for book in books if book.fingerprint in hits}
+
+
+search_index = LazySingleton(
+    lambda: SearchIndex(os.path.join(user_cache_dir(), "search.db"))
+)
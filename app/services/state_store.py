@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+
+from ..utils.lazy import LazySingleton
+from ..utils.paths import user_data_dir
+from ..utils.tracing import logger
+
+# Gom các lần ghi trong khoảng này thành một transaction
+FLUSH_DELAY_S = 0.5
+
+# File cũ (tương đối với thư mục đang chạy) mà GoalService/RewardService dùng chung
+LEGACY_DATA_FILE = "user_data.json"
+LEGACY_KEYS = {
+    "date": "goal",
+    "minutes_read": "goal",
+    "daily_goal": "goal",
+    "exp": "reward",
+    "level": "reward",
+}
+
+
+class StateStore:
+    """
+    Kho trạng thái người dùng trên SQLite (WAL), mỗi service một namespace.
+
+    - Đọc key-value từ bộ nhớ, không chạm đĩa.
+    - Ghi được gom lại và commit trên luồng nền, mỗi lần một transaction
+      (nguyên tử: hoặc ghi hết, hoặc không ghi gì, kể cả khi app bị tắt ngang).
+    - Service khác có thể tạo bảng riêng (ensure_schema) và ghi qua write().
+    """
+
+    def __init__(self, path, flush_delay=FLUSH_DELAY_S):
+        self.path = path
+        self.flush_delay = flush_delay
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._db_lock = threading.Lock()
+        # Một lần commit tại một thời điểm (luồng ghi hoặc query): lấy phần chờ ghi và ghi
+        # xuống đĩa phải liền một mạch, không thì lượt ghi sau có thể đè lên lượt trước
+        self._commit_lock = threading.Lock()
+
+        self._data = {}  # namespace -> {key: value}
+        for ns, key, value in self._conn.execute("SELECT namespace, key, value FROM kv"):
+            self._data.setdefault(ns, {})[key] = json.loads(value)
+
+        self._cond = threading.Condition()
+        self._dirty = {}  # (namespace, key) -> value | _DELETED
+        self._ops = []  # [(sql, params)] theo thứ tự
+        self._generation = 0  # tăng mỗi lần có thay đổi
+        self._committed = 0  # generation đã ghi xuống đĩa
+        self._flush_now = False
+        self._closed = False
+
+        self._writer = threading.Thread(target=self._run, name="state-store", daemon=True)
+        self._writer.start()
+
+    # ------------------------------
+    # KEY-VALUE THEO NAMESPACE
+    # ------------------------------
+    def get(self, namespace, key, default=None):
+        return self._data.get(namespace, {}).get(key, default)
+
+    def get_namespace(self, namespace):
+        return dict(self._data.get(namespace, {}))
+
+    def set(self, namespace, key, value):
+        self.update(namespace, {key: value})
+
+    def update(self, namespace, mapping):
+        ns = self._data.setdefault(namespace, {})
+        with self._cond:
+            for key, value in mapping.items():
+                ns[key] = value
+                self._dirty[(namespace, key)] = value
+            self._changed()
+
+    def delete(self, namespace, key):
+        self._data.get(namespace, {}).pop(key, None)
+        with self._cond:
+            self._dirty[(namespace, key)] = _DELETED
+            self._changed()
+
+    # ------------------------------
+    # BẢNG RIÊNG CHO CÁC SERVICE
+    # ------------------------------
+    def ensure_schema(self, script):
+        """Tạo bảng/chỉ mục (chạy ngay, dùng lúc khởi tạo service)"""
+        with self._db_lock:
+            self._conn.executescript(script)
+
+    def write(self, sql, params=()):
+        """Xếp hàng một câu lệnh ghi, sẽ chạy trong transaction kế tiếp"""
+        with self._cond:
+            self._ops.append((sql, params))
+            self._changed()
+
+    def write_many(self, sql, seq_of_params):
+        with self._cond:
+            self._ops.extend((sql, params) for params in seq_of_params)
+            self._changed()
+
+    def query(self, sql, params=()):
+        """Đọc đồng bộ. Các lệnh ghi còn chờ được commit trước để đọc thấy dữ liệu mới"""
+        with self._cond:
+            pending = self._generation != self._committed
+        if pending:
+            # Đang có lượt commit khác thì chờ nó xong rồi ghi nốt phần còn lại (nếu có)
+            self._commit_pending()
+        with self._db_lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ------------------------------
+    def flush(self, timeout=None):
+        """Chờ tới khi mọi thay đổi hiện có đã được ghi xuống đĩa"""
+        with self._cond:
+            target = self._generation
+            self._flush_now = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush(timeout=5)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join(timeout=5)
+        with self._db_lock:
+            self._conn.close()
+
+    # ------------------------------
+    def _changed(self):
+        # Gọi khi đang giữ self._cond
+        self._generation += 1
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._generation != self._committed
+                )
+                if self._closed:
+                    return
+                # Đợi thêm một chút để gom các lần ghi liên tiếp
+                if not self._flush_now:
+                    self._cond.wait_for(lambda: self._flush_now or self._closed, self.flush_delay)
+                self._flush_now = False
+            self._commit_pending()
+
+    def _commit_pending(self):
+        with self._commit_lock:
+            with self._cond:
+                dirty, self._dirty = self._dirty, {}
+                ops, self._ops = self._ops, []
+                generation = self._generation
+            if dirty or ops:
+                try:
+                    with self._db_lock:
+                        self._conn.execute("BEGIN")
+                        try:
+                            for (ns, key), value in dirty.items():
+                                if value is _DELETED:
+                                    self._conn.execute(
+                                        "DELETE FROM kv WHERE namespace=? AND key=?", (ns, key)
+                                    )
+                                else:
+                                    self._conn.execute(
+                                        "INSERT OR REPLACE INTO kv VALUES (?, ?, ?)",
+                                        (ns, key, json.dumps(value, ensure_ascii=False)),
+                                    )
+                            for sql, params in ops:
+                                self._conn.execute(sql, params)
+                            self._conn.execute("COMMIT")
+                        except Exception:
+                            self._conn.execute("ROLLBACK")
+                            raise
+                except Exception as e:
+                    logger.warning("Lỗi ghi dữ liệu người dùng: {}", e)
+            # Vẫn giữ _commit_lock: mọi thay đổi tới generation đã nằm trên đĩa
+            with self._cond:
+                self._committed = max(self._committed, generation)
+                self._cond.notify_all()
+
+
+_DELETED = object()
+
+
+def migrate_legacy_json(store, path=LEGACY_DATA_FILE):
+    """Chuyển user_data.json cũ vào store (một lần duy nhất)"""
+    if store.get("meta", "legacy_migrated") or not os.path.exists(path):
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        for key, value in legacy.items():
+            ns = LEGACY_KEYS.get(key)
+            if ns and store.get(ns, key) is None:
+                store.set(ns, key, value)
+        store.set("meta", "legacy_migrated", True)
+    except Exception as e:
+        logger.warning("Không chuyển được {}: {}", path, e)
+
+
+def _open_default_store():
+    store = StateStore(os.path.join(user_data_dir(), "state.db"))
+    migrate_legacy_json(store)
+    atexit.register(store.close)
+    return store
+
+
+# Chỉ mở database ở lần dùng đầu tiên, không phải lúc import
+state_store = LazySingleton(_open_default_store)
@@ -1,9 +1,21 @@
-from PySide6.QtPdf import QPdfDocument, QPdfDocumentRenderOptions
-from PySide6.QtGui import QImage, QPixmap
-from PySide6.QtCore import QSize
+import os
 
+from ..utils.paths import user_cache_dir
+from ..utils.tracing import logger
 
-def generate_pdf_thumbnail(pdf_path: str, size: QSize = QSize(200, 260)) -> QPixmap:
+# Qt được import trong từng hàm: CLI (không có GUI) vẫn dùng được phần đường dẫn cache
+
+# Bề rộng ảnh thu nhỏ trang trong dải trang PDF
+PAGE_THUMB_WIDTH = 96
+
+
+def generate_pdf_thumbnail(pdf_path: str, size=None):
+    from PySide6.QtPdf import QPdfDocument, QPdfDocumentRenderOptions
+    from PySide6.QtGui import QImage, QPixmap
+    from PySide6.QtCore import QSize
+
+    if size is None:
+        size = QSize(200, 260)
     doc = QPdfDocument()
     status = doc.load(pdf_path)
 
@@ -20,3 +32,68 @@ def generate_pdf_thumbnail(pdf_path: str, size: QSize = QSize(200, 260)) -> QPix
     doc.render(0, img, opt)
 
     return QPixmap.fromImage(img)
+
+
+# ==========================================
+# ẢNH THU NHỎ TỪNG TRANG (CACHE TRÊN ĐĨA)
+# ==========================================
+def page_thumb_zoom(page_width):
+    return PAGE_THUMB_WIDTH / max(1.0, page_width)
+
+
+def page_thumb_path(fingerprint, page_index):
+    return os.path.join(user_cache_dir("page_thumbs", fingerprint), f"{page_index}.jpg")
+
+
+def load_page_thumbnail(fingerprint, page_index):
+    """Ảnh thu nhỏ đã lưu của trang, hoặc None nếu chưa có"""
+    from PySide6.QtGui import QPixmap
+
+    path = page_thumb_path(fingerprint, page_index)
+    if not os.path.exists(path):
+        return None
+    pix = QPixmap(path)
+    return None if pix.isNull() else pix
+
+
+def save_page_thumbnail(fingerprint, page_index, image):
+    try:
+        image.save(page_thumb_path(fingerprint, page_index), "JPG", 80)
+    except Exception as e:
+        logger.warning("Lỗi lưu thumbnail: {}", e)
+
+
+# ==========================================
+# ẢNH BÌA TRÊN THẺ SÁCH (CHẠY Ở LUỒNG NỀN)
+# ==========================================
+def load_cover_image(cover_path, book_path, width, height, dpr=1.0):
+    """
+    Ảnh bìa đã thu về khung width×height (điểm logic) dạng QImage, None nếu không có.
+    Ưu tiên ảnh bìa đã trích, PDF chưa có thì render trang đầu. Chỉ dùng QImage và
+    QPdfDocument tạo tại chỗ nên gọi được ở luồng nền; QPixmap tạo ở luồng giao diện.
+    """
+    from PySide6.QtCore import QSize, Qt
+    from PySide6.QtGui import QImage
+
+    img = None
+    if cover_path and os.path.exists(cover_path):
+        img = QImage(cover_path)
+    elif book_path.lower().endswith(".pdf"):
+        from PySide6.QtPdf import QPdfDocument
+
+        doc = QPdfDocument()
+        try:
+            doc.load(book_path)
+            if doc.status() == QPdfDocument.Status.Ready:
+                img = doc.render(0, QSize(300, 400))
+        finally:
+            doc.close()
+    if img is None or img.isNull():
+        return None
+
+    # Không giữ cả ảnh gốc vài MB cho mỗi sách
+    size = QSize(int(width * dpr), int(height * dpr))
+    if img.width() > size.width() or img.height() > size.height():
+        img = img.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        img.setDevicePixelRatio(dpr)
+    return img
@@ -0,0 +1,20 @@
+import hashlib
+import os
+
+# Chỉ băm đầu + cuối file: đủ phân biệt sách mà không phải đọc cả file lớn
+_CHUNK = 64 * 1024
+
+
+def book_fingerprint(path):
+    """
+    Mã nhận diện nội dung sách, không đổi khi file bị đổi tên/di chuyển.
+    Dùng làm key cho cache trên đĩa và dữ liệu đọc theo từng sách.
+    """
+    size = os.path.getsize(path)
+    h = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(_CHUNK))
+        if size > 2 * _CHUNK:
+            f.seek(-_CHUNK, os.SEEK_END)
+            h.update(f.read(_CHUNK))
+    return h.hexdigest()[:20]
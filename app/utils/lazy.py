@@ -0,0 +1,30 @@
+import threading
+
+
+class LazySingleton:
+    """
+    Đứng thay cho một object module-level, chỉ tạo object thật ở lần dùng đầu tiên.
+    Nhờ vậy `from ..services.x import x_service` không làm I/O lúc import,
+    mà mọi chỗ gọi vẫn giữ nguyên cú pháp x_service.method().
+    Thuộc tính riêng có tiền tố _lazy để không che mất thuộc tính của object thật.
+    """
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _lazy_get(self):
+        instance = self._lazy_instance
+        if instance is None:
+            with self._lazy_lock:
+                if self._lazy_instance is None:
+                    object.__setattr__(self, "_lazy_instance", self._lazy_factory())
+                instance = self._lazy_instance
+        return instance
+
+    def __getattr__(self, name):
+        return getattr(self._lazy_get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._lazy_get(), name, value)
@@ -0,0 +1,40 @@
+import os
+import sys
+
+APP_NAME = "EbookChat"
+
+
+def _base_cache_dir():
+    if sys.platform == "win32":
+        return os.environ.get("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches")
+    return os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+
+def _base_data_dir():
+    if sys.platform == "win32":
+        return os.environ.get("APPDATA") or os.path.expanduser("~\\AppData\\Roaming")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support")
+    return os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+
+
+def user_data_dir(*parts):
+    """
+    Thư mục dữ liệu người dùng (tiến độ, XP, bookmark...).
+    Khác cache: không được xóa tùy tiện. Tạo thư mục nếu chưa có.
+    """
+    path = os.path.join(_base_data_dir(), APP_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def user_cache_dir(*parts):
+    """
+    Thư mục cache theo từng người dùng (không phụ thuộc thư mục đang chạy).
+    Tạo thư mục nếu chưa có.
+    """
+    path = os.path.join(_base_cache_dir(), APP_NAME, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
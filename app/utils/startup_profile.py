@@ -0,0 +1,59 @@
+"""
+Đo thời gian khởi động theo từng giai đoạn (bật bằng `python main.py --profile-startup`).
+Mốc 0 là lúc main.py bắt đầu chạy (không tính thời gian khởi động trình thông dịch).
+"""
+import time
+
+_enabled = False
+_t0 = time.perf_counter()
+_marks = []  # [(tên giai đoạn, thời điểm kết thúc)]
+_reported = False
+
+# Báo cáo khi đã có đủ các mốc này
+REQUIRED_PHASES = ("first paint", "catalog load")
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def mark(phase):
+    """Ghi lại thời điểm kết thúc một giai đoạn; đủ mốc thì in báo cáo"""
+    if not _enabled or any(name == phase for name, _ in _marks):
+        return
+    _marks.append((phase, time.perf_counter()))
+    seen = {name for name, _ in _marks}
+    if all(p in seen for p in REQUIRED_PHASES):
+        report()
+
+
+def report():
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    print("=== Startup profile ===")
+    prev = _t0
+    for phase, t in sorted(_marks, key=lambda m: m[1]):
+        print(f"{phase:<16} {(t - prev) * 1000:8.1f} ms   (tổng {(t - _t0) * 1000:8.1f} ms)")
+        prev = t
+
+
+def watch_first_paint(widget):
+    """Đánh dấu 'first paint' ở lần widget được vẽ đầu tiên"""
+    from PySide6.QtCore import QObject, QEvent
+
+    class _FirstPaint(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                mark("first paint")
+                obj.removeEventFilter(self)
+            return False
+
+    watcher = _FirstPaint(widget)
+    widget.installEventFilter(watcher)
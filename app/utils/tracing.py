@@ -0,0 +1,199 @@
+"""
+Đo thời gian theo span: ghi log có cấu trúc (loguru), giữ các span gần nhất cho
+bảng hiệu năng trong app và (tùy chọn) xuất file trace Chrome/Perfetto.
+
+    with span("load_book", ext=".epub") as info:
+        ...
+        info["hit"] = True      # thêm trường vào span
+
+    @traced("epub.read")
+    def read_epub(path): ...
+
+Bật trace: `python main.py --trace trace.json`, mở file ở chrome://tracing
+hoặc ui.perfetto.dev. Span trong tiến trình worker chỉ đi vào log của tiến trình đó.
+
+`logger` ở đây là loguru đã cấu hình, nạp khi ghi log lần đầu: import loguru
+tốn ~100 ms, không nên trả lúc khởi động.
+"""
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from .lazy import LazySingleton
+
+# Span lâu hơn ngưỡng này được log mức INFO, còn lại mức TRACE (mặc định không hiện)
+SLOW_SPAN_MS = 100
+# Số span gần nhất giữ lại cho bảng hiệu năng
+RECENT_SPANS = 300
+# Số thứ tự mức log của loguru, để bỏ qua log bị lọc mà không cần nạp loguru
+LEVELS = {"TRACE": 5, "DEBUG": 10, "INFO": 20, "SUCCESS": 25, "WARNING": 30,
+          "ERROR": 40, "CRITICAL": 50}
+
+_recent = deque(maxlen=RECENT_SPANS)  # (tên, ms, trường)
+_counters = Counter()
+_lock = threading.Lock()
+_trace_events = None  # list sự kiện Chrome trace khi đang ghi
+_trace_path = None
+_thread_names = {}
+
+_log_level = None
+_log_path = None
+
+
+def _stderr_level():
+    return (_log_level or os.environ.get("EBOOK_LOG_LEVEL") or "INFO").upper()
+
+
+def _min_level():
+    return LEVELS["TRACE"] if _log_path else LEVELS.get(_stderr_level(), LEVELS["INFO"])
+
+
+def _apply_sinks(log):
+    log.remove()
+    log.add(sys.stderr, level=_stderr_level())
+    if _log_path:
+        log.add(_log_path, level="TRACE", serialize=True, enqueue=True)
+
+
+def _load_logger():
+    from loguru import logger as loguru_logger
+
+    _apply_sinks(loguru_logger)
+    return loguru_logger
+
+
+logger = LazySingleton(_load_logger)
+
+
+def use_app_sinks():
+    """
+    Áp cấu hình log của app lên loguru ngay: gọi trước khi dùng thư viện tự log qua
+    loguru (vd. mobi), nếu không chúng ghi cả mức DEBUG ra stderr theo mặc định.
+    """
+    logger._lazy_get()
+
+
+def configure_logging(level=None, path=None):
+    """
+    Log ra stderr từ mức level (mặc định biến môi trường EBOOK_LOG_LEVEL, không có thì INFO).
+    path: ghi thêm mọi span ra file JSON lines để gửi kèm khi báo lỗi chậm.
+    """
+    global _log_level, _log_path
+    _log_level, _log_path = level, path
+    if logger._lazy_instance is not None:
+        _apply_sinks(logger._lazy_instance)
+
+
+def start_trace(path):
+    """Bắt đầu ghi sự kiện Chrome trace, tự lưu ra path khi thoát"""
+    global _trace_events, _trace_path
+    with _lock:
+        _trace_events = []
+        _trace_path = path
+    atexit.register(save_trace)
+
+
+def save_trace(path=None):
+    path = path or _trace_path
+    if _trace_events is None or not path:
+        return
+    with _lock:
+        events = list(_trace_events)
+        names = dict(_thread_names)
+    pid = os.getpid()
+    meta = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in names.items()
+    ]
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f,
+                      ensure_ascii=False, default=str)
+        logger.info("Đã ghi trace {} ({} span)", path, len(events))
+    except OSError as e:
+        logger.warning("Lỗi ghi trace {}: {}", path, e)
+
+
+def record(name, start_ns, end_ns, error=None, **fields):
+    """Ghi một span đã đo sẵn (time.perf_counter_ns), vd. từ lúc gửi yêu cầu tới lúc có kết quả"""
+    ms = (end_ns - start_ns) / 1e6
+    if error is not None:
+        fields["error"] = repr(error)
+    _recent.append((name, ms, fields))
+
+    if _trace_events is not None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start_ns / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": fields,
+        }
+        with _lock:
+            _trace_events.append(event)
+            _thread_names.setdefault(thread.ident, thread.name)
+
+    if error is not None:
+        level, message = "WARNING", "{} lỗi sau {:.1f} ms: {!r}"
+    elif ms >= SLOW_SPAN_MS:
+        level, message = "INFO", "{} chậm: {:.1f} ms"
+    else:
+        level, message = "TRACE", "{} {:.1f} ms"
+    if LEVELS[level] < _min_level():
+        return
+    log = logger.bind(span=name, duration_ms=round(ms, 2), **fields)
+    if error is not None:
+        log.log(level, message, name, ms, error)
+    else:
+        log.log(level, message, name, ms)
+
+
+@contextmanager
+def span(name, **fields):
+    """Đo khối lệnh; trả về dict fields để bổ sung thông tin trong lúc chạy"""
+    start = time.perf_counter_ns()
+    try:
+        yield fields
+    except BaseException as e:
+        record(name, start, time.perf_counter_ns(), error=e, **fields)
+        raise
+    record(name, start, time.perf_counter_ns(), **fields)
+
+
+def traced(name=None):
+    """Decorator: mỗi lần gọi hàm là một span (mặc định tên module.hàm)"""
+
+    def wrap(fn):
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+
+        return inner
+
+    return wrap
+
+
+def count(name, n=1):
+    """Bộ đếm đơn giản (vd. cache trúng / trượt), hiện trong bảng hiệu năng"""
+    _counters[name] += n
+
+
+def counters():
+    return dict(_counters)
+
+
+def recent_spans():
+    """Các span gần nhất, mới nhất trước: [(tên, ms, trường)]"""
+    return list(reversed(_recent))
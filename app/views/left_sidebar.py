@@ -140,10 +140,20 @@ class LeftSidebar(QWidget):
         # Lưu dữ liệu vào item để dùng khi click
         item.setData(Qt.UserRole, book)
 
-    def add_recent(self, book):
+    def add_recent(self, book, limit=None):
+        """Đưa sách lên đầu danh sách gần đây (sách đã có thì chuyển lên)"""
+        self.remove_recent(book)
         item = QListWidgetItem(book.title)
         item.setData(Qt.UserRole, book)
-        self.recent_list.addItem(item)
+        self.recent_list.insertItem(0, item)
+        if limit is not None:
+            while self.recent_list.count() > limit:
+                self.recent_list.takeItem(self.recent_list.count() - 1)
+
+    def remove_recent(self, book):
+        for i in reversed(range(self.recent_list.count())):
+            if self.recent_list.item(i).data(Qt.UserRole).path == book.path:
+                self.recent_list.takeItem(i)
 
     def remove_book(self, item):
         row = self.book_list.row(item)
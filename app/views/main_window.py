@@ -1,5 +1,4 @@
 import sys
-import os
 from pathlib import Path
 from PySide6.QtGui import QPalette, QColor, QAction, QPixmap
 from PySide6.QtWidgets import (
@@ -19,13 +18,32 @@ from PySide6.QtWidgets import (
     QWidgetAction,
     QMenu,
 )
-from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QEvent
+from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QEvent, QTimer
 from .toggle_switch import ToggleSwitch
-from ..services.cover_service import get_cover
+from .. import formats
 from ..services.goal_service import goal_service
+from ..services.catalog_service import catalog_service
+from ..services.recent_service import MAX_RECENT, recent_service
 from ..models.book import Book
 from .left_sidebar import LeftSidebar
-from ..services.metadata_service import get_book_metadata
+from ..services.job_scheduler import CancelToken, PRIORITY_BACKGROUND, PRIORITY_OPEN, job_scheduler
+from ..services.metadata_service import read_book_info
+from ..services.render_cache import PageRenderCache
+from ..services.thumbnail_service import load_cover_image
+from ..utils import startup_profile
+from ..utils.tracing import logger
+
+# Số sách đưa lên giao diện mỗi lượt event loop khi nạp thư viện lúc khởi động
+CATALOG_CHUNK = 40
+# Khung ảnh bìa trên thẻ sách và ngân sách cache ảnh bìa đã thu nhỏ
+COVER_SIZE = QSize(150, 210)
+COVER_CACHE_BYTES = 64 * 1024 * 1024
+# Thư viện lên xong bao lâu (ms) thì bắt đầu mở sẵn các sách đọc gần đây
+PREWARM_DELAY_MS = 1500
+# Tìm trong nội dung sách (chỉ mục FTS của `python -m app.cli index`) khi ngừng gõ
+# chừng này ms, với từ khóa từ FULLTEXT_MIN_CHARS ký tự trở lên
+FULLTEXT_DELAY_MS = 300
+FULLTEXT_MIN_CHARS = 3
 
 
 # ======================
@@ -131,7 +149,7 @@ class BookCard(QWidget):
 
         # Ảnh bìa
         self.lbl_thumb = QLabel()
-        self.lbl_thumb.setFixedSize(150, 210)
+        self.lbl_thumb.setFixedSize(COVER_SIZE)
         self.lbl_thumb.setStyleSheet("border-radius: 6px; background: #e5e7eb;")
         self.lbl_thumb.setAlignment(Qt.AlignCenter)
         self.lbl_thumb.setScaledContents(True)
@@ -150,9 +168,14 @@ class BookCard(QWidget):
         self.load_image()
 
     def load_image(self):
-        pix = self.main_window.get_book_pixmap(self.book)
+        pix = self.main_window.get_book_pixmap(self.book, self)
         self.lbl_thumb.setPixmap(pix)
 
+    def on_cover_loaded(self, image):
+        # Không có ảnh bìa thì giữ icon mặc định
+        if image is not None:
+            self.load_image()
+
     def enterEvent(self, event):
         self.setStyleSheet("background-color: #e2e8f0; border-radius: 8px;")
         super().enterEvent(event)
@@ -188,6 +211,19 @@ class MainWindow(QMainWindow):
 
         self.books: list[Book] = []
         self._current_anim = None
+        self._started = False
+        self._pending_books = []
+        self.perf_overlay = None
+        self.cover_cache = PageRenderCache(COVER_CACHE_BYTES, name="ảnh bìa")
+        self._cover_jobs = {}  # key ảnh bìa -> Job đang đọc ảnh
+        self._no_cover = set()  # key đã đọc mà không có ảnh: dùng icon mặc định luôn
+        self._search_text = ""
+        self._fulltext_hits = {}  # path -> đoạn trích của sách khớp nội dung
+        self._fulltext_token = CancelToken()
+        self._fulltext_timer = QTimer(self)
+        self._fulltext_timer.setSingleShot(True)
+        self._fulltext_timer.setInterval(FULLTEXT_DELAY_MS)
+        self._fulltext_timer.timeout.connect(self._search_fulltext)
 
         self._setup_ui()
         self._setup_toolbar()
@@ -272,8 +308,14 @@ class MainWindow(QMainWindow):
         )
         toolbar.addWidget(self.lbl_user_stats)
 
-        # Gọi cập nhật lần đầu
-        self.update_user_stats()
+        stats_action = QAction("📊 Thống kê", self)
+        stats_action.triggered.connect(self.show_stats)
+        toolbar.addAction(stats_action)
+
+        perf_action = QAction("⏱ Hiệu năng", self)
+        perf_action.setShortcut("Ctrl+Shift+P")
+        perf_action.triggered.connect(self.toggle_perf_overlay)
+        toolbar.addAction(perf_action)
 
     def update_user_stats(self):
         # HIỂN THỊ MỤC TIÊU
@@ -286,27 +328,76 @@ class MainWindow(QMainWindow):
             f"font-weight: bold; color: {color}; padding-left: 10px;"
         )
 
+    def show_stats(self):
+        from .stats_view import StatsDialog
+
+        StatsDialog(self).exec()
+
+    def toggle_perf_overlay(self):
+        if self.perf_overlay is None:
+            from .perf_overlay import PerfOverlay
+
+            self.perf_overlay = PerfOverlay(self)
+        self.perf_overlay.toggle()
+
     # --- TÍNH NĂNG SEARCH ---
     def filter_books(self, text):
         text = text.lower().strip()
+        self._search_text = text
+        if self._fulltext_hits:
+            # Bỏ thông báo kết quả tìm trong nội dung của từ khóa cũ
+            self._fulltext_hits = {}
+            self.statusBar().clearMessage()
+        self._fulltext_token.cancel()
+        self._apply_filter()
+        # Tìm theo tên/tác giả thì lọc ngay; tìm trong nội dung thì đợi ngừng gõ
+        if len(text) >= FULLTEXT_MIN_CHARS:
+            self._fulltext_timer.start()
+        else:
+            self._fulltext_timer.stop()
+
+    def _matches(self, book):
+        # Tìm theo tên HOẶC tác giả, hoặc nội dung sách (khi chỉ mục đã có kết quả)
+        text = self._search_text
+        return (
+            text in book.title.lower()
+            or text in book.author.lower()
+            or book.path in self._fulltext_hits
+        )
 
+    def _apply_filter(self):
         # 1. Lọc trong Sidebar
         for i in range(self.sidebar.book_list.count()):
             item = self.sidebar.book_list.item(i)
             book = item.data(Qt.UserRole)
-            # Tìm theo tên HOẶC tác giả
-            is_match = text in book.title.lower() or text in book.author.lower()
-            self.sidebar.book_list.setRowHidden(i, not is_match)
+            self.sidebar.book_list.setRowHidden(i, not self._matches(book))
 
         # 2. Lọc trong Gallery (Cải tiến)
         for i in range(self.grid.count()):
             widget = self.grid.itemAt(i).widget()
             # Kiểm tra xem widget có phải là BookCard và có thuộc tính book không
             if widget and hasattr(widget, "book"):
-                book = widget.book
-                # Logic tìm kiếm giống hệt Sidebar
-                is_match = text in book.title.lower() or text in book.author.lower()
-                widget.setVisible(is_match)
+                widget.setVisible(self._matches(widget.book))
+
+    def _search_fulltext(self):
+        from ..services.search_index import search_books
+
+        self._fulltext_token = CancelToken()
+        job = job_scheduler.submit(
+            search_books, self._search_text, list(self.books),
+            priority=PRIORITY_OPEN, token=self._fulltext_token, name="fulltext_search",
+        )
+        job.finished.connect(lambda hits, q=self._search_text: self._on_fulltext(q, hits))
+
+    def _on_fulltext(self, query, hits):
+        if query != self._search_text or not hits:
+            return
+        self._fulltext_hits = hits
+        self._apply_filter()
+        snippet = " ".join(next(iter(hits.values())).split())
+        self.statusBar().showMessage(
+            f"Có “{query}” trong nội dung {len(hits)} sách: {snippet}"
+        )
 
     def delete_book_direct(self, book):
         """Xóa sách khi nhận được yêu cầu từ BookCard (Gallery)"""
@@ -324,6 +415,9 @@ class MainWindow(QMainWindow):
         # 1. Xóa khỏi danh sách dữ liệu
         if book in self.books:
             self.books.remove(book)
+        catalog_service.remove_book(book)
+        recent_service.remove(book)
+        self.sidebar.remove_recent(book)
 
         # 2. Xóa khỏi Sidebar (Phải tìm item tương ứng)
         # Duyệt qua các dòng trong sidebar để tìm sách cần xóa
@@ -378,9 +472,8 @@ class MainWindow(QMainWindow):
     # Add Book
     # ------------------------------
     def add_book(self):
-        file, _ = QFileDialog.getOpenFileName(
-            self, "Chọn file ebook", "", "Ebook (*.pdf *.txt *.epub *.mobi *.azw3)"
-        )
+        patterns = " ".join(f"*{ext}" for ext in formats.supported_exts())
+        file, _ = QFileDialog.getOpenFileName(self, "Chọn file ebook", "", f"Ebook ({patterns})")
         if not file:
             return
 
@@ -392,24 +485,28 @@ class MainWindow(QMainWindow):
                 )
                 return
 
-        title = Path(file).stem
-        book = Book(title=title, path=file)
+        if formats.backend_for(Path(file).suffix) is None:
+            QMessageBox.warning(self, "Không hỗ trợ", f"Chưa đọc được định dạng {Path(file).suffix}")
+            return
 
-        # 1. Lấy Metadata (Author/Title chuẩn)
-        meta = get_book_metadata(file, book.ext)
-        book.author = meta["author"]
-        if meta[
-            "title"
-        ]:  # Nếu trong file có title chuẩn thì dùng, ko thì dùng tên file
-            book.title = meta["title"]
+        # Metadata và ảnh bìa đọc ở luồng nền, giao diện không bị đứng khi file lớn
+        self.statusBar().showMessage(f"Đang đọc thông tin sách: {Path(file).name}…")
+        job = job_scheduler.submit(read_book_info, file, priority=PRIORITY_OPEN, name="add_book")
+        job.finished.connect(lambda info: self.finish_add_book(file, info))
+        job.failed.connect(
+            lambda error: self.statusBar().showMessage(f"Không đọc được sách: {error}")
+        )
 
-        # --- MỚI: Trích xuất cover ngay khi thêm sách ---
-        # Nếu là PDF thì render sau, nếu là epub thì extract file ảnh
-        extracted_cover = get_cover(book.path, book.ext)
-        if extracted_cover:
-            book.cover = extracted_cover
+    def finish_add_book(self, file, info):
+        title, author, cover = info
+        if any(b.path == file for b in self.books):
+            return
+        book = Book(title=title, path=file)
+        book.author = author
+        book.cover = cover
 
         self.books.append(book)
+        catalog_service.add_book(book)
         self.sidebar.add_book(book)
 
         # Hiển thị Gallery nếu đang ẩn
@@ -434,26 +531,57 @@ class MainWindow(QMainWindow):
 
         self.grid.setColumnStretch(5, 1)
 
-    def get_book_pixmap(self, book):
-        """Ưu tiên: Ảnh cover extract -> Render PDF -> Icon mặc định"""
-
-        # 1. Nếu đã có cover path (từ EPUB/Mobi)
-        if book.cover and os.path.exists(book.cover):
-            return QPixmap(book.cover)
-
-        # 2. Nếu là PDF (Render trang đầu)
-        if book.ext == ".pdf":
-            from PySide6.QtPdf import QPdfDocument
+    def update_book_cover(self, book):
+        """Vẽ lại thẻ sách khi ảnh bìa vừa được trích (lúc mở sách đọc)"""
+        for i in range(self.grid.count()):
+            widget = self.grid.itemAt(i).widget()
+            if isinstance(widget, BookCard) and widget.book.path == book.path:
+                widget.book.cover = book.cover
+                widget.load_image()
 
-            try:
-                doc = QPdfDocument(self)
-                doc.load(book.path)
-                if doc.status() == QPdfDocument.Status.Ready:
-                    img = doc.render(0, QSize(300, 400))  # Render chất lượng tốt chút
-                    return QPixmap.fromImage(img)
-            except:
-                pass
+    def get_book_pixmap(self, book, card=None):
+        """
+        Ưu tiên: Ảnh cover extract -> Render PDF -> Icon mặc định.
+        Chưa có trong cache thì trả icon mặc định và đọc ảnh ở luồng nền (việc nền của
+        job_scheduler), đọc xong thì card.on_cover_loaded được gọi để lấy lại từ cache.
+        """
+        # Ảnh đã thu về cỡ thẻ, dùng chung giữa các lần dựng lại gallery
+        key = book.cover or book.path
+        pix = self.cover_cache.get(key)
+        if pix is not None:
+            return pix
+        if key in self._no_cover:
+            return self._placeholder(book.ext)
+        job = self._cover_jobs.get(key)
+        if job is None:
+            job = job_scheduler.submit(
+                load_cover_image, book.cover, book.path,
+                COVER_SIZE.width(), COVER_SIZE.height(), self.devicePixelRatioF(),
+                priority=PRIORITY_BACKGROUND, name="cover_image",
+            )
+            job.finished.connect(lambda image, k=key: self._on_cover_loaded(k, image))
+            self._cover_jobs[key] = job
+        if card is not None:
+            job.finished.connect(card.on_cover_loaded)
+        return self._placeholder(book.ext)
+
+    def _on_cover_loaded(self, key, image):
+        self._cover_jobs.pop(key, None)
+        if image is not None:
+            self.cover_cache.put(key, QPixmap.fromImage(image))
+        else:
+            self._no_cover.add(key)
+
+    def _placeholder(self, ext):
+        # Ảnh mặc định giống nhau cho mọi sách cùng đuôi: chỉ vẽ một lần
+        key = ("placeholder", ext)
+        pix = self.cover_cache.get(key)
+        if pix is None:
+            pix = self._placeholder_pixmap(ext)
+            self.cover_cache.put(key, pix)
+        return pix
 
+    def _placeholder_pixmap(self, ext):
         # 3. Fallback: Icon mặc định theo đuôi file (Bạn có thể thêm icon txt.png, epub.png vào assets)
         # Ở đây mình tạo Pixmap màu chứa tên đuôi file
         pix = QPixmap(160, 220)
@@ -466,7 +594,7 @@ class MainWindow(QMainWindow):
         p.setPen(QColor("#475569"))
         font = QFont("Arial", 20, QFont.Bold)
         p.setFont(font)
-        p.drawText(pix.rect(), Qt.AlignCenter, book.ext.upper())
+        p.drawText(pix.rect(), Qt.AlignCenter, ext.upper())
         p.end()
 
         return pix
@@ -527,6 +655,9 @@ class MainWindow(QMainWindow):
         # 2. Xóa khỏi danh sách dữ liệu thực (self.books)
         if book_to_delete in self.books:
             self.books.remove(book_to_delete)
+        catalog_service.remove_book(book_to_delete)
+        recent_service.remove(book_to_delete)
+        self.sidebar.remove_recent(book_to_delete)
 
         # 3. Xóa khỏi giao diện Sidebar
         self.sidebar.remove_book(item)
@@ -538,32 +669,105 @@ class MainWindow(QMainWindow):
 
     def refresh_gallery(self):
         # Xóa toàn bộ card cũ
-        for i in reversed(range(self.grid.count())):
-            widget = self.grid.itemAt(i).widget()
+        # deleteLater thay vì setParent(None): card có thể đang nhận sự kiện (hover) hoặc
+        # signal của job ảnh bìa, hủy ngay giữa chừng làm Qt crash
+        while self.grid.count():
+            widget = self.grid.takeAt(0).widget()
             if widget:
-                widget.setParent(None)
+                widget.hide()
+                widget.deleteLater()
 
         # Vẽ lại từ danh sách self.books mới
         for book in self.books:
             self.add_book_to_gallery(book)
 
+    # ------------------------------
+    # KHỞI ĐỘNG (SAU KHI CỬA SỔ ĐÃ HIỆN)
+    # ------------------------------
+    def finish_startup(self):
+        """Phần việc không cần cho khung hình đầu tiên: số liệu, thư viện, nạp trước thư viện đọc sách"""
+        self.update_user_stats()
+        job_scheduler.submit(warm_up_imports, priority=PRIORITY_BACKGROUND, name="warm-up")
+        self._pending_books = catalog_service.load_books()
+        self._load_catalog_chunk()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Khung hình đầu tiên đã vẽ xong thì mới làm phần việc còn lại
+        if not self._started:
+            self._started = True
+            QTimer.singleShot(0, self.finish_startup)
+
+    def _load_catalog_chunk(self):
+        chunk = self._pending_books[:CATALOG_CHUNK]
+        self._pending_books = self._pending_books[CATALOG_CHUNK:]
+        for book in chunk:
+            self.books.append(book)
+            self.sidebar.add_book(book)
+            self.add_book_to_gallery(book)
+        if chunk and self.grid_container.isHidden():
+            self.placeholder.hide()
+            self.grid_container.show()
+
+        if self._pending_books:
+            # Trả quyền cho event loop giữa các lượt để cửa sổ vẫn phản hồi
+            QTimer.singleShot(0, self._load_catalog_chunk)
+        else:
+            startup_profile.mark("catalog load")
+            if self.books:
+                self.statusBar().showMessage(f"Thư viện: {len(self.books)} sách")
+            self.load_recent()
+
+    def load_recent(self):
+        """Danh sách "Gần đây" từ lần chạy trước, rồi mở sẵn các sách đó khi app rảnh"""
+        by_path = {book.path: book for book in self.books}
+        recent = [by_path[path] for path in recent_service.recent_paths() if path in by_path]
+        for book in reversed(recent):
+            self.sidebar.add_recent(book)
+        if recent:
+            QTimer.singleShot(PREWARM_DELAY_MS, lambda: self.prewarm_recent(recent))
+
+    def prewarm_recent(self, books):
+        from ..services.prewarm_service import prewarm_service
+
+        prewarm_service.start(books, self.devicePixelRatioF())
+
     def open_book_reader(self, book: Book):
         from .reader_view import ReaderPage
 
+        recent_service.touch(book)
+        self.sidebar.add_recent(book, MAX_RECENT)
         reader = ReaderPage(self, book)
         reader.show()
 
 
+def warm_up_imports():
+    """Nạp sẵn các thư viện đọc sách nặng ở luồng nền để lần mở sách đầu tiên không phải chờ"""
+    try:
+        import fitz  # noqa: F401
+        from ebooklib import epub  # noqa: F401
+        from bs4 import BeautifulSoup  # noqa: F401
+        from . import reader_view  # noqa: F401
+        import loguru  # noqa: F401
+    except Exception as e:
+        logger.warning("Lỗi nạp trước thư viện: {}", e)
+
+
 # ======================
 # RUN APP (IMPORTANT ORDER)
 # ======================
 def run_app():
+    startup_profile.mark("imports")
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication")
 
     # set initial theme FIRST
     app.setStyleSheet(LIGHT_CSS)
 
     win = MainWindow()
     win.setWindowOpacity(0.98)
+    startup_profile.mark("main window")
+    if startup_profile.enabled():
+        startup_profile.watch_first_paint(win)
     win.show()
     sys.exit(app.exec())
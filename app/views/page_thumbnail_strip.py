@@ -0,0 +1,157 @@
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QListView
+from PySide6.QtGui import QPixmap, QIcon, QColor
+from PySide6.QtCore import Qt, QSize, QTimer, Signal
+
+from ..services.job_scheduler import PRIORITY_BACKGROUND, job_scheduler
+from ..services.pdf_render_service import PdfRenderService, PRIORITY_VISIBLE
+from ..services.render_cache import PageRenderCache
+from ..services.thumbnail_service import (
+    PAGE_THUMB_WIDTH as THUMB_WIDTH,
+    page_thumb_zoom,
+    load_page_thumbnail,
+    save_page_thumbnail,
+)
+
+# Chờ thanh cuộn đứng yên (ms) rồi mới xin render các trang đang thấy
+SCROLL_SETTLE_MS = 60
+# Ảnh thu nhỏ giữ trong bộ nhớ (~50 KB/trang); trang bị bỏ thì đọc lại từ đĩa khi cuộn tới
+THUMB_CACHE_BYTES = 16 * 1024 * 1024
+
+
+class PageThumbnailStrip(QListWidget):
+    """
+    Dải ảnh thu nhỏ các trang PDF để lướt nhanh.
+    Ảnh chỉ được xin cho các trang đang thấy trong danh sách, render ở độ
+    phân giải rất thấp bằng một worker riêng và lưu vào cache trên đĩa
+    theo fingerprint của sách, nên mở lại sách là hiện ngay. Ảnh đang gắn vào
+    danh sách nằm trong cache có ngân sách, bị bỏ thì trang về lại icon trắng.
+    """
+
+    pageSelected = Signal(int)
+
+    def __init__(self, path, fingerprint, page_count, page_width, page_height, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.fingerprint = fingerprint
+        self.page_count = page_count
+        self.thumb_zoom = page_thumb_zoom(page_width)
+        self.thumb_size = QSize(THUMB_WIDTH, int(page_height * self.thumb_zoom))
+
+        self.render_service = None
+        # Các trang đã có ảnh: key = số trang
+        self.thumbs = PageRenderCache(THUMB_CACHE_BYTES, name="ảnh trang nhỏ",
+                                      on_evict=self._on_thumb_evicted)
+
+        self.setFixedWidth(THUMB_WIDTH + 48)
+        self.setViewMode(QListView.ListMode)
+        self.setFlow(QListView.TopToBottom)
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setIconSize(self.thumb_size)
+        self.setSpacing(4)
+        self.setStyleSheet("QListWidget { background: #3f3f46; color: #e4e4e7; }")
+
+        # Một icon trắng dùng chung cho mọi trang chưa có ảnh
+        blank = QPixmap(self.thumb_size)
+        blank.fill(QColor("#ffffff"))
+        self.blank_icon = QIcon(blank)
+        for i in range(page_count):
+            item = QListWidgetItem(self.blank_icon, str(i + 1))
+            item.setTextAlignment(Qt.AlignHCenter | Qt.AlignBottom)
+            self.addItem(item)
+
+        self.itemClicked.connect(lambda item: self.pageSelected.emit(self.row(item)))
+
+        self.scroll_timer = QTimer(self)
+        self.scroll_timer.setSingleShot(True)
+        self.scroll_timer.timeout.connect(self.load_visible)
+        self.verticalScrollBar().valueChanged.connect(
+            lambda _: self.scroll_timer.start(SCROLL_SETTLE_MS)
+        )
+
+    # ------------------------------
+    def visible_rows(self):
+        if self.count() == 0:
+            return range(0)
+        # Mọi dòng cao bằng nhau nên tính thẳng từ vị trí thanh cuộn
+        first_rect = self.visualItemRect(self.item(0))
+        if self.count() > 1:
+            row_h = self.visualItemRect(self.item(1)).top() - first_rect.top()
+        else:
+            row_h = first_rect.height()
+        row_h = max(1, row_h)
+        first = self.verticalScrollBar().value() // row_h
+        last = first + self.viewport().height() // row_h + 1
+        return range(max(0, first), min(self.count(), last + 1))
+
+    def load_visible(self):
+        """Gắn ảnh cho các trang đang thấy: từ cache đĩa, chưa có thì xin worker render"""
+        if not self.isVisible():
+            return
+        missing = []
+        for row in self.visible_rows():
+            if row in self.thumbs:
+                self.thumbs.get(row)  # đánh dấu vừa dùng
+                continue
+            pix = load_page_thumbnail(self.fingerprint, row)
+            if pix is not None:
+                self._set_thumb(row, pix)
+            else:
+                missing.append(row)
+
+        if not missing:
+            return
+        service = self._service()
+        keys = [
+            service.request(row, self.thumb_zoom, 1.0, PRIORITY_VISIBLE + i)
+            for i, row in enumerate(missing)
+        ]
+        # Trang đã cuộn qua thì không render nữa
+        service.retain(keys)
+
+    def set_current_page(self, page_index):
+        self.blockSignals(True)
+        self.setCurrentRow(page_index)
+        self.blockSignals(False)
+        self.scrollToItem(self.item(page_index), QListWidget.EnsureVisible)
+
+    def shutdown(self):
+        self.thumbs.clear()
+        if self.render_service:
+            self.render_service.shutdown()
+            self.render_service = None
+
+    # ------------------------------
+    def _service(self):
+        # Chỉ khởi động worker khi thật sự có trang chưa có trong cache
+        if self.render_service is None:
+            self.render_service = PdfRenderService(self.path, max_workers=1, parent=self)
+            self.render_service.pageRendered.connect(self._on_rendered)
+        return self.render_service
+
+    def _on_rendered(self, key, image):
+        row = key[0]
+        # Ghi JPEG xuống đĩa là việc nền, không làm trên luồng giao diện
+        job_scheduler.submit(
+            save_page_thumbnail, self.fingerprint, row, image,
+            priority=PRIORITY_BACKGROUND, name="save_thumb",
+        )
+        self._set_thumb(row, QPixmap.fromImage(image))
+
+    def _set_thumb(self, row, pixmap):
+        self.thumbs.put(row, pixmap)
+        if row in self.thumbs:
+            self.item(row).setIcon(QIcon(pixmap))
+
+    def _on_thumb_evicted(self, row):
+        item = self.item(row)
+        if item is not None:
+            item.setIcon(self.blank_icon)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self.load_visible)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scroll_timer.start(SCROLL_SETTLE_MS)
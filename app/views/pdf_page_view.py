@@ -0,0 +1,133 @@
+from PySide6.QtWidgets import QScrollArea, QWidget, QFrame
+from PySide6.QtGui import QPainter, QColor
+from PySide6.QtCore import Qt, QRect, QRectF, QSize, QPoint, Signal
+
+PAGE_BG = QColor("#525252")
+
+
+class _PageCanvas(QWidget):
+    """Vẽ trang: ảnh nền (cả trang hoặc bản xem trước) rồi tới các ô nét"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMouseTracking(True)
+        self.page_size = QSize()
+        self.base_pixmap = None
+        self.tiles = {}  # (tx, ty) -> (QRectF logic, QPixmap)
+
+    def page_rect(self):
+        # Trang luôn được canh giữa khi nhỏ hơn khung nhìn
+        x = max(0, (self.width() - self.page_size.width()) // 2)
+        y = max(0, (self.height() - self.page_size.height()) // 2)
+        return QRect(QPoint(x, y), self.page_size)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), PAGE_BG)
+        if self.page_size.isEmpty():
+            return
+
+        rect = self.page_rect()
+        if self.base_pixmap is not None and not self.base_pixmap.isNull():
+            painter.setRenderHint(QPainter.SmoothPixmapTransform)
+            painter.drawPixmap(QRectF(rect), self.base_pixmap, QRectF(self.base_pixmap.rect()))
+        else:
+            painter.fillRect(rect, Qt.white)
+
+        # Chỉ vẽ các ô nằm trong vùng cần vẽ lại
+        exposed = QRectF(event.rect()).translated(-rect.x(), -rect.y())
+        painter.translate(rect.topLeft())
+        for tile_rect, pix in self.tiles.values():
+            if tile_rect.intersects(exposed):
+                painter.drawPixmap(tile_rect.topLeft(), pix)
+
+
+class PdfPageView(QScrollArea):
+    """
+    Khung hiển thị một trang PDF.
+    Ở zoom thấp: một ảnh cả trang. Ở zoom cao: ảnh xem trước độ phân giải thấp
+    phóng to, phủ lên bằng các ô nét chỉ cho vùng đang nhìn thấy.
+    """
+
+    visibleRegionChanged = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWidgetResizable(True)
+        self.setFrameShape(QFrame.NoFrame)
+        self.setStyleSheet("background: #525252;")
+        self.setMouseTracking(True)
+
+        self.canvas = _PageCanvas()
+        self.setWidget(self.canvas)
+
+        self.horizontalScrollBar().valueChanged.connect(self.visibleRegionChanged)
+        self.verticalScrollBar().valueChanged.connect(self.visibleRegionChanged)
+
+    # ------------------------------
+    def set_page(self, page_size, pixmap):
+        """Đổi sang trang mới: kích thước logic + ảnh nền, xóa các ô cũ"""
+        self.canvas.page_size = QSize(page_size)
+        self.canvas.base_pixmap = pixmap
+        self.canvas.tiles = {}
+        self.canvas.setMinimumSize(page_size)
+        self.canvas.update()
+
+    def zoom_page(self, page_size, pixmap):
+        """
+        Đổi kích thước trang ngay (ảnh cũ được phóng/thu tạm) và giữ nguyên
+        điểm đang nhìn ở giữa khung, trong lúc chờ bản render nét.
+        """
+        h_bar, v_bar = self.horizontalScrollBar(), self.verticalScrollBar()
+        view = self.viewport().size()
+        old = self.canvas.size()
+        cx = (h_bar.value() + view.width() / 2) / max(1, old.width())
+        cy = (v_bar.value() + view.height() / 2) / max(1, old.height())
+
+        self.set_page(page_size, pixmap)
+        # Cập nhật kích thước canvas ngay để thanh cuộn có phạm vi mới
+        self.canvas.resize(view.expandedTo(page_size))
+
+        h_bar.setValue(int(cx * self.canvas.width() - view.width() / 2))
+        v_bar.setValue(int(cy * self.canvas.height() - view.height() / 2))
+
+    def set_pixmap(self, pixmap):
+        self.canvas.base_pixmap = pixmap
+        self.canvas.update()
+
+    def pixmap(self):
+        return self.canvas.base_pixmap
+
+    def set_tile(self, tile, tile_rect, pixmap):
+        self.canvas.tiles[tile] = (QRectF(tile_rect), pixmap)
+        page_rect = self.canvas.page_rect()
+        self.canvas.update(tile_rect.translated(page_rect.topLeft()).toAlignedRect())
+
+    def retain_tiles(self, tiles):
+        """Bỏ các ô đã ra khỏi khung nhìn (vẫn còn trong tile cache để dùng lại)"""
+        tiles = set(tiles)
+        for tile in list(self.canvas.tiles):
+            if tile not in tiles:
+                del self.canvas.tiles[tile]
+
+    def has_tile(self, tile):
+        return tile in self.canvas.tiles
+
+    def scroll_to_top(self):
+        self.verticalScrollBar().setValue(0)
+
+    # ------------------------------
+    def page_rect_in(self, widget):
+        """Vị trí phần trang đang thấy, theo tọa độ của widget"""
+        page = self.canvas.page_rect()
+        visible = QRect(
+            self.canvas.mapTo(self.viewport(), page.topLeft()), page.size()
+        ).intersected(self.viewport().rect())
+        return QRect(self.viewport().mapTo(widget, visible.topLeft()), visible.size())
+
+    def visible_page_rect(self):
+        """Vùng trang đang thấy, tọa độ logic tính từ góc trên trái của trang"""
+        page = self.canvas.page_rect()
+        top_left = self.canvas.mapFrom(self.viewport(), QPoint(0, 0))
+        view = QRect(top_left, self.viewport().size()).intersected(page)
+        return view.translated(-page.x(), -page.y())
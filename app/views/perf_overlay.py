@@ -0,0 +1,103 @@
+from collections import defaultdict
+
+from PySide6.QtWidgets import QFrame, QLabel, QVBoxLayout
+from PySide6.QtCore import Qt, QTimer, QEvent
+
+from ..services.document_pool import document_pool
+from ..services.memory_governor import memory_governor
+from ..utils import tracing
+
+# Cập nhật bảng mỗi khoảng này (ms) khi đang hiện
+REFRESH_MS = 500
+TOP_SPANS = 10
+LATEST_SPANS = 6
+
+
+def summarize_spans(spans):
+    """[(tên, số lần, tổng ms, max ms)] xếp theo tổng thời gian giảm dần"""
+    totals = defaultdict(lambda: [0, 0.0, 0.0])
+    for name, ms, _ in spans:
+        entry = totals[name]
+        entry[0] += 1
+        entry[1] += ms
+        entry[2] = max(entry[2], ms)
+    rows = [(name, n, total, peak) for name, (n, total, peak) in totals.items()]
+    return sorted(rows, key=lambda r: r[2], reverse=True)
+
+
+class PerfOverlay(QFrame):
+    """Bảng nổi góc trên bên phải cửa sổ chính: thời gian các span gần nhất và tỉ lệ trúng cache"""
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setStyleSheet(
+            "QFrame { background: rgba(15, 23, 42, 215); border-radius: 8px; }"
+            "QLabel { color: #e2e8f0; background: transparent;"
+            " font-family: monospace; font-size: 11px; }"
+        )
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(10, 8, 10, 8)
+        self.label = QLabel()
+        self.label.setTextFormat(Qt.PlainText)
+        layout.addWidget(self.label)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def toggle(self):
+        if self.isVisible():
+            self.timer.stop()
+            self.hide()
+        else:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self.timer.start()
+
+    def refresh(self):
+        spans = tracing.recent_spans()
+        lines = [f"⏱ {len(spans)} span gần nhất", f"{'span':26}{'lần':>5}{'TB ms':>9}{'max ms':>9}"]
+        for name, n, total, peak in summarize_spans(spans)[:TOP_SPANS]:
+            lines.append(f"{name[:26]:26}{n:5d}{total / n:9.1f}{peak:9.1f}")
+
+        lines += ["", "Mới nhất:"]
+        for name, ms, _ in spans[:LATEST_SPANS]:
+            lines.append(f"{ms:9.1f} ms  {name}")
+
+        lines += ["", (f"Cache: {memory_governor.used_bytes() / 1e6:.1f}"
+                       f"/{memory_governor.budget_bytes / 1e6:.0f} MB,"
+                       f" đã bỏ {memory_governor.evictions} mục")]
+        for name, stats in memory_governor.report().items():
+            hits, total = stats["hits"], stats["hits"] + stats["misses"]
+            rate = f"{hits * 100 / total:3.0f}%" if total else "  - "
+            lines.append(
+                f"{name[:14]:14} trúng {rate} ({hits}/{total})"
+                f"  {stats['entries']:4d} mục {stats['bytes'] / 1e6:5.1f} MB"
+            )
+        opened, in_use = document_pool.stats()
+        lines.append(f"Tài liệu đang mở: {opened} ({in_use} đang đọc)")
+        if memory_governor.debug_enabled():
+            import tracemalloc
+
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"tracemalloc: {current / 1e6:.1f} MB (đỉnh {peak / 1e6:.1f} MB)")
+        for name, value in sorted(tracing.counters().items()):
+            lines.append(f"{name}: {value}")
+
+        self.label.setText("\n".join(lines))
+        self.adjustSize()
+        self.reposition()
+
+    def reposition(self):
+        parent = self.parentWidget()
+        # Chừa chỗ cho thanh công cụ phía trên
+        self.move(parent.width() - self.width() - 12, 56)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize and self.isVisible():
+            self.reposition()
+        return False
@@ -1,3 +1,6 @@
+import bisect
+import time
+
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
@@ -10,7 +13,8 @@ from PySide6.QtWidgets import (
     QTreeWidget,
     QTreeWidgetItem,
     QFrame,
-    QApplication,
+    QMenu,
+    QInputDialog,
 )
 from PySide6.QtGui import (
     QAction,
@@ -24,6 +28,7 @@ from PySide6.QtGui import (
     QBrush,
     QLinearGradient,
     QPolygonF,
+    QAbstractTextDocumentLayout,
 )
 from PySide6.QtCore import (
     Qt,
@@ -36,17 +41,79 @@ from PySide6.QtCore import (
     Property,
     QEvent,
     QRect,
+    QSize,
 )
-from ebooklib import epub
-
+from .. import formats
 from ..controllers.book_controller import load_book
 from ..services.goal_service import goal_service
-import fitz  # PyMuPDF
+from ..services.reading_stats_service import reading_stats
+from ..services.bookmark_service import bookmark_service
+from ..services.highlight_service import highlight_service
+from ..services.job_scheduler import PRIORITY_OPEN, CancelToken, job_scheduler
+from ..services.document_pool import document_pool
+from ..services.memory_governor import memory_governor
+from ..services.render_cache import PageRenderCache
+from ..services.pdf_reflow import save_reflow_html
+from ..services.prewarm_service import prewarm_service
+from ..services.reflow_service import ReflowService
+from ..services.pdf_render_service import (
+    PdfRenderService,
+    PRIORITY_VISIBLE,
+    PRIORITY_PREFETCH,
+    TILE_SIZE,
+)
+from ..utils import tracing
+from ..utils.tracing import logger
+from .pdf_page_view import PdfPageView
+from .page_thumbnail_strip import PageThumbnailStrip
+
+# Thời gian chờ (ms) sau thao tác cuối trước khi render trước trang kế bên
+PREFETCH_IDLE_MS = 250
+
+# Trên ngưỡng pixel này, trang được render theo ô thay vì cả trang
+TILED_MIN_PIXELS = 4_000_000
+# Zoom của bản xem trước độ phân giải thấp hiển thị trong lúc chờ các ô nét
+PREVIEW_ZOOM = 0.5
+TILE_CACHE_BYTES = 48 * 1024 * 1024
+TEXT_PAGE_CACHE_BYTES = 32 * 1024 * 1024
+# Chờ người dùng ngừng bấm zoom bao lâu (ms) trước khi render lại cho nét
+ZOOM_SETTLE_MS = 180
+# Lưu vị trí đọc tối đa một lần trong khoảng này (ms), dù lật trang liên tục
+AUTOSAVE_MS = 3000
+# Dàn chữ PDF: trích trước chừng này trang phía sau vị trí đọc
+REFLOW_PREFETCH_PAGES = 6
+# Khung dàn chữ giữ tối đa chừng này trang liên tiếp (trang đã đọc qua bị bỏ bớt)
+REFLOW_WINDOW_PAGES = 12
+# Nối thêm trang khi phần chưa đọc trong khung còn ít hơn chừng này màn hình
+REFLOW_AHEAD_SCREENS = 2
 
 
 # ==========================================
 # CLASS HIỆU ỨNG LẬT TRANG 3D (CẢI TIẾN)
 # ==========================================
+# Bề rộng bóng đổ ở mép trang đang lật
+SHADOW_WIDTH = 40
+# Ngân sách một khung hình ở 60 fps; khoảng cách > 1.5 lần coi như rớt khung
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def read_toc(path, fingerprint):
+    """
+    Mục lục của sách (chạy ở luồng của job_scheduler); định dạng không có mục lục
+    trả về rỗng mà không phải phân tích file.
+    """
+    with formats.open_document(path, fingerprint) as document:
+        return document.toc()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
 class PageFlipOverlay(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -63,6 +130,21 @@ class PageFlipOverlay(QWidget):
         self.page_rect = QRect()
         self.bg_color = QColor(0, 0, 0, 0)
 
+        # Ảnh đã scale sẵn đúng kích thước page_rect (scale một lần mỗi lần lật)
+        self._bg_scaled = None
+        self._fg_scaled = None
+
+        # Bóng đổ dựng sẵn một lần, khi vẽ chỉ dịch tới mép trang
+        self._shadow = QLinearGradient(SHADOW_WIDTH, 0, 0, 0)
+        self._shadow.setColorAt(0, QColor(0, 0, 0, 60))
+        self._shadow.setColorAt(1, QColor(0, 0, 0, 0))
+
+        # Số liệu khung hình (debug)
+        self._paint_ms = []
+        self._interval_ms = []
+        self._last_paint_at = None
+        self.total_dropped_frames = 0
+
         self.anim = QPropertyAnimation(self, b"flip_progress", self)
         self.anim.setDuration(400)
         self.anim.setEasingCurve(QEasingCurve.OutQuad)
@@ -76,33 +158,28 @@ class PageFlipOverlay(QWidget):
 
     @flip_progress.setter
     def flip_progress(self, val):
+        old_edge = self._edge_x()
         self._progress = max(0.0, min(1.0, val))
-        self.update()
+        self._update_strip(old_edge, self._edge_x())
 
     def start_flip(self, current_pix, next_pix, direction, rect, bg_color, callback):
-        self.current_pixmap = current_pix
-        self.next_pixmap = next_pix
-        self.direction = direction
-        self.page_rect = rect  # Vùng hiển thị trang sách
-        self.bg_color = bg_color  # Màu nền xung quanh
-        self.callback_finish = callback
-
-        self.resize(self.parent().size())
-        self.show()
-        self.raise_()
-
-        self._progress = 0.0
+        self._begin(current_pix, next_pix, direction, rect, bg_color, callback)
         self.anim.setStartValue(0.0)
         self.anim.setEndValue(1.0)
         self.anim.start()
 
     def start_drag(self, current_pix, next_pix, direction, rect, bg_color, callback):
+        self._begin(current_pix, next_pix, direction, rect, bg_color, callback)
+
+    def _begin(self, current_pix, next_pix, direction, rect, bg_color, callback):
         self.current_pixmap = current_pix
         self.next_pixmap = next_pix
         self.direction = direction
-        self.page_rect = rect
-        self.bg_color = bg_color
+        self.page_rect = rect  # Vùng hiển thị trang sách
+        self.bg_color = bg_color  # Màu nền xung quanh
         self.callback_finish = callback
+        self._prescale()
+        self.reset_frame_stats()
 
         self.resize(self.parent().size())
         self.show()
@@ -113,61 +190,150 @@ class PageFlipOverlay(QWidget):
     def set_progress_manual(self, val):
         self.flip_progress = val
 
+    def replace_pixmap(self, old, new):
+        """Thay ảnh tạm bằng ảnh thật khi worker render xong giữa chừng"""
+        if self.current_pixmap is old:
+            self.current_pixmap = new
+        elif self.next_pixmap is old:
+            self.next_pixmap = new
+        else:
+            return
+        self._prescale()
+        if self.isVisible():
+            self.update()
+
     def on_anim_finished(self):
         self.hide()
         if self.callback_finish:
             self.callback_finish()
 
+    # --- VẼ ---
+    def _scaled(self, pix):
+        if pix is None or pix.isNull():
+            return None
+        dpr = self.devicePixelRatioF()
+        target = self.page_rect.size() * dpr
+        if pix.size() != target:
+            pix = pix.scaled(target, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        pix.setDevicePixelRatio(dpr)
+        return pix
+
+    def _prescale(self):
+        # Trang nằm dưới và trang đang lật, scale sẵn để mỗi khung chỉ còn copy
+        if self.direction == 1:
+            bg, fg = self.next_pixmap, self.current_pixmap
+        else:
+            bg, fg = self.current_pixmap, self.next_pixmap
+        self._bg_scaled = self._scaled(bg)
+        self._fg_scaled = self._scaled(fg)
+
+    def _edge_x(self):
+        w = self.page_rect.width()
+        if self.direction == 1:  # Next (Lật từ phải sang trái)
+            return w * (1.0 - self._progress)
+        return w * self._progress  # Prev (Lật từ trái sang phải)
+
+    def _update_strip(self, old_edge, new_edge):
+        """Chỉ vẽ lại dải giữa mép cũ và mép mới (kèm bóng đổ)"""
+        left = int(min(old_edge, new_edge)) - SHADOW_WIDTH - 1
+        right = int(max(old_edge, new_edge)) + 2
+        strip = QRect(left, 0, right - left, self.page_rect.height())
+        self.update(strip.translated(self.page_rect.topLeft()))
+
+    def _draw_part(self, painter, pix, target):
+        # target theo tọa độ logic trong trang; nguồn theo pixel thiết bị của ảnh
+        dpr = pix.devicePixelRatio()
+        source = QRectF(
+            target.x() * dpr, target.y() * dpr, target.width() * dpr, target.height() * dpr
+        )
+        painter.drawPixmap(QRectF(target), pix, source)
+
     def paintEvent(self, event):
-        if not self.current_pixmap or not self.next_pixmap:
+        if not self._bg_scaled or not self._fg_scaled:
             return
+        started = time.perf_counter()
 
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        dirty = event.rect()
 
-        # 1. Vẽ nền tĩnh (Màu xám/trắng bao quanh)
-        painter.fillRect(self.rect(), self.bg_color)
+        # 1. Vẽ nền tĩnh (Màu xám/trắng bao quanh), chỉ trong vùng cần vẽ lại
+        painter.fillRect(dirty, self.bg_color)
 
         # 2. Dịch chuyển tọa độ vẽ vào vùng page_rect
         # Mọi thao tác lật trang chỉ diễn ra trong vùng này
         painter.translate(self.page_rect.topLeft())
-
         w = self.page_rect.width()
         h = self.page_rect.height()
+        local = dirty.translated(-self.page_rect.topLeft()).intersected(QRect(0, 0, w, h))
 
         # Trang nền (nằm dưới)
-        bg_pix = self.next_pixmap if self.direction == 1 else self.current_pixmap
-        if bg_pix:
-            painter.drawPixmap(0, 0, w, h, bg_pix)
-
-        # Trang động (đang bay)
-        fg_pix = self.current_pixmap if self.direction == 1 else self.next_pixmap
-
-        if fg_pix:
-            if self.direction == 1:  # Next (Lật từ phải sang trái)
-                x_edge = w * (1.0 - self._progress)
-                if x_edge > 1:
-                    target_rect = QRectF(0, 0, x_edge, h)
-                    painter.drawPixmap(target_rect.toRect(), fg_pix)
-
-                    # Bóng đổ ở gáy
-                    grad = QLinearGradient(x_edge, 0, x_edge - 40, 0)
-                    grad.setColorAt(0, QColor(0, 0, 0, 60))
-                    grad.setColorAt(1, QColor(0, 0, 0, 0))
-                    painter.fillRect(QRectF(x_edge - 40, 0, 40, h), grad)
-
-            else:  # Prev (Lật từ trái sang phải)
-                x_edge = w * self._progress
-                if x_edge > 1:
-                    target_rect = QRectF(0, 0, x_edge, h)
-                    painter.drawPixmap(target_rect.toRect(), fg_pix)
-
-                    # Bóng đổ ở gáy
-                    grad = QLinearGradient(x_edge, 0, x_edge - 40, 0)
-                    grad.setColorAt(0, QColor(0, 0, 0, 60))
-                    grad.setColorAt(1, QColor(0, 0, 0, 0))
-                    painter.fillRect(QRectF(x_edge - 40, 0, 40, h), grad)
+        if not local.isEmpty():
+            self._draw_part(painter, self._bg_scaled, local)
+
+        # Trang động: phần còn lại bên trái mép lật, kèm bóng đổ ở mép
+        x_edge = self._edge_x()
+        if x_edge > 1:
+            fg_rect = QRect(0, 0, int(x_edge), h).intersected(local)
+            if not fg_rect.isEmpty():
+                self._draw_part(painter, self._fg_scaled, fg_rect)
+            painter.translate(x_edge - SHADOW_WIDTH, 0)
+            painter.fillRect(QRectF(0, 0, SHADOW_WIDTH, h), self._shadow)
+
+        painter.end()
+        self._record_frame(started)
+
+    # --- SỐ LIỆU KHUNG HÌNH (DEBUG) ---
+    def _record_frame(self, started):
+        now = time.perf_counter()
+        self._paint_ms.append((now - started) * 1000)
+        if self._last_paint_at is not None and self.anim.state() == QPropertyAnimation.Running:
+            interval = (now - self._last_paint_at) * 1000
+            self._interval_ms.append(interval)
+            if interval > FRAME_BUDGET_MS * 1.5:
+                self.total_dropped_frames += 1
+        self._last_paint_at = now
+
+    def reset_frame_stats(self):
+        self._paint_ms = []
+        self._interval_ms = []
+        self._last_paint_at = None
+
+    def frame_stats(self):
+        """Số liệu vẽ của lần lật gần nhất: số khung, p95 thời gian vẽ, số khung rớt"""
+        dropped = sum(1 for i in self._interval_ms if i > FRAME_BUDGET_MS * 1.5)
+        return {
+            "frames": len(self._paint_ms),
+            "p95_paint_ms": round(percentile(self._paint_ms, 95), 2),
+            "max_paint_ms": round(max(self._paint_ms, default=0.0), 2),
+            "p95_frame_interval_ms": round(percentile(self._interval_ms, 95), 2),
+            "dropped_frames": dropped,
+            "total_dropped_frames": self.total_dropped_frames,
+        }
+
+
+# ==========================================
+# KHUNG ĐỌC VĂN BẢN
+# ==========================================
+class BookTextBrowser(QTextBrowser):
+    """
+    QTextBrowser lấy ảnh src="book:<tên>" (ảnh nhúng trong file, vd. <binary> của FB2)
+    từ load_image(tên) -> bytes. QTextDocument chỉ hỏi tới khi dàn trang tới ảnh
+    và tự giữ ảnh đã lấy, nên mỗi ảnh được giải mã một lần.
+    """
+
+    def __init__(self, load_image):
+        super().__init__()
+        self._load_image = load_image
+
+    def loadResource(self, type_, url):
+        if url.scheme() != "book":
+            return super().loadResource(type_, url)
+        try:
+            data = self._load_image(url.path())
+        except Exception as e:
+            logger.warning("Lỗi đọc ảnh {}: {}", url.toString(), e)
+            return None
+        return QImage.fromData(data) if data else None
 
 
 # ==========================================
@@ -175,7 +341,10 @@ class PageFlipOverlay(QWidget):
 # ==========================================
 class ReaderPage(QMdiSubWindow):
     def __init__(self, main_window, book):
+        opened_at = time.perf_counter_ns()
         super().__init__(main_window)
+        # Đóng là hủy hẳn cửa sổ (cùng timer, cache, worker), không chỉ ẩn đi
+        self.setAttribute(Qt.WA_DeleteOnClose)
         self.book = book
         self.main_window = main_window
         self.setWindowTitle(f"{book.title} - {book.author}")
@@ -183,9 +352,56 @@ class ReaderPage(QMdiSubWindow):
 
         self.current_page_index = 0
         self.total_pages = 0
-        self.pdf_doc = None
+        self.paged_doc = None
+        self.text_viewer = None
+        self.doc_handle = None  # lượt mượn Document của sách từ document_pool
+        self.pdf_toc_pages = []  # [(trang bắt đầu, tên chương)] theo thứ tự trang
+        self.chapter_starts = []  # [(vị trí ký tự, tên anchor)] của tài liệu văn bản
+        self.highlights = []  # [(id, start, end)] vị trí tuyệt đối trong tài liệu
+        self.page_strip = None
         self.zoom_level = 1.0
 
+        # Chế độ dàn chữ của PDF: hiện chữ trích từ trang bằng khung đọc văn bản
+        self.reflow = False
+        self.reflow_service = None
+        self.reflow_pages = []  # các trang liên tiếp đang nằm trong khung dàn chữ
+        self.reflow_updating = False
+        self.reflow_timer = QTimer(self)
+        self.reflow_timer.setSingleShot(True)
+        self.reflow_timer.timeout.connect(self.extend_reflow)
+
+        # Cache ảnh trang PDF + render trước trang kế bên khi rảnh
+        self.page_cache = PageRenderCache(name="trang PDF")
+        self.render_service = None
+        self.pending_placeholders = {}  # key -> ảnh tạm đang chờ worker
+        self.flip_waiting = {}  # key -> (trang, ảnh đang dùng trong animation)
+        self.tile_cache = PageRenderCache(max_bytes=TILE_CACHE_BYTES, name="ô PDF")
+        self.text_page_cache = PageRenderCache(
+            max_bytes=TEXT_PAGE_CACHE_BYTES, name="trang văn bản"
+        )
+        self.read_direction = 1
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.timeout.connect(self.prefetch_neighbours)
+
+        self.zoom_timer = QTimer(self)
+        self.zoom_timer.setSingleShot(True)
+        self.zoom_timer.timeout.connect(self.apply_zoom)
+
+        # Việc nền của cửa sổ này, hủy hết khi đóng; việc nền khác bị kìm lại khi đang đọc
+        self.jobs = CancelToken()
+        job_scheduler.reader_opened()
+
+        # Phần đã mở sẵn lúc app rảnh (sách đọc gần đây), None nếu không có
+        self.warm = prewarm_service.take(book.fingerprint)
+
+        # Vị trí đã lưu lần trước, khôi phục trước khi hiện trang đầu tiên
+        self.saved_position = bookmark_service.load_position(self.book.fingerprint)
+        self.position_restored = False
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.timeout.connect(self.save_position)
+
         self.is_dragging = False
         self.drag_start_pos = QPoint()
         self.drag_direction = 0
@@ -208,7 +424,10 @@ class ReaderPage(QMdiSubWindow):
         self.right_layout.setSpacing(0)
         self.splitter.addWidget(right_container)
 
-        self.is_pdf = book.ext == ".pdf"
+        # Sách theo trang (PDF) hiển thị bằng ảnh trang, còn lại bằng HTML
+        backend = formats.backend_for(book.ext)
+        self.is_pdf = backend is not None and backend.paged
+        self.reflowable = self.is_pdf and backend.reflowable
 
         # TOOLBAR
         self._setup_toolbar()
@@ -234,9 +453,14 @@ class ReaderPage(QMdiSubWindow):
         else:
             self.setup_epub_viewer()
 
+        if self.warm is not None:
+            # Khung đọc đã tự mượn tài liệu/HTML từ pool, trả lượt mượn của phần mở sẵn
+            self.warm.release()
+
         self.read_timer = QTimer(self)
         self.read_timer.timeout.connect(self.on_reading_timer)
         self.read_timer.start(60000)
+        tracing.record("reader.open", opened_at, time.perf_counter_ns(), ext=book.ext)
 
     # ... (Giữ nguyên setup_toolbar và setup_footer) ...
     def _setup_toolbar(self):
@@ -250,8 +474,21 @@ class ReaderPage(QMdiSubWindow):
         )
         tb.addWidget(btn_toc)
 
+        if self.is_pdf:
+            btn_thumbs = QPushButton("🖼 Trang")
+            btn_thumbs.clicked.connect(self.toggle_page_strip)
+            tb.addWidget(btn_thumbs)
+
+        if self.reflowable:
+            self.btn_reflow = QPushButton("📝 Dàn chữ")
+            self.btn_reflow.setCheckable(True)
+            self.btn_reflow.toggled.connect(self.set_reflow)
+            tb.addWidget(self.btn_reflow)
+
         btn_mark = QPushButton("🔖 Bookmark")
-        btn_mark.clicked.connect(self.save_bookmark)
+        self.bookmark_menu = QMenu(btn_mark)
+        self.bookmark_menu.aboutToShow.connect(self.rebuild_bookmark_menu)
+        btn_mark.setMenu(self.bookmark_menu)
         tb.addWidget(btn_mark)
 
         if not self.is_pdf:
@@ -314,88 +551,379 @@ class ReaderPage(QMdiSubWindow):
         self.right_layout.addWidget(footer_widget)
 
     # --- SETUP VIEWERS ---
+    def book_document(self):
+        """Document của sách, mượn từ document_pool lần đầu cần tới, trả lại khi đóng cửa sổ"""
+        if self.doc_handle is None:
+            # Cùng cuốn sách mở ở nhiều cửa sổ thì dùng chung một Document
+            self.doc_handle = document_pool.acquire(
+                ("doc", self.book.fingerprint),
+                lambda: formats.open_document(self.book.path, self.book.fingerprint),
+                close=lambda doc: doc.close(),
+            )
+        return self.doc_handle.document
+
+    @tracing.traced("reader.setup_pdf")
     def setup_pdf_viewer(self):
         try:
-            self.pdf_doc = fitz.open(self.book.path)
-            self.total_pages = self.pdf_doc.page_count
-            self.load_pdf_toc()
-
-            self.pdf_label = QLabel()
-            self.pdf_label.setAlignment(Qt.AlignCenter)
-            self.pdf_label.setStyleSheet("background: #525252;")
-            self.pdf_label.setMouseTracking(True)
-            self.content_layout.addWidget(self.pdf_label)
-
-            self.render_pdf_page(0)
+            self.paged_doc = self.book_document()
+            self.total_pages = self.paged_doc.page_count()
+            self.load_toc(self.paged_doc.toc())
+
+            self.render_service = PdfRenderService(self.book.path, parent=self)
+            self.render_service.pageRendered.connect(self.on_page_rendered)
+            self.render_service.renderFailed.connect(self.on_page_render_failed)
+
+            first_width, first_height = self.paged_doc.page_size(0)
+            self.page_strip = PageThumbnailStrip(
+                self.book.path,
+                self.book.fingerprint,
+                self.total_pages,
+                first_width,
+                first_height,
+            )
+            self.page_strip.pageSelected.connect(self.go_to_page)
+            self.page_strip.hide()
+            self.splitter.insertWidget(1, self.page_strip)
+
+            self.pdf_view = PdfPageView()
+            self.pdf_view.visibleRegionChanged.connect(self.request_visible_tiles)
+            self.content_layout.addWidget(self.pdf_view)
+
+            self.current_page_index = -1
+            start_page = 0
+            if self.saved_position and "page" in self.saved_position:
+                self.zoom_level = self.saved_position.get("zoom", self.zoom_level)
+                start_page = min(self.saved_position["page"], self.total_pages - 1)
+            if self.warm is not None and self.warm.page is not None:
+                # Ảnh trang đang đọc dở đã render sẵn: hiện ngay, không chờ worker
+                key, pixmap = self.warm.page
+                self.page_cache.put(key, pixmap)
+            self.render_pdf_page(start_page)
+            if self.reflowable and self.saved_position and self.saved_position.get("reflow"):
+                self.btn_reflow.setChecked(True)
         except Exception as e:
             self.lbl_page_info.setText(f"Lỗi: {e}")
 
     def setup_epub_viewer(self):
-        content = load_book(self.book)
-        self.text_viewer = QTextBrowser()
-        self.text_viewer.setHtml(content)
-        self.text_viewer.setOpenExternalLinks(False)
-        self.text_viewer.setStyleSheet(
-            "QTextBrowser { padding:40px; font-size:18px; line-height:1.6; color: #1e293b; background-color: #ffffff; }"
+        # Trả ngay sau khi lấy: pool chỉ giữ HTML thêm một lúc cho lần mở lại,
+        # bản dùng để hiển thị đã nằm trong QTextDocument
+        on_cover = getattr(self.main_window, "update_book_cover", None)
+        handle = document_pool.acquire(
+            ("html", self.book.fingerprint), lambda: load_book(self.book, on_cover)
         )
-        self.text_viewer.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.text_viewer.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.text_viewer.installEventFilter(self)
+        content = handle.document
+        handle.release()
+        self.text_viewer = self._create_text_viewer()
+        with tracing.span("reader.set_html", chars=len(content)):
+            self.text_viewer.setHtml(content)
+        self.text_viewer.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.text_viewer.customContextMenuRequested.connect(self.show_context_menu)
 
         self.content_layout.addWidget(self.text_viewer)
-        if self.book.ext == ".epub":
-            self.load_epub_toc()
+        if self.warm is not None and self.warm.toc is not None:
+            self.load_toc(self.warm.toc)
+        else:
+            # Mục lục đọc từ file gốc (HTML có thể lấy từ cache) ở luồng nền: EPUB / FB2
+            # phải phân tích lại file, cửa sổ đọc không phải chờ phần này
+            job = job_scheduler.submit(
+                read_toc, self.book.path, self.book.fingerprint,
+                priority=PRIORITY_OPEN, token=self.jobs, name="toc",
+            )
+            job.finished.connect(self.load_toc)
+        self.build_chapter_index()
+        self.apply_saved_highlights()
+        self.update_footer_info()
+        self.schedule_prefetch()
+
+    def _create_text_viewer(self):
+        """Khung đọc văn bản: sách văn bản, và PDF ở chế độ dàn chữ"""
+        viewer = BookTextBrowser(lambda name: self.book_document().resource(name))
+        viewer.setOpenExternalLinks(False)
+        viewer.setStyleSheet(
+            "QTextBrowser { padding:40px; font-size:18px; line-height:1.6; color: #1e293b; background-color: #ffffff; }"
+        )
+        viewer.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        viewer.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        viewer.installEventFilter(self)
+        return viewer
+
+    @property
+    def shows_pages(self):
+        """Đang hiện ảnh trang (PDF, truyện tranh); sách văn bản và PDF dàn chữ hiện HTML"""
+        return self.is_pdf and not self.reflow
+
+    def go_to_page(self, page_index):
+        if self.reflow:
+            self.show_reflow_page(page_index)
+        else:
+            self.render_pdf_page(page_index)
+
+    # --- DÀN CHỮ: PDF ĐỌC NHƯ SÁCH VĂN BẢN ---
+    def set_reflow(self, enabled):
+        """
+        Bật/tắt chế độ dàn chữ: chữ của trang được trích ra HTML (pdf_reflow) và hiện
+        bằng khung đọc văn bản, chữ to nhỏ theo cỡ chữ chứ không phải phóng ảnh trang.
+        """
+        if enabled == self.reflow or not self.paged_doc:
+            return
+        page = max(0, self.current_page_index)
+        self.reflow = enabled
+        if enabled:
+            if self.text_viewer is None:
+                self.text_viewer = self._create_text_viewer()
+                self.text_viewer.verticalScrollBar().valueChanged.connect(self.on_reflow_scrolled)
+                self.content_layout.addWidget(self.text_viewer)
+            self.pdf_view.hide()
+            self.text_viewer.show()
+            # Ảnh trang đang chờ render không còn cần
+            self.render_service.retain([])
+            self.pending_placeholders.clear()
+            self.flip_waiting.clear()
+            self.show_reflow_page(page)
+        else:
+            self.reflow_timer.stop()
+            self.text_viewer.hide()
+            self.pdf_view.show()
+            self.render_pdf_page(page)
+        self.record_position()
+
+    def _reflow_service(self):
+        if self.reflow_service is None:
+            self.reflow_service = ReflowService(self.book.path, self.book.fingerprint, parent=self)
+            self.reflow_service.pageReady.connect(lambda *_: self.reflow_timer.start(0))
+        return self.reflow_service
+
+    def _reflow_html(self, page_index, wait=True):
+        """HTML dàn chữ của trang từ cache đĩa; chưa có thì trích ngay (wait) hoặc None"""
+        html = self._reflow_service().cached_html(page_index)
+        if html is None and wait:
+            with tracing.span("reader.reflow_page", page=page_index + 1):
+                html = self.paged_doc.reflow_html(page_index)
+            save_reflow_html(self.book.fingerprint, page_index, html)
+        if html == "":
+            # Trang không có lớp chữ: vẫn giữ một dòng để biết đang ở trang nào
+            html = f"<p><i>Trang {page_index + 1} không có chữ (ảnh scan)</i></p>"
+        return html
+
+    def _reflow_page_top(self, page_index):
+        """Vị trí (y) đầu trang page_index trong khung dàn chữ"""
+        doc = self.text_viewer.document()
+        for pos, name in self.chapter_starts:
+            if name == f"page-{page_index}":
+                return doc.documentLayout().blockBoundingRect(doc.findBlock(pos)).top()
+        return 0
+
+    def reflow_page_at_top(self):
+        """Trang của đoạn chữ đầu tiên đang thấy"""
+        pos = self.text_viewer.cursorForPosition(QPoint(0, 0)).position()
+        name, _ = self.chapter_at(pos)
+        if name.startswith("page-"):
+            return int(name[5:])
+        return self.reflow_pages[0] if self.reflow_pages else 0
+
+    def _set_reflow_window(self, pages):
+        """Thay các trang trong khung dàn chữ, đoạn đang ở đầu khung nhìn giữ nguyên chỗ"""
+        viewer = self.text_viewer
+        scrollbar = viewer.verticalScrollBar()
+        keep = None
+        if self.reflow_pages:
+            page = self.reflow_page_at_top()
+            keep = (page, scrollbar.value() - self._reflow_page_top(page))
+
+        html = "".join(f'<div id="page-{page}">{self._reflow_html(page)}</div>' for page in pages)
+        self.reflow_updating = True
+        try:
+            with tracing.span("reader.set_reflow_html", pages=len(pages)):
+                viewer.setHtml(html)
+                # Dàn trang xong ngay để tính được vị trí cuộn
+                viewer.document().documentLayout().documentSize()
+            self.reflow_pages = list(pages)
+            self.text_page_cache.clear()
+            self.build_chapter_index()
+            if keep is not None and keep[0] in pages:
+                scrollbar.setValue(int(self._reflow_page_top(keep[0]) + keep[1]))
+        finally:
+            self.reflow_updating = False
+
+    def show_reflow_page(self, page_index):
+        """Mở khung dàn chữ từ đầu trang page_index"""
+        if not 0 <= page_index < self.total_pages:
+            return
+        self.reflow_pages = []
+        self._set_reflow_window([page_index])
+        self.text_viewer.verticalScrollBar().setValue(0)
+        self.current_page_index = page_index
+        self.extend_reflow()
+        self.on_reflow_page_changed()
+
+    def extend_reflow(self, wait=False):
+        """
+        Nối các trang kế tiếp vào cuối khung khi phần chưa đọc còn ít (trang chưa trích
+        xong thì đợi pageReady, trừ khi wait), bỏ bớt các trang đã đọc qua ở đầu khung.
+        """
+        if not self.reflow or not self.reflow_pages:
+            return
+        scrollbar = self.text_viewer.verticalScrollBar()
+        page_h = self.text_viewer.viewport().height()
+        if scrollbar.maximum() - scrollbar.value() >= page_h * REFLOW_AHEAD_SCREENS:
+            return
+        pages = list(self.reflow_pages)
+        added = False
+        while pages[-1] + 1 < self.total_pages and len(pages) < len(self.reflow_pages) + 3:
+            nxt = pages[-1] + 1
+            if self._reflow_html(nxt, wait=wait) is None:
+                break
+            pages.append(nxt)
+            added = True
+            wait = False  # trích đồng bộ nhiều nhất một trang
+        if not added:
+            return
+        current = self.reflow_page_at_top()
+        while len(pages) > REFLOW_WINDOW_PAGES and pages[0] < current:
+            pages.pop(0)
+        self._set_reflow_window(pages)
+
+    def prepend_reflow(self):
+        """Đưa trang liền trước vào đầu khung (lật ngược qua đầu khung)"""
+        first = self.reflow_pages[0]
+        if first == 0:
+            return False
+        pages = [first - 1] + self.reflow_pages
+        current = self.reflow_page_at_top()
+        while len(pages) > REFLOW_WINDOW_PAGES and pages[-1] > current:
+            pages.pop()
+        self._set_reflow_window(pages)
+        return True
+
+    def on_reflow_scrolled(self):
+        if not self.reflow or self.reflow_updating:
+            return
+        page = self.reflow_page_at_top()
+        if page != self.current_page_index:
+            self.current_page_index = page
+            self.on_reflow_page_changed()
+        # Đợi xong thao tác hiện tại rồi mới dựng lại khung
+        self.reflow_timer.start(0)
+
+    def on_reflow_page_changed(self):
+        """Trích trước các trang sắp đọc, đồng bộ dải trang và chân trang"""
+        page = self.current_page_index
+        end = min(self.total_pages, page + 1 + REFLOW_PREFETCH_PAGES)
+        self._reflow_service().request(range(page + 1, end))
+        if self.page_strip and self.page_strip.isVisible():
+            self.page_strip.set_current_page(page)
         self.update_footer_info()
 
     # --- HELPERS: LẤY ẢNH VÀ VÙNG TRANG ---
     def get_page_geometry(self):
         """Trả về tuple (Pixmap, Rect của trang, Màu nền)"""
-        if self.is_pdf:
-            pix = self.pdf_label.pixmap()
-            if not pix:
+        if self.shows_pages:
+            # Chụp đúng phần trang đang thấy (có thể chỉ là một phần khi zoom lớn)
+            rect = self.pdf_view.page_rect_in(self.content_area)
+            if rect.isEmpty():
                 return None, QRect(), QColor("#525252")
 
-            # Tính toán vị trí trang trong content_area
-            # Do pdf_label align center, ta tính thủ công
-            cw = self.content_area.width()
-            ch = self.content_area.height()
-            pw = pix.width()
-            ph = pix.height()
-            x = (cw - pw) // 2
-            y = (ch - ph) // 2
-
-            return pix, QRect(x, y, pw, ph), QColor("#525252")
+            viewport = self.pdf_view.viewport()
+            pix = viewport.grab(
+                QRect(viewport.mapFrom(self.content_area, rect.topLeft()), rect.size())
+            )
+            return pix, rect, QColor("#525252")
         else:
             # EPUB thì full màn hình
-            pix = self.text_viewer.grab()
+            offset = self.text_viewer.verticalScrollBar().value()
+            pix = self.get_text_page_pixmap(offset)
             return pix, self.content_area.rect(), QColor("#ffffff")
 
     def get_next_page_pixmap_hidden(self, step=1):
         """Lấy ảnh trang tiếp theo (chỉ phần nội dung)"""
-        if self.is_pdf:
+        if self.shows_pages:
             target_idx = self.current_page_index + step
             if 0 <= target_idx < self.total_pages:
-                page = self.pdf_doc.load_page(target_idx)
-                mat = fitz.Matrix(self.zoom_level, self.zoom_level)
-                pix = page.get_pixmap(matrix=mat)
-                fmt = QImage.Format_RGBA8888 if pix.alpha else QImage.Format_RGB888
-                img = QImage(pix.samples, pix.width, pix.height, pix.stride, fmt).copy()
-                return QPixmap.fromImage(img)
+                key = self._base_key(target_idx)
+                shown = self._crop_to_view(self.get_pdf_pixmap(target_idx), target_idx)
+                if key in self.pending_placeholders:
+                    # Worker render xong sẽ thay ảnh tạm ngay trong animation
+                    self.flip_waiting[key] = (target_idx, shown)
+                return shown
             return None
         else:
             scrollbar = self.text_viewer.verticalScrollBar()
-            old_val = scrollbar.value()
             page_h = self.text_viewer.viewport().height()
+            if self.reflow:
+                # Lật qua mép khung dàn chữ: nạp trang kế bên ngay (trích luôn nếu chưa có)
+                if scrollbar.value() + page_h * step > scrollbar.maximum():
+                    self.extend_reflow(wait=True)
+                while scrollbar.value() + page_h * step < 0 and self.prepend_reflow():
+                    pass
+            old_val = scrollbar.value()
 
             target_val = old_val + (page_h * step)
+            if self.reflow and old_val not in (0, scrollbar.maximum()):
+                # Đầu/cuối sách còn dở một màn hình: lật tới sát mép (setValue cũng dừng ở đó)
+                target_val = min(max(target_val, 0), scrollbar.maximum())
             if target_val < 0 or target_val > scrollbar.maximum():
                 return None
 
-            scrollbar.setValue(target_val)
-            QApplication.processEvents()
-            pix = self.text_viewer.grab()  # Chỉ grab text_viewer
-            scrollbar.setValue(old_val)
-            return pix
+            # Vẽ thẳng vùng tài liệu ra ảnh, không cuộn widget thật
+            return self.get_text_page_pixmap(target_val)
+
+    # --- CHỤP TRANG VĂN BẢN NGOÀI MÀN HÌNH ---
+    def _text_page_key(self, offset):
+        # Ảnh phụ thuộc vị trí cuộn, kích thước khung, cỡ chữ và nội dung (highlight)
+        viewer = self.text_viewer
+        return (
+            offset,
+            viewer.width(),
+            viewer.height(),
+            viewer.font().pointSizeF(),
+            viewer.document().revision(),
+        )
+
+    @tracing.traced("reader.render_text_page")
+    def render_text_page(self, offset):
+        """
+        Vẽ một trang văn bản (tại vị trí cuộn offset) vào ảnh, đúng như
+        text_viewer sẽ hiển thị: nền, lề padding và màu chữ theo palette.
+        """
+        viewer = self.text_viewer
+        viewport = viewer.viewport()
+        dpr = viewer.devicePixelRatioF()
+
+        img = QImage(viewer.size() * dpr, QImage.Format_ARGB32_Premultiplied)
+        img.setDevicePixelRatio(dpr)
+        img.fill(viewport.palette().color(viewport.backgroundRole()))
+
+        w = viewport.width()
+        h = viewport.height()
+        ctx = QAbstractTextDocumentLayout.PaintContext()
+        ctx.palette = viewer.palette()
+        ctx.clip = QRectF(0, offset, w, h)
+
+        painter = QPainter(img)
+        painter.translate(viewport.geometry().topLeft())
+        painter.setClipRect(QRectF(0, 0, w, h))
+        painter.translate(0, -offset)
+        viewer.document().documentLayout().draw(painter, ctx)
+        painter.end()
+        return QPixmap.fromImage(img)
+
+    def get_text_page_pixmap(self, offset):
+        key = self._text_page_key(offset)
+        pixmap = self.text_page_cache.get(key)
+        if pixmap is None:
+            pixmap = self.render_text_page(offset)
+            self.text_page_cache.put(key, pixmap)
+        return pixmap
+
+    def prefetch_text_pages(self):
+        """Vẽ sẵn trang trước/sau sau mỗi lần lật để animation bắt đầu ngay"""
+        scrollbar = self.text_viewer.verticalScrollBar()
+        page_h = self.text_viewer.viewport().height()
+        current = scrollbar.value()
+        for step in (0, self.read_direction, -self.read_direction):
+            offset = current + page_h * step
+            if 0 <= offset <= scrollbar.maximum():
+                self.get_text_page_pixmap(offset)
 
     # --- ANIMATION LOGIC ---
     def next_page_anim(self):
@@ -418,23 +946,34 @@ class ReaderPage(QMdiSubWindow):
             )
 
     def finish_next_page(self):
-        if self.is_pdf:
+        self.read_direction = 1
+        if self.shows_pages:
             self.render_pdf_page(self.current_page_index + 1)
         else:
             sb = self.text_viewer.verticalScrollBar()
             sb.setValue(sb.value() + self.text_viewer.viewport().height())
             self.update_footer_info()
+            self.record_position()
+            self.schedule_prefetch()
 
     def finish_prev_page(self):
-        if self.is_pdf:
+        self.read_direction = -1
+        if self.shows_pages:
             self.render_pdf_page(self.current_page_index - 1)
         else:
             sb = self.text_viewer.verticalScrollBar()
             sb.setValue(sb.value() - self.text_viewer.viewport().height())
             self.update_footer_info()
+            self.record_position()
+            self.schedule_prefetch()
 
     # --- DRAG EVENTS ---
     def eventFilter(self, source, event):
+        if event.type() == QEvent.Resize and source is self.content_area:
+            if self.shows_pages and self.paged_doc:
+                QTimer.singleShot(0, self.request_visible_tiles)
+            return False
+
         if event.type() == QEvent.MouseButtonPress:
             if event.button() == Qt.LeftButton:
                 self.is_dragging = True
@@ -497,24 +1036,242 @@ class ReaderPage(QMdiSubWindow):
                     return True
         return super().eventFilter(source, event)
 
-    # --- HELPERS CŨ (GIỮ NGUYÊN) ---
+    # --- RENDER PDF (CÓ CACHE, RENDER Ở TIẾN TRÌNH PHỤ) ---
+    def _dpr(self):
+        return self.pdf_view.devicePixelRatioF()
+
+    def _page_cache_key(self, page_index, zoom=None, dpr=None):
+        if zoom is None:
+            zoom = self.zoom_level
+        if dpr is None:
+            dpr = self._dpr()
+        return PageRenderCache.make_key(page_index, zoom, dpr)
+
+    def _page_size(self, page_index):
+        """Kích thước logic của trang ở mức zoom hiện tại"""
+        width, height = self.paged_doc.page_size(page_index)
+        return QSize(
+            max(1, int(width * self.zoom_level)),
+            max(1, int(height * self.zoom_level)),
+        )
+
+    def _is_tiled(self, page_index):
+        # Trang quá lớn ở zoom hiện tại thì chỉ render vùng đang nhìn thấy
+        size = self._page_size(page_index)
+        dpr = self._dpr()
+        return size.width() * size.height() * dpr * dpr > TILED_MIN_PIXELS
+
+    def _base_key(self, page_index):
+        """Key của ảnh nền: cả trang, hoặc bản xem trước nếu đang render theo ô"""
+        if self._is_tiled(page_index):
+            return self._page_cache_key(page_index, PREVIEW_ZOOM, 1.0)
+        return self._page_cache_key(page_index)
+
+    def _placeholder_pixmap(self, page_index):
+        """Trang trắng nhỏ đúng tỉ lệ, được phóng lên trong lúc chờ worker render"""
+        width, height = self.paged_doc.page_size(page_index)
+        pix = QPixmap(
+            max(1, int(width * PREVIEW_ZOOM)),
+            max(1, int(height * PREVIEW_ZOOM)),
+        )
+        pix.fill(Qt.white)
+        return pix
+
+    def get_pdf_pixmap(self, page_index, priority=PRIORITY_VISIBLE):
+        """Lấy ảnh nền của trang từ cache, chưa có thì gửi yêu cầu render và trả về ảnh tạm"""
+        key = self._base_key(page_index)
+        pixmap = self.page_cache.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        self.render_service.request(*key, priority=priority)
+        placeholder = self.pending_placeholders.get(key)
+        if placeholder is None:
+            # Ưu tiên ảnh cùng trang ở zoom khác (phóng/thu tạm), không có mới dùng trang trắng
+            placeholder = self.page_cache.find_page(page_index)
+            if placeholder is None:
+                placeholder = self._placeholder_pixmap(page_index)
+            self.pending_placeholders[key] = placeholder
+        return placeholder
+
+    def _crop_to_view(self, pixmap, page_index):
+        """Cắt phần đầu trang vừa khung nhìn (trang mới luôn mở ở đầu trang)"""
+        size = self._page_size(page_index)
+        view = self.pdf_view.viewport().size()
+        x0 = min(
+            self.pdf_view.horizontalScrollBar().value(),
+            max(0, size.width() - view.width()),
+        )
+        visible = QRect(
+            x0, 0, min(view.width(), size.width()), min(view.height(), size.height())
+        )
+        if visible.size() == size:
+            return pixmap
+
+        sx = pixmap.width() / size.width()
+        sy = pixmap.height() / size.height()
+        return pixmap.copy(
+            QRect(
+                int(visible.x() * sx),
+                0,
+                max(1, int(visible.width() * sx)),
+                max(1, int(visible.height() * sy)),
+            )
+        )
+
+    def _wanted_keys(self):
+        """Các yêu cầu render còn cần: trang hiện tại, hai trang kề và các ô đang thấy"""
+        idx = self.current_page_index
+        wanted = [
+            self._base_key(i) for i in (idx - 1, idx, idx + 1) if 0 <= i < self.total_pages
+        ]
+        base = self._page_cache_key(idx)
+        wanted += [base + tile for tile in self.visible_tiles()]
+        return wanted
+
+    @tracing.traced("reader.show_pdf_page")
     def render_pdf_page(self, page_index):
-        if not self.pdf_doc or page_index < 0 or page_index >= self.total_pages:
+        if not self.paged_doc or page_index < 0 or page_index >= self.total_pages:
             return
+        page_changed = page_index != self.current_page_index
         self.current_page_index = page_index
-        page = self.pdf_doc.load_page(page_index)
-        mat = fitz.Matrix(self.zoom_level, self.zoom_level)
-        pix = page.get_pixmap(matrix=mat)
-        fmt = QImage.Format_RGBA8888 if pix.alpha else QImage.Format_RGB888
-        img = QImage(pix.samples, pix.width, pix.height, pix.stride, fmt).copy()
-        self.pdf_label.setPixmap(QPixmap.fromImage(img))
+
+        self.pdf_view.set_page(
+            self._page_size(page_index), self.get_pdf_pixmap(page_index)
+        )
+        if page_changed:
+            self.pdf_view.scroll_to_top()
+            self.record_position()
+
+        # Bỏ các yêu cầu cũ khi người dùng lật nhanh qua nhiều trang
+        wanted = self._wanted_keys()
+        self.render_service.retain(wanted)
+        for key in list(self.pending_placeholders):
+            if key not in wanted:
+                del self.pending_placeholders[key]
+                self.flip_waiting.pop(key, None)
+
+        self.request_visible_tiles()
+        if self.page_strip and self.page_strip.isVisible():
+            self.page_strip.set_current_page(page_index)
         self.update_footer_info()
+        self.schedule_prefetch()
+
+    def toggle_page_strip(self):
+        if not self.page_strip:
+            return
+        self.page_strip.setVisible(not self.page_strip.isVisible())
+        if self.page_strip.isVisible():
+            self.page_strip.set_current_page(self.current_page_index)
+
+    # --- RENDER THEO Ô (ZOOM CAO) ---
+    def _tile_rect(self, tile, pixmap):
+        """Vị trí logic của một ô trong trang"""
+        step = TILE_SIZE / self._dpr()
+        dpr = pixmap.devicePixelRatio()
+        return QRectF(
+            tile[0] * step, tile[1] * step, pixmap.width() / dpr, pixmap.height() / dpr
+        )
+
+    def visible_tiles(self):
+        if not self.paged_doc or not self._is_tiled(self.current_page_index):
+            return []
+        visible = self.pdf_view.visible_page_rect()
+        if visible.isEmpty():
+            return []
+        step = TILE_SIZE / self._dpr()
+        return [
+            (tx, ty)
+            for ty in range(int(visible.top() // step), int(visible.bottom() // step) + 1)
+            for tx in range(int(visible.left() // step), int(visible.right() // step) + 1)
+        ]
+
+    def request_visible_tiles(self):
+        """Gắn các ô đã có trong cache, xin render các ô còn thiếu trong vùng nhìn thấy"""
+        tiles = self.visible_tiles()
+        if not tiles:
+            return
+
+        base = self._page_cache_key(self.current_page_index)
+        self.pdf_view.retain_tiles(tiles)
+        missing = False
+        for tile in tiles:
+            if self.pdf_view.has_tile(tile):
+                continue
+            pixmap = self.tile_cache.get(base + tile)
+            if pixmap is not None:
+                self.pdf_view.set_tile(tile, self._tile_rect(tile, pixmap), pixmap)
+            else:
+                self.render_service.request(*base, priority=PRIORITY_VISIBLE, tile=tile)
+                missing = True
+
+        # Khi kéo thanh cuộn, bỏ các ô đã ra khỏi khung nhìn
+        if missing:
+            self.render_service.retain(self._wanted_keys())
+
+    def on_page_rendered(self, key, image):
+        pixmap = QPixmap.fromImage(image)
+
+        if len(key) == 5:
+            self.tile_cache.put(key, pixmap)
+            if key[:3] == self._page_cache_key(self.current_page_index):
+                tile = key[3:]
+                self.pdf_view.set_tile(tile, self._tile_rect(tile, pixmap), pixmap)
+            return
+
+        self.page_cache.put(key, pixmap)
+        self.pending_placeholders.pop(key, None)
+
+        waiting = self.flip_waiting.pop(key, None)
+        if waiting is not None:
+            page_index, shown = waiting
+            self.flip_overlay.replace_pixmap(
+                shown, self._crop_to_view(pixmap, page_index)
+            )
+        if key == self._base_key(self.current_page_index):
+            self.pdf_view.set_pixmap(pixmap)
+
+    def on_page_render_failed(self, key, message):
+        self.pending_placeholders.pop(key, None)
+        self.flip_waiting.pop(key, None)
+        logger.warning("Lỗi render trang {}: {}", key[0] + 1, message)
+
+    def schedule_prefetch(self):
+        # Khởi động lại bộ đếm: chỉ prefetch khi người dùng ngừng thao tác
+        self.prefetch_timer.start(PREFETCH_IDLE_MS)
+
+    def prefetch_neighbours(self):
+        """Xếp hàng render trước trang kế tiếp theo hướng đọc, rồi tới trang phía sau"""
+        if not self.shows_pages:
+            self.prefetch_text_pages()
+            return
+        if not self.paged_doc:
+            return
+
+        for step in (self.read_direction, -self.read_direction):
+            idx = self.current_page_index + step
+            if not 0 <= idx < self.total_pages:
+                continue
+            key = self._base_key(idx)
+            if key in self.page_cache:
+                continue
+            self.render_service.request(*key, priority=PRIORITY_PREFETCH)
+
+    # --- HELPERS CŨ (GIỮ NGUYÊN) ---
 
     def update_footer_info(self):
         if self.is_pdf:
             self.lbl_page_info.setText(
                 f"Trang {self.current_page_index + 1} / {self.total_pages}"
             )
+            if self.reflow and self.reflow_pages:
+                # Dàn chữ: một trang PDF có thể dài hơn một màn hình
+                sb = self.text_viewer.verticalScrollBar()
+                self.btn_prev.setEnabled(sb.value() > 0 or self.reflow_pages[0] > 0)
+                self.btn_next.setEnabled(
+                    sb.value() < sb.maximum() or self.reflow_pages[-1] < self.total_pages - 1
+                )
+                return
             self.btn_prev.setEnabled(self.current_page_index > 0)
             self.btn_next.setEnabled(self.current_page_index < self.total_pages - 1)
         else:
@@ -526,59 +1283,60 @@ class ReaderPage(QMdiSubWindow):
                 self.lbl_page_info.setText("Trang 1")
 
     def change_zoom(self, delta):
+        if self.reflow:
+            # Dàn chữ: đổi cỡ chữ, giữ nguyên mức zoom của ảnh trang
+            if delta > 0:
+                self.text_viewer.zoomIn(1)
+            else:
+                self.text_viewer.zoomOut(1)
+            return
         self.zoom_level += delta
         if self.zoom_level < 0.5:
             self.zoom_level = 0.5
         if self.zoom_level > 3.0:
             self.zoom_level = 3.0
         if self.is_pdf:
-            self.render_pdf_page(self.current_page_index)
+            if not self.paged_doc:
+                return
+            # Phóng/thu ngay ảnh đang có, render nét sau khi người dùng ngừng bấm
+            idx = self.current_page_index
+            self.pdf_view.zoom_page(self._page_size(idx), self.pdf_view.pixmap())
+            self.zoom_timer.start(ZOOM_SETTLE_MS)
         else:
             if delta > 0:
                 self.text_viewer.zoomIn(1)
             else:
                 self.text_viewer.zoomOut(1)
 
-    def load_pdf_toc(self):
-        if not self.pdf_doc:
-            return
-        toc = self.pdf_doc.get_toc()
-        items = {0: self.toc_tree.invisibleRootItem()}
-        for lvl, title, page in toc:
-            parent = items.get(lvl - 1, items[0])
-            item = QTreeWidgetItem(parent, [title])
-            item.setData(0, Qt.UserRole, page)
-            items[lvl] = item
-
-    def load_epub_toc(self):
-        try:
-            book = epub.read_epub(self.book.path)
-
-            def process_toc(toc_list, parent):
-                for node in toc_list:
-                    if isinstance(node, tuple):
-                        section, children = node
-                        item = QTreeWidgetItem(parent, [section.title])
-                        item.setData(0, Qt.UserRole, section.href)
-                        process_toc(children, item)
-                    elif isinstance(node, epub.Link):
-                        item = QTreeWidgetItem(parent, [node.title])
-                        item.setData(0, Qt.UserRole, node.href)
-
-            process_toc(book.toc, self.toc_tree.invisibleRootItem())
-        except:
-            pass
+    def apply_zoom(self):
+        """Các lần bấm zoom liên tiếp được gộp thành một lần render ở mức cuối cùng"""
+        self.render_pdf_page(self.current_page_index)
+
+    def load_toc(self, entries):
+        """Dựng cây mục lục từ [formats.TocEntry]"""
+        root = self.toc_tree.invisibleRootItem()
+        parents = {}
+        for entry in entries:
+            parent = parents.get(entry.level - 1, root)
+            item = QTreeWidgetItem(parent, [entry.title])
+            item.setData(0, Qt.UserRole, entry.target)
+            parents[entry.level] = item
+            if self.is_pdf:
+                self.pdf_toc_pages.append((entry.target, entry.title))
+        self.pdf_toc_pages.sort(key=lambda entry: entry[0])
 
     def on_toc_clicked(self, item, col):
         data = item.data(0, Qt.UserRole)
-        if not data:
+        if data is None or data == "":
             return
         if self.is_pdf:
-            self.render_pdf_page(int(data) - 1)
+            self.go_to_page(int(data))
         else:
             target = data.split("#")[0]
             self.text_viewer.scrollToAnchor(target)
             self.update_footer_info()
+            self.record_position()
+            reading_stats.chapter_change(self.book.fingerprint, item.text(0))
 
     def show_context_menu(self, pos):
         menu = QMenu()
@@ -591,18 +1349,186 @@ class ReaderPage(QMdiSubWindow):
             menu.addAction(action)
         remove_action = QAction("❌ Xóa Highlight", self)
         remove_action.triggered.connect(lambda: self.highlight_selection(None))
-        menu.exec(self.text_viewer.mapToGlobal(pos))
+        menu.addAction(remove_action)
+        menu.exec(self.text_viewer.viewport().mapToGlobal(pos))
 
     def highlight_selection(self, color_code):
         cursor = self.text_viewer.textCursor()
         if not cursor.hasSelection():
             return
-        fmt = QTextCharFormat()
+        start, end = cursor.selectionStart(), cursor.selectionEnd()
         if color_code is None:
-            fmt.setBackground(Qt.transparent)
-        else:
-            fmt.setBackground(QColor(color_code))
+            self.remove_highlights(start, end)
+            return
+
+        fmt = QTextCharFormat()
+        fmt.setBackground(QColor(color_code))
         cursor.mergeCharFormat(fmt)
+        self.text_page_cache.clear()
+
+        chapter, chapter_start = self.chapter_at(start)
+        highlight_id = highlight_service.add_highlight(
+            self.book.fingerprint,
+            chapter,
+            start - chapter_start,
+            end - chapter_start,
+            cursor.selectedText(),
+            color_code,
+        )
+        self.highlights.append((highlight_id, start, end))
+
+    # --- HIGHLIGHT LƯU TRỮ ---
+    @tracing.traced("reader.chapter_index")
+    def build_chapter_index(self):
+        """Vị trí các anchor (mỗi chương EPUB là một anchor) để đổi vị trí tuyệt đối <-> trong chương"""
+        self.chapter_starts = []
+        block = self.text_viewer.document().begin()
+        while block.isValid():
+            it = block.begin()
+            while not it.atEnd():
+                fragment = it.fragment()
+                names = fragment.charFormat().anchorNames()
+                if names:
+                    self.chapter_starts.append((fragment.position(), names[0]))
+                it += 1
+            block = block.next()
+
+    def chapter_at(self, position):
+        """(tên chương, vị trí bắt đầu chương) chứa vị trí ký tự; không có anchor thì ("", 0)"""
+        i = bisect.bisect_right(self.chapter_starts, (position, "\uffff")) - 1
+        if i < 0:
+            return "", 0
+        start, name = self.chapter_starts[i]
+        return name, start
+
+    def _resolve_highlight(self, chapter, start, end, quote, chapter_pos):
+        """Tìm lại khoảng ký tự của highlight; lệch so với đoạn trích thì tìm theo đoạn trích"""
+        doc = self.text_viewer.document()
+        base = chapter_pos.get(chapter, 0) if chapter else 0
+        a, b = base + start, base + end
+        cursor = QTextCursor(doc)
+        if b < doc.characterCount():
+            cursor.setPosition(a)
+            cursor.setPosition(b, QTextCursor.KeepAnchor)
+            if cursor.selectedText().startswith(quote):
+                return a, b
+        found = doc.find(quote, base)
+        if found.isNull():
+            return None
+        return found.selectionStart(), found.selectionStart() + (end - start)
+
+    @tracing.traced("reader.apply_highlights")
+    def apply_saved_highlights(self):
+        """Tô lại mọi highlight đã lưu trong một edit block (bố cục chỉ tính lại một lần)"""
+        rows = highlight_service.list_highlights(self.book.fingerprint)
+        if not rows:
+            return
+        chapter_pos = {}
+        for pos, name in self.chapter_starts:
+            chapter_pos.setdefault(name, pos)
+
+        doc = self.text_viewer.document()
+        cursor = QTextCursor(doc)
+        formats = {}
+        cursor.beginEditBlock()
+        for highlight_id, chapter, start, end, quote, color in rows:
+            span = self._resolve_highlight(chapter, start, end, quote, chapter_pos)
+            if span is None:
+                continue
+            if color not in formats:
+                formats[color] = QTextCharFormat()
+                formats[color].setBackground(QColor(color))
+            cursor.setPosition(span[0])
+            cursor.setPosition(span[1], QTextCursor.KeepAnchor)
+            cursor.mergeCharFormat(formats[color])
+            self.highlights.append((highlight_id, span[0], span[1]))
+        cursor.endEditBlock()
+
+    def remove_highlights(self, start, end):
+        """Xóa các highlight chạm vào vùng chọn (xóa trọn từng highlight)"""
+        removed = [h for h in self.highlights if h[1] < end and h[2] > start]
+        self.highlights = [h for h in self.highlights if h not in removed]
+
+        fmt = QTextCharFormat()
+        fmt.setBackground(Qt.transparent)
+        cursor = QTextCursor(self.text_viewer.document())
+        cursor.beginEditBlock()
+        for _, a, b in removed + [(None, start, end)]:
+            cursor.setPosition(a)
+            cursor.setPosition(b, QTextCursor.KeepAnchor)
+            cursor.mergeCharFormat(fmt)
+        cursor.endEditBlock()
+        self.text_page_cache.clear()
+
+        if removed:
+            highlight_service.remove_highlights([h[0] for h in removed])
+
+    def showEvent(self, event):
+        # Lần hiện đầu tiên: kích thước đã ổn định nhưng chưa vẽ, nhảy tới vị trí cũ tại đây
+        if not self.position_restored:
+            self.position_restored = True
+            if not self.is_pdf and self.saved_position:
+                self.go_to_position(self.saved_position)
+            reading_stats.start_session(
+                self.book.fingerprint,
+                self.book.title,
+                self.reading_position(),
+                self.reading_page_count(),
+            )
+        super().showEvent(event)
+
+    def closeEvent(self, event):
+        if not self.jobs.cancelled:
+            self.jobs.cancel()
+            job_scheduler.reader_closed()
+        for timer in (
+            self.autosave_timer, self.read_timer, self.prefetch_timer, self.zoom_timer,
+            self.reflow_timer,
+        ):
+            timer.stop()
+        self.save_position()
+        reading_stats.stop_session(self.book.fingerprint)
+        if self.render_service:
+            self.render_service.shutdown()
+        if self.page_strip:
+            self.page_strip.shutdown()
+        if self.reflow_service:
+            self.reflow_service.shutdown()
+        if self.doc_handle is not None:
+            self.doc_handle.release()
+            self.doc_handle = None
+            self.paged_doc = None
+        # Trả phần ngân sách bộ nhớ ngay, không đợi GC dọn cửa sổ
+        for cache in (self.page_cache, self.tile_cache, self.text_page_cache):
+            cache.clear()
+        memory_governor.log_snapshot(f"đóng {self.book.title}")
+        super().closeEvent(event)
+
+    # --- THỐNG KÊ ĐỌC ---
+    def reading_position(self):
+        """Trang hiện tại (PDF) hoặc số thứ tự màn hình đang xem (văn bản)"""
+        if self.is_pdf:
+            return max(0, self.current_page_index)
+        page_h = max(1, self.text_viewer.viewport().height())
+        return self.text_viewer.verticalScrollBar().value() // page_h
+
+    def reading_page_count(self):
+        if self.is_pdf:
+            return self.total_pages or None
+        page_h = max(1, self.text_viewer.viewport().height())
+        maximum = self.text_viewer.verticalScrollBar().maximum()
+        return maximum // page_h + 1 if maximum > 0 else None
+
+    def record_position(self):
+        book = self.book.fingerprint
+        if not self.autosave_timer.isActive():
+            self.autosave_timer.start(AUTOSAVE_MS)
+        reading_stats.page_turn(book, self.reading_position(), self.reading_page_count())
+        if self.is_pdf and self.pdf_toc_pages:
+            starts = [page for page, _ in self.pdf_toc_pages]
+            i = bisect.bisect_right(starts, self.current_page_index) - 1
+            if i >= 0:
+                reading_stats.chapter_change(book, self.pdf_toc_pages[i][1])
 
     def on_reading_timer(self):
         goal_service.add_time(1)
@@ -611,21 +1537,70 @@ class ReaderPage(QMdiSubWindow):
         if hasattr(self.main_window, "update_user_stats"):
             self.main_window.update_user_stats()
 
-    def save_bookmark(self):
-        import json
+    # --- VỊ TRÍ ĐỌC & BOOKMARK ---
+    def current_position(self):
+        if self.is_pdf:
+            if self.current_page_index < 0:
+                return None
+            position = {"page": self.current_page_index, "zoom": round(self.zoom_level, 2)}
+            if self.reflow:
+                position["reflow"] = True
+            return position
+        # Ký tự đầu tiên đang thấy: không phụ thuộc cỡ chữ / bề rộng cửa sổ
+        cursor = self.text_viewer.cursorForPosition(QPoint(0, 0))
+        return {"char": cursor.position()}
+
+    def go_to_position(self, position):
+        if self.is_pdf:
+            if "zoom" in position:
+                self.zoom_level = position["zoom"]
+            self.go_to_page(min(position.get("page", 0), self.total_pages - 1))
+            return
+        doc = self.text_viewer.document()
+        char = min(position.get("char", 0), max(0, doc.characterCount() - 1))
+        block = doc.findBlock(char)
+        y = doc.documentLayout().blockBoundingRect(block).top()
+        line = block.layout().lineForTextPosition(char - block.position())
+        if line.isValid():
+            y += line.y()
+        self.text_viewer.verticalScrollBar().setValue(int(y))
+        self.update_footer_info()
+        self.schedule_prefetch()
+
+    def save_position(self):
+        bookmark_service.save_position(self.book.fingerprint, self.current_position())
 
-        data = {}
-        try:
-            with open("bookmarks.json", "r") as f:
-                data = json.load(f)
-        except:
-            pass
-        val = (
-            self.current_page_index
-            if self.is_pdf
-            else self.text_viewer.verticalScrollBar().value()
-        )
-        data[self.book.path] = val
-        with open("bookmarks.json", "w") as f:
-            json.dump(data, f)
-        self.lbl_reward.setText("✅ Đã lưu vị trí!")
+    def rebuild_bookmark_menu(self):
+        menu = self.bookmark_menu
+        menu.clear()
+        menu.addAction("➕ Thêm bookmark tại đây", self.add_bookmark)
+
+        bookmarks = bookmark_service.list_bookmarks(self.book.fingerprint)
+        if not bookmarks:
+            return
+        menu.addSeparator()
+        for _, name, position in bookmarks:
+            menu.addAction(name, lambda pos=position: self.jump_to_bookmark(pos))
+        remove_menu = menu.addMenu("❌ Xóa bookmark")
+        for bookmark_id, name, _ in bookmarks:
+            remove_menu.addAction(
+                name, lambda bid=bookmark_id: bookmark_service.remove_bookmark(bid)
+            )
+
+    def add_bookmark(self):
+        position = self.current_position()
+        if position is None:
+            return
+        if self.is_pdf:
+            default = f"Trang {self.current_page_index + 1}"
+        else:
+            default = self.lbl_page_info.text()
+        name, ok = QInputDialog.getText(self, "Thêm bookmark", "Tên bookmark:", text=default)
+        if not ok:
+            return
+        bookmark_service.add_bookmark(self.book.fingerprint, name.strip() or default, position)
+        self.lbl_reward.setText("✅ Đã lưu bookmark!")
+
+    def jump_to_bookmark(self, position):
+        self.go_to_position(position)
+        self.record_position()
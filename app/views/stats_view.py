@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QTabWidget,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+)
+from PySide6.QtCore import Qt
+
+from ..services.reading_stats_service import reading_stats, estimate_time_left
+
+
+def format_minutes(seconds):
+    minutes = int(round((seconds or 0) / 60))
+    if minutes < 60:
+        return f"{minutes} phút"
+    return f"{minutes // 60} giờ {minutes % 60:02d} phút"
+
+
+def pages_per_hour(seconds, pages):
+    if not seconds or not pages:
+        return "-"
+    return f"{pages / (seconds / 3600):.0f}"
+
+
+class StatsDialog(QDialog):
+    """Thống kê đọc sách: chuỗi ngày, theo ngày / tuần / từng cuốn (đọc từ bảng tổng hợp)"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("📊 Thống kê đọc sách")
+        self.resize(720, 480)
+
+        layout = QVBoxLayout(self)
+
+        current, longest = reading_stats.streak()
+        header = QHBoxLayout()
+        lbl_streak = QLabel(f"🔥 Chuỗi hiện tại: {current} ngày")
+        lbl_streak.setStyleSheet("font-size: 16px; font-weight: bold;")
+        header.addWidget(lbl_streak)
+        header.addStretch()
+        header.addWidget(QLabel(f"🏆 Dài nhất: {longest} ngày"))
+        layout.addLayout(header)
+
+        tabs = QTabWidget()
+        tabs.addTab(self._daily_table(), "Theo ngày")
+        tabs.addTab(self._weekly_table(), "Theo tuần")
+        tabs.addTab(self._books_table(), "Theo sách")
+        layout.addWidget(tabs, 1)
+
+    # ------------------------------
+    def _table(self, headers, rows):
+        table = QTableWidget(len(rows), len(headers))
+        table.setHorizontalHeaderLabels(headers)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.verticalHeader().hide()
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        for r, row in enumerate(rows):
+            for c, value in enumerate(row):
+                item = QTableWidgetItem(str(value))
+                if c > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(r, c, item)
+        return table
+
+    def _daily_table(self):
+        rows = [
+            (day, format_minutes(seconds), pages, pages_per_hour(seconds, pages))
+            for day, seconds, pages in reading_stats.daily()
+        ]
+        return self._table(["Ngày", "Thời gian", "Trang", "Trang/giờ"], rows)
+
+    def _weekly_table(self):
+        rows = [
+            (week, format_minutes(seconds), pages, pages_per_hour(seconds, pages))
+            for week, seconds, pages in reading_stats.weekly()
+        ]
+        return self._table(["Tuần", "Thời gian", "Trang", "Trang/giờ"], rows)
+
+    def _books_table(self):
+        rows = []
+        for _, title, seconds, pages, sessions, last_read, last_page, total in reading_stats.books():
+            left = estimate_time_left(seconds, pages, last_page, total)
+            rows.append(
+                (
+                    title,
+                    format_minutes(seconds),
+                    pages,
+                    pages_per_hour(seconds, pages),
+                    sessions,
+                    format_minutes(left) if left is not None else "-",
+                    datetime.fromtimestamp(last_read).strftime("%Y-%m-%d") if last_read else "-",
+                )
+            )
+        return self._table(
+            ["Sách", "Thời gian", "Trang", "Trang/giờ", "Số lần mở", "Còn lại", "Đọc lần cuối"], rows
+        )
@@ -0,0 +1,64 @@
+"""
+Đo khung hình của animation lật trang (PageFlipOverlay) trên cửa sổ lớn.
+
+Chạy:  python -m benchmarks.bench_page_flip [--size 2560x1440] [--flips 5]
+Mặc định dùng QT_QPA_PLATFORM=offscreen (vẽ bằng CPU, giống desktop Linux
+không có tăng tốc phần cứng).
+"""
+import argparse
+import json
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QWidget
+from PySide6.QtGui import QPixmap, QPainter, QColor, QFont
+from PySide6.QtCore import QEventLoop, QRect
+
+from app.views.reader_view import PageFlipOverlay
+
+
+def make_page(width, height, label, color):
+    pix = QPixmap(width, height)
+    pix.fill(QColor(color))
+    p = QPainter(pix)
+    p.setFont(QFont("Arial", 14))
+    for y in range(40, height, 24):
+        p.drawText(40, y, f"{label} — Lorem ipsum dolor sit amet, consectetur adipiscing elit.")
+    p.end()
+    return pix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PageFlipOverlay frame benchmark")
+    parser.add_argument("--size", default="2560x1440")
+    parser.add_argument("--flips", type=int, default=5)
+    args = parser.parse_args(argv)
+    width, height = (int(v) for v in args.size.split("x"))
+
+    # PySide giữ QApplication (qApp) sống tới khi thoát, không cần biến riêng
+    QApplication.instance() or QApplication(sys.argv[:1])
+    host = QWidget()
+    host.resize(width, height)
+    host.show()
+
+    overlay = PageFlipOverlay(host)
+    # Trang PDF nhỏ hơn khung để có cả nền xung quanh và scale ảnh
+    rect = QRect(width // 8, 0, width * 3 // 4, height)
+    current = make_page(1200, 1600, "Trang 1", "#ffffff")
+    nxt = make_page(1200, 1600, "Trang 2", "#fffbeb")
+
+    results = []
+    for i in range(args.flips):
+        loop = QEventLoop()
+        direction = 1 if i % 2 == 0 else -1
+        overlay.start_flip(current, nxt, direction, rect, QColor("#525252"), loop.quit)
+        loop.exec()
+        results.append(overlay.frame_stats())
+
+    print(json.dumps({"size": args.size, "flips": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Micro-benchmark: chuyển trang PDF sang QPixmap.
+
+So sánh cách cũ (pix.samples -> QImage(...).copy() -> QPixmap.fromImage,
+3 lần sao chép mỗi trang) với pdf_raster.to_qpixmap (samples_mv,
+chỉ 1 lần sao chép lúc Qt tạo QPixmap).
+
+Chạy:  python -m benchmarks.bench_pdf_raster [file.pdf] [--zoom 2.0]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import fitz  # PyMuPDF
+from PySide6.QtGui import QGuiApplication, QImage, QPixmap
+
+from app.services import pdf_raster
+
+
+def legacy_to_qpixmap(page, zoom):
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    fmt = QImage.Format_RGBA8888 if pix.alpha else QImage.Format_RGB888
+    img = QImage(pix.samples, pix.width, pix.height, pix.stride, fmt).copy()
+    return QPixmap.fromImage(img)
+
+
+def unified_to_qpixmap(page, zoom):
+    return pdf_raster.render_qpixmap(page, zoom)
+
+
+def make_sample_pdf(path, pages=10):
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Trang {i + 1}\n" + "Lorem ipsum dolor sit amet. " * 200)
+        page.draw_rect(fitz.Rect(72, 300, 500, 700), color=(0, 0, 1), fill=(0.9, 0.9, 1))
+    doc.save(path)
+
+
+def run(fn, doc, zoom, repeat):
+    # Số byte Python cấp phát thêm mỗi trang (chủ yếu là bản sao samples)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in doc:
+            fn(page, zoom)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pages = repeat * doc.page_count
+    return elapsed / pages * 1000, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?")
+    parser.add_argument("--zoom", type=float, default=2.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+
+    path = args.pdf
+    if not path:
+        path = os.path.join(tempfile.mkdtemp(), "bench.pdf")
+        make_sample_pdf(path)
+
+    doc = fitz.open(path)
+    page = doc[0]
+    pix = page.get_pixmap(matrix=fitz.Matrix(args.zoom, args.zoom))
+    page_bytes = len(pix.samples_mv)
+
+    print(f"{path}: {doc.page_count} trang, zoom {args.zoom}, {page_bytes / 1e6:.1f} MB/trang")
+    for name, fn, copies in (
+        ("legacy ", legacy_to_qpixmap, 3),
+        ("unified", unified_to_qpixmap, 1),
+    ):
+        ms, peak = run(fn, doc, args.zoom, args.repeat)
+        print(
+            f"{name}: {ms:7.2f} ms/trang | {copies} bản sao/trang | "
+            f"đỉnh cấp phát Python {peak / 1e6:6.1f} MB"
+        )
+    del app
+
+
+if __name__ == "__main__":
+    main()
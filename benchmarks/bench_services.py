@@ -0,0 +1,195 @@
+"""
+Benchmark các service đọc sách trên bộ mẫu sinh sẵn (benchmarks.corpus):
+chuyển EPUB / MOBI / TXT sang HTML (app.formats), get_cover, get_book_metadata, render trang PDF
+và lọc thư viện kiểu filter_books, ở nhiều cỡ.
+Dữ liệu người dùng và cache (ảnh bìa trích ra...) trỏ sang thư mục tạm (XDG_*).
+
+Kết quả ghi ra JSON; có --baseline thì so với lần đo trước và trả mã lỗi 1
+nếu có phép đo chậm hơn ngưỡng cho phép.
+
+Chạy:  python -m benchmarks.bench_services [--sizes small,medium] [--out kq.json]
+       python -m benchmarks.bench_services --save-baseline baseline.json
+       python -m benchmarks.bench_services --baseline baseline.json --tolerance 0.15
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_sandbox = tempfile.mkdtemp(prefix="ebook-bench-services-")
+atexit.register(shutil.rmtree, _sandbox, True)
+os.environ["XDG_DATA_HOME"] = os.path.join(_sandbox, "data")
+os.environ["XDG_CACHE_HOME"] = os.path.join(_sandbox, "cache")
+
+from benchmarks.corpus import SIZES, build_corpus, make_library
+
+# Chuỗi gõ vào ô tìm kiếm: từ phổ biến, hiếm, không khớp và rỗng
+SEARCH_QUERIES = ("sách", "dòng sông", "lorem ip", "zzz", "")
+
+
+def measure(fn, repeat):
+    """Chạy fn repeat lần, trả về {median_ms, min_ms}"""
+    # Lần đầu không tính: import lười, cache của hệ điều hành
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3)}
+
+
+def filter_library(books, text):
+    """Cùng logic so khớp với MainWindow.filter_books, không cần widget"""
+    text = text.lower().strip()
+    return [b for b in books if text in b[0].lower() or text in b[1].lower()]
+
+
+def cover_once(path):
+    from app.services.cover_service import get_cover
+
+    # Ảnh ghi vào thư mục dữ liệu tạm của benchmark, dọn cùng lúc thoát
+    get_cover(path, ".epub")
+
+
+def render_pdf(path, zoom):
+    import fitz  # PyMuPDF
+
+    from app.services.pdf_raster import rasterize
+
+    with fitz.open(path) as doc:
+        for page in doc:
+            rasterize(page, zoom)
+
+
+def read_html(path):
+    from app.formats import open_document
+
+    with open_document(path) as document:
+        return document.read_html()
+
+
+def bench_size(size, corpus_dir, repeat):
+    from app.services.metadata_service import get_book_metadata
+
+    paths = build_corpus(corpus_dir, size)
+    pdf_pages = SIZES[size]["pdf_pages"]
+    # Giữ tên read_* như trước để so được với baseline cũ
+    cases = {
+        "read_epub": lambda: read_html(paths["epub"]),
+        "read_mobi": lambda: read_html(paths["mobi"]),
+        "read_txt": lambda: read_html(paths["txt"]),
+        "read_fb2": lambda: read_html(paths["fb2"]),
+        "get_cover": lambda: cover_once(paths["epub"]),
+        "get_book_metadata.epub": lambda: get_book_metadata(paths["epub"], ".epub"),
+        "get_book_metadata.pdf": lambda: get_book_metadata(paths["pdf"], ".pdf"),
+        "get_book_metadata.fb2": lambda: get_book_metadata(paths["fb2"], ".fb2"),
+    }
+    results = {}
+    for name, fn in cases.items():
+        results[f"{name}[{size}]"] = measure(fn, repeat)
+
+    # Tính theo ms/trang để so được giữa các cỡ
+    for zoom in (1.0, 2.0):
+        result = measure(lambda: render_pdf(paths["pdf"], zoom), repeat)
+        results[f"pdf_render_page@{zoom:g}x[{size}]"] = {
+            key: round(value / pdf_pages, 3) for key, value in result.items()
+        }
+
+    library = make_library(SIZES[size]["library"])
+    for query in SEARCH_QUERIES:
+        results[f"filter_books('{query}')[{size}]"] = measure(
+            lambda: filter_library(library, query), repeat
+        )
+    return results
+
+
+def compare(results, baseline, tolerance, key="median_ms"):
+    """In tỉ lệ so với baseline theo key, trả về số phép đo bị chậm đi quá ngưỡng"""
+    slower = 0
+    for name, value in results.items():
+        base = baseline.get(name)
+        if not base or not base.get(key):
+            print(f"  {name:45} (chưa có trong baseline)")
+            continue
+        ratio = value[key] / base[key]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  <-- CHẬM HƠN"
+            slower += 1
+        elif ratio < 1 - tolerance:
+            flag = "  nhanh hơn"
+        print(f"  {name:45} {base[key]:10.2f} -> {value[key]:10.2f} ms  x{ratio:.2f}{flag}")
+    return slower
+
+
+def add_report_args(parser):
+    parser.add_argument("--out", help="ghi kết quả ra file JSON")
+    parser.add_argument("--baseline", help="file JSON kết quả cũ để so sánh")
+    parser.add_argument("--save-baseline", help="ghi kết quả lần này làm baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="mức chậm đi cho phép so với baseline (0.15 = 15%%)")
+
+
+def finish(results, args, meta, key="median_ms"):
+    """Ghi JSON (--out / --save-baseline), so với --baseline; trả về mã thoát"""
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+            **meta,
+        },
+        "results": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Đã ghi {path}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"So với baseline {args.baseline} ({baseline['meta']['date']}):")
+        slower = compare(results, baseline["results"], args.tolerance, key)
+        if slower:
+            print(f"{slower} phép đo chậm hơn quá {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="small,medium",
+                        help=f"các cỡ, cách nhau dấu phẩy ({', '.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--corpus-dir",
+                        default=os.path.join(tempfile.gettempdir(), "ebook-bench-corpus"))
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    for size in sizes:
+        if size not in SIZES:
+            parser.error(f"cỡ không hợp lệ: {size}")
+
+    results = {}
+    for size in sizes:
+        print(f"== {size} ==")
+        for name, value in bench_size(size, args.corpus_dir, args.repeat).items():
+            print(f"  {name:45} {value['median_ms']:10.2f} ms (min {value['min_ms']:.2f})")
+            results[name] = value
+
+    return finish(results, args, {"repeat": args.repeat, "sizes": sizes})
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Đo độ trễ thao tác giao diện dưới QT_QPA_PLATFORM=offscreen, theo phân vị (ms):
+
+- mở sách (ReaderPage, mọi định dạng kể cả CBZ) tới khung hình đầu tiên, lật trang tới khung lật đầu tiên
+- gõ phím vào ô tìm kiếm tới lúc lọc + vẽ xong, dựng lại gallery, đổi theme
+  trên thư viện giả 100 / 1k / 10k sách
+
+Gallery hiện tạo một widget + ảnh bìa cho mỗi sách (~0.5 GB cho 1k sách), nên
+thư viện 10k sách chỉ chạy khi có --libraries 100,1000,10000 và máy đủ RAM (~6 GB).
+
+Dữ liệu người dùng và cache trỏ sang thư mục tạm (XDG_*), không đụng thư viện thật.
+Kết quả ghi JSON và so với baseline giống bench_services (so theo p90).
+
+Chạy:  python -m benchmarks.bench_ui [--libraries 100,1000] [--corpus-size small]
+       python -m benchmarks.bench_ui --baseline ui.json --tolerance 0.25
+"""
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+_sandbox = tempfile.mkdtemp(prefix="ebook-bench-ui-")
+atexit.register(shutil.rmtree, _sandbox, True)
+os.environ["XDG_DATA_HOME"] = os.path.join(_sandbox, "data")
+os.environ["XDG_CACHE_HOME"] = os.path.join(_sandbox, "cache")
+
+from PySide6.QtCore import QElapsedTimer, QEvent, QObject, qInstallMessageHandler
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QApplication
+
+from benchmarks.bench_services import add_report_args, finish
+from benchmarks.corpus import SIZES, build_corpus, make_library
+
+# Chuỗi gõ từng phím vào ô tìm kiếm (chữ ASCII để QTest gửi phím được)
+TYPED_QUERIES = ("lorem", "magna ali", "qqq")
+READER_KINDS = ("epub", "mobi", "txt", "fb2", "pdf", "cbz")
+# Đợi tối đa bao lâu (ms) cho một khung hình / trang render xong
+WAIT_MS = 10_000
+
+
+def summarize(times):
+    from app.views.reader_view import percentile
+
+    return {
+        "n": len(times),
+        "p50_ms": round(percentile(times, 50), 3),
+        "p90_ms": round(percentile(times, 90), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "max_ms": round(max(times), 3) if times else 0.0,
+    }
+
+
+def wait_until(condition, timeout_ms=WAIT_MS):
+    """Chạy event loop tới khi condition() đúng; False nếu hết giờ"""
+    timer = QElapsedTimer()
+    timer.start()
+    while not condition():
+        if timer.elapsed() > timeout_ms:
+            return False
+        QApplication.processEvents()
+        time.sleep(0.0005)
+    return True
+
+
+def pump(ms):
+    wait_until(lambda: False, ms)
+
+
+def dispose(widget):
+    """Đóng và hủy hẳn widget, để các lần đo sau không phải vẽ / đổi style cả widget cũ"""
+    widget.close()
+    widget.deleteLater()
+    # processEvents() không xử lý deleteLater, phải gửi riêng
+    QApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    pump(100)
+
+
+def quiet_offscreen_warnings():
+    """Plugin offscreen cảnh báo mỗi lần đặt độ mờ / kích thước cửa sổ: bỏ qua cho dễ đọc"""
+
+    def handler(mode, context, message):
+        if "This plugin does not support" not in message:
+            sys.stderr.write(message + "\n")
+
+    qInstallMessageHandler(handler)
+
+
+class PaintWatch(QObject):
+    """Ghi lại thời điểm widget được vẽ lần đầu sau arm()"""
+
+    def __init__(self, widget):
+        super().__init__(widget)
+        self.painted_at = None
+        widget.installEventFilter(self)
+
+    def arm(self):
+        self.painted_at = None
+
+    def painted(self):
+        return self.painted_at is not None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and self.painted_at is None:
+            self.painted_at = time.perf_counter()
+        return False
+
+
+def timed_until_paint(action, watch):
+    """ms từ lúc gọi action tới khi watch thấy khung hình mới"""
+    watch.arm()
+    started = time.perf_counter()
+    action()
+    if not wait_until(watch.painted):
+        return None
+    return (watch.painted_at - started) * 1000
+
+
+def make_books(count):
+    from app.models.book import Book
+
+    books = []
+    for i, (title, author) in enumerate(make_library(count)):
+        # File không tồn tại: card dùng ảnh bìa mặc định vẽ theo đuôi file
+        book = Book(title, os.path.join(_sandbox, "library", f"{i}.{('epub', 'txt')[i % 2]}"))
+        book.author = author
+        books.append(book)
+    return books
+
+
+# ==========================================
+# THƯ VIỆN: LỌC, GALLERY, THEME
+# ==========================================
+def bench_library(count, repeat):
+    from app.views.main_window import MainWindow
+
+    # Dựng sẵn thư viện trước khi hiện cửa sổ (phần này không đo, chỉ cần trạng thái
+    # giống sau khi nạp catalog; thêm lúc cửa sổ đang hiện chậm hơn hàng chục lần)
+    win = MainWindow()
+    win.books = make_books(count)
+    for book in win.books:
+        win.sidebar.add_book(book)
+        win.add_book_to_gallery(book)
+    win.placeholder.hide()
+    win.grid_container.show()
+    win.show()
+    # Để phần khởi động sau khung hình đầu (nạp catalog rỗng) chạy xong trước khi đo
+    pump(200)
+
+    watch = PaintWatch(win)
+    results = {}
+
+    times = []
+    for _ in range(repeat):
+        ms = timed_until_paint(win.refresh_gallery, watch)
+        if ms is not None:
+            times.append(ms)
+    results[f"refresh_gallery[{count}]"] = summarize(times)
+
+    box = win.sidebar.search_box
+    keys, clears = [], []
+    for _ in range(repeat):
+        for query in TYPED_QUERIES:
+            for ch in query:
+                ms = timed_until_paint(lambda: QTest.keyClick(box, ch), watch)
+                if ms is not None:
+                    keys.append(ms)
+            ms = timed_until_paint(box.clear, watch)
+            if ms is not None:
+                clears.append(ms)
+    results[f"keystroke_filter[{count}]"] = summarize(keys)
+    results[f"clear_filter[{count}]"] = summarize(clears)
+
+    times = []
+    for i in range(repeat * 2):
+        # Lần chẵn bật tối, lần lẻ về sáng: kết thúc ở theme sáng như lúc đầu
+        ms = timed_until_paint(lambda: win.on_toggle_switch(i % 2 == 0), watch)
+        if ms is not None:
+            times.append(ms)
+    results[f"theme_toggle[{count}]"] = summarize(times)
+
+    dispose(win)
+    return results
+
+
+# ==========================================
+# ĐỌC SÁCH: MỞ, LẬT TRANG
+# ==========================================
+def _content_widget(reader):
+    return reader.pdf_view.viewport() if reader.is_pdf else reader.text_viewer.viewport()
+
+
+def _page_sharp(reader):
+    return reader.page_cache.get(reader._base_key(reader.current_page_index)) is not None
+
+
+def open_reader(win, book):
+    """Mở ReaderPage, trả về (reader, ms tới khung đầu, ms tới khi trang PDF nét)"""
+    from app.views.reader_view import ReaderPage
+
+    started = time.perf_counter()
+    reader = ReaderPage(win, book)
+    watch = PaintWatch(_content_widget(reader))
+    reader.show()
+    wait_until(watch.painted)
+    first_paint = (watch.painted_at - started) * 1000 if watch.painted() else None
+    sharp = None
+    if reader.is_pdf and wait_until(lambda: _page_sharp(reader)):
+        sharp = (time.perf_counter() - started) * 1000
+    return reader, first_paint, sharp
+
+
+def bench_reader(kind, path, repeat, turns):
+    from app.models.book import Book
+    from app.views.main_window import MainWindow
+    from app.views.reader_view import PREFETCH_IDLE_MS
+
+    win = MainWindow()
+    win.show()
+    pump(200)
+    book = Book(os.path.splitext(os.path.basename(path))[0], path)
+
+    # Lần mở đầu chưa có cache nội dung / tiến trình render: tính riêng
+    reader, cold, _ = open_reader(win, book)
+    dispose(reader)
+    opens, sharps = [], []
+    for _ in range(repeat):
+        reader, first_paint, sharp = open_reader(win, book)
+        dispose(reader)
+        if first_paint is not None:
+            opens.append(first_paint)
+        if sharp is not None:
+            sharps.append(sharp)
+
+    results = {
+        f"open_cold[{kind}]": summarize([cold] if cold is not None else []),
+        f"open_to_first_paint[{kind}]": summarize(opens),
+    }
+    if sharps:
+        results[f"open_to_page_sharp[{kind}]"] = summarize(sharps)
+
+    reader, _, _ = open_reader(win, book)
+    overlay = reader.flip_overlay
+    watch = PaintWatch(overlay)
+    times = []
+    for i in range(turns):
+        # Lật tới rồi lật lui để không chạm cuối sách nhỏ
+        action = reader.next_page_anim if i % 2 == 0 else reader.prev_page_anim
+        ms = timed_until_paint(action, watch)
+        if ms is None:
+            continue
+        times.append(ms)
+        wait_until(lambda: not overlay.isVisible())
+        # Người đọc dừng lại đọc: cho render trước trang kế bên kịp chạy
+        pump(PREFETCH_IDLE_MS + 100)
+    results[f"page_turn[{kind}]"] = summarize(times)
+    dispose(reader)
+    dispose(win)
+    return results
+
+
+def print_results(results):
+    for name, value in results.items():
+        print(f"  {name:32} n={value['n']:<4} p50 {value['p50_ms']:9.2f}  "
+              f"p90 {value['p90_ms']:9.2f}  p99 {value['p99_ms']:9.2f}  max {value['max_ms']:9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--libraries", default="100,1000",
+                        help="số sách trong thư viện giả, cách nhau dấu phẩy (thêm 10000 nếu đủ RAM)")
+    parser.add_argument("--corpus-size", choices=SIZES, default="small")
+    parser.add_argument("--corpus-dir",
+                        default=os.path.join(tempfile.gettempdir(), "ebook-bench-corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--turns", type=int, default=10, help="số lần lật trang mỗi loại sách")
+    parser.add_argument("--skip-reader", action="store_true")
+    add_report_args(parser)
+    args = parser.parse_args(argv)
+    libraries = [int(n) for n in args.libraries.split(",") if n.strip()]
+
+    quiet_offscreen_warnings()
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    from app.views.main_window import LIGHT_CSS
+
+    app.setStyleSheet(LIGHT_CSS)
+
+    results = {}
+    if not args.skip_reader:
+        paths = build_corpus(args.corpus_dir, args.corpus_size)
+        for kind in READER_KINDS:
+            print(f"== {kind} ({args.corpus_size}) ==")
+            part = bench_reader(kind, paths[kind], args.repeat, args.turns)
+            print_results(part)
+            results.update(part)
+
+    for count in libraries:
+        print(f"== thư viện {count} sách ==")
+        part = bench_library(count, args.repeat)
+        print_results(part)
+        results.update(part)
+
+    meta = {
+        "repeat": args.repeat,
+        "libraries": libraries,
+        "corpus_size": None if args.skip_reader else args.corpus_size,
+    }
+    return finish(results, args, meta, key="p90_ms")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+"""
+Sinh bộ sách mẫu cố định (cùng tham số -> cùng nội dung) cho benchmark:
+EPUB nhiều chương có ảnh, PDF nhiều trang, TXT lớn, MOBI, FB2 (section lồng nhau,
+ảnh base64), truyện tranh CBZ (ảnh JPEG cỡ trang scan), và danh sách sách giả
+để đo tìm kiếm.
+
+Chạy riêng để xem/giữ bộ mẫu:  python -m benchmarks.corpus <thư mục> [--size small]
+"""
+import argparse
+import base64
+import os
+import random
+import struct
+
+# Đổi khi đổi cách sinh để không dùng lại bộ mẫu cũ đã lưu trên đĩa
+CORPUS_VERSION = 1
+
+SIZES = {
+    "small": {"chapters": 10, "paragraphs": 40, "images": 2, "pdf_pages": 10,
+              "txt_mb": 1, "mobi_paragraphs": 400, "comic_pages": 10, "library": 1_000},
+    "medium": {"chapters": 50, "paragraphs": 40, "images": 6, "pdf_pages": 50,
+               "txt_mb": 10, "mobi_paragraphs": 4_000, "comic_pages": 60, "library": 10_000},
+    # 300 trang scan ~1 GB: cỡ một tập truyện tranh lớn
+    "large": {"chapters": 200, "paragraphs": 40, "images": 20, "pdf_pages": 200,
+              "txt_mb": 50, "mobi_paragraphs": 20_000, "comic_pages": 300, "library": 100_000},
+}
+
+WORDS = (
+    "sách trang chương đọc ánh sáng thời gian thành phố con đường dòng sông "
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt labore dolore magna aliqua enim minim veniam quis"
+).split()
+
+
+def sentence(rng, words=14):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def paragraph(rng, sentences=5):
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def make_png(rng, width=320, height=240):
+    """Ảnh PNG nhiễu màu (không nén tốt, giống ảnh minh họa thật)"""
+    import fitz  # PyMuPDF
+
+    data = rng.randbytes(width * height * 3)
+    pix = fitz.Pixmap(fitz.csRGB, width, height, data, False)
+    return pix.tobytes("png")
+
+
+def make_epub(path, chapters, paragraphs, images, seed=1):
+    from ebooklib import epub
+
+    rng = random.Random(seed)
+    book = epub.EpubBook()
+    book.set_identifier(f"bench-{seed}-{chapters}")
+    book.set_title(f"Benchmark {chapters} chương")
+    book.set_language("vi")
+    book.add_author("Tác Giả Mẫu")
+
+    image_names = []
+    for i in range(images):
+        name = "images/cover.png" if i == 0 else f"images/img{i}.png"
+        book.add_item(epub.EpubItem(uid=f"img{i}", file_name=name, media_type="image/png",
+                                    content=make_png(rng)))
+        image_names.append(name)
+
+    items = []
+    for c in range(chapters):
+        body = [f"<h1>Chương {c + 1}</h1>"]
+        for p in range(paragraphs):
+            body.append(f"<p>{paragraph(rng)}</p>")
+            if image_names and p == paragraphs // 2:
+                body.append(f'<img src="{image_names[c % len(image_names)]}"/>')
+        item = epub.EpubHtml(title=f"Chương {c + 1}", file_name=f"ch{c}.xhtml", lang="vi")
+        item.content = "<html><body>" + "".join(body) + "</body></html>"
+        book.add_item(item)
+        items.append(item)
+
+    book.toc = items
+    book.spine = ["nav"] + items
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    epub.write_epub(path, book)
+
+
+def make_pdf(path, pages, seed=2):
+    import fitz  # PyMuPDF
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(60, 60, 540, 600),
+                            f"Trang {i + 1}\n" + "\n".join(paragraph(rng) for _ in range(6)),
+                            fontsize=10)
+        page.draw_rect(fitz.Rect(60, 620, 540, 780), color=(0, 0, 0.6),
+                       fill=(rng.random(), rng.random(), rng.random()))
+    doc.set_toc([[1, f"Phần {k + 1}", k * 10 + 1] for k in range(max(1, pages // 10))])
+    doc.set_metadata({"title": f"Benchmark {pages} trang", "author": "Tác Giả Mẫu"})
+    doc.save(path)
+
+
+def make_txt(path, size_mb, seed=3):
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    # Sinh một khối rồi lặp lại: nhanh mà kích thước vẫn đúng
+    block = "\n".join(paragraph(rng) for _ in range(200)) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        written = 0
+        while written < target:
+            f.write(block)
+            written += len(block.encode("utf-8"))
+
+
+def make_mobi(path, paragraphs, seed=4, title="Benchmark MOBI"):
+    """
+    MOBI 6 tối giản (PalmDOC không nén, không EXTH), đủ để mobi.extract đọc được.
+    Không có công cụ ghi MOBI nào trong dependency nên tự ghi theo định dạng.
+    """
+    rng = random.Random(seed)
+    html = "<html><head><title>x</title></head><body>"
+    html += "".join(f"<p>{paragraph(rng)}</p>" for _ in range(paragraphs)) + "</body></html>"
+    data = html.encode("utf-8")
+    text_records = [data[i:i + 4096] for i in range(0, len(data), 4096)]
+    count = len(text_records)
+    title_bytes = title.encode("utf-8")
+
+    mobi_length = 0xE8
+    header = bytearray(16 + mobi_length)
+    # PalmDOC: không nén, độ dài text, số record text, cỡ record
+    struct.pack_into(">HHLHHHH", header, 0, 1, 0, len(data), count, 4096, 0, 0)
+    # MOBI: loại sách (2), UTF-8, id, phiên bản 6
+    struct.pack_into(">4sLLLLL", header, 16, b"MOBI", mobi_length, 2, 65001, seed, 6)
+    for offset in range(0x28, 0x50, 4):
+        struct.pack_into(">L", header, offset, 0xFFFFFFFF)
+    struct.pack_into(">L", header, 0x50, count + 1)
+    struct.pack_into(">LL", header, 0x54, len(header), len(title_bytes))
+    struct.pack_into(">LLLL", header, 0x5C, 9, 0, 0, 6)
+    struct.pack_into(">L", header, 0x6C, 0xFFFFFFFF)
+    struct.pack_into(">L", header, 0xA8, 0xFFFFFFFF)
+    struct.pack_into(">HHL", header, 0xC0, 1, count, 1)
+    for offset in (0xC8, 0xD0, 0xE0):
+        struct.pack_into(">LL", header, offset, 0xFFFFFFFF, 0)
+    struct.pack_into(">L", header, 0xF4, 0xFFFFFFFF)
+    record0 = bytes(header) + title_bytes + b"\0" * (4 - len(title_bytes) % 4)
+    records = [record0] + text_records + [b"\xe9\x8e\x0d\x0a"]
+
+    pdb = bytearray(b"benchmark".ljust(32, b"\0"))
+    pdb += struct.pack(">HHLLLLLL4s4sLLH", 0, 0, 0, 0, 0, 0, 0, 0, b"BOOK", b"MOBI",
+                       2 * len(records) - 1, 0, len(records))
+    offset = 78 + 8 * len(records) + 2
+    for i, record in enumerate(records):
+        pdb += struct.pack(">LL", offset, 2 * i)
+        offset += len(record)
+    pdb += b"\0\0"
+    for record in records:
+        pdb += record
+    with open(path, "wb") as f:
+        f.write(pdb)
+
+
+def make_fb2(path, chapters, paragraphs, images, seed=7):
+    """FB2 cùng cỡ với EPUB: mỗi chương hai section con, có chú thích và ảnh bìa"""
+    from html import escape
+
+    rng = random.Random(seed)
+    out = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<FictionBook xmlns="http://www.gribuser.ru/xml/fictionbook/2.0" '
+        'xmlns:l="http://www.w3.org/1999/xlink">',
+        "<description><title-info><genre>prose</genre>",
+        "<author><first-name>Tác</first-name><middle-name>Giả</middle-name>"
+        "<last-name>Mẫu</last-name></author>",
+        f"<book-title>Benchmark FB2 {chapters} chương</book-title>",
+        '<coverpage><image l:href="#cover.png"/></coverpage><lang>vi</lang>',
+        "</title-info></description>",
+        "<body><title><p>Benchmark FB2</p></title>",
+    ]
+    for c in range(chapters):
+        out.append(f"<section><title><p>Chương {c + 1}</p></title>")
+        for half in range(2):
+            out.append(f"<section><title><p>Phần {half + 1}</p></title>")
+            for p in range(paragraphs // 2):
+                text = escape(paragraph(rng))
+                if p == 0:
+                    text += f'<a l:href="#n{c}" type="note">[{c + 1}]</a>'
+                out.append(f"<p>{text}</p>")
+                if images and half == 0 and p == paragraphs // 4:
+                    out.append(f'<image l:href="#img{c % images}.png"/>')
+            out.append("</section>")
+        out.append("</section>")
+    out.append('</body><body name="notes"><title><p>Chú thích</p></title>')
+    for c in range(chapters):
+        out.append(f'<section id="n{c}"><title><p>{c + 1}</p></title><p>{sentence(rng)}</p></section>')
+    out.append("</body>")
+    names = ["cover.png"] + [f"img{i}.png" for i in range(images)]
+    for name in names:
+        data = base64.encodebytes(make_png(rng)).decode("ascii")
+        out.append(f'<binary id="{name}" content-type="image/png">{data}</binary>')
+    out.append("</FictionBook>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(out))
+
+
+def make_cbz(path, pages, seed=6, size=(1800, 2700)):
+    """
+    CBZ gồm các trang JPEG nhiễu màu (nén kém như ảnh scan, ~3 MB/trang), tên file
+    không đệm số 0 và ghi lộn thứ tự để thử sắp xếp theo số trang.
+    """
+    import io
+    import zipfile
+
+    from PIL import Image
+
+    rng = random.Random(seed)
+    order = list(range(1, pages + 1))
+    rng.shuffle(order)
+    # Một tấm nhiễu dùng chung, mỗi trang dịch đi một đoạn để khác nhau
+    noise = Image.frombytes("RGB", size, rng.randbytes(size[0] * size[1] * 3))
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as zf:
+        for number in order:
+            page = Image.new("RGB", size)
+            shift = number * 37 % size[0]
+            page.paste(noise.crop((shift, 0, size[0], size[1])), (0, 0))
+            page.paste(noise.crop((0, 0, shift, size[1])), (size[0] - shift, 0))
+            out = io.BytesIO()
+            page.save(out, "JPEG", quality=90)
+            zf.writestr(f"page{number}.jpg", out.getvalue())
+        zf.writestr(
+            "ComicInfo.xml",
+            "<ComicInfo><Title>Benchmark Comic</Title><Writer>Tác Giả Mẫu</Writer></ComicInfo>",
+        )
+
+
+def make_library(count, seed=5):
+    """[(tên sách, tác giả)] giả để đo lọc thư viện"""
+    rng = random.Random(seed)
+    return [
+        (" ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title(),
+         f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}")
+        for _ in range(count)
+    ]
+
+
+def build_corpus(root, size="small"):
+    """Sinh (hoặc dùng lại) bộ mẫu trong root/<phiên bản>-<size>, trả về dict đường dẫn"""
+    params = SIZES[size]
+    folder = os.path.join(root, f"v{CORPUS_VERSION}-{size}")
+    os.makedirs(folder, exist_ok=True)
+    paths = {
+        "epub": os.path.join(folder, "book.epub"),
+        "pdf": os.path.join(folder, "book.pdf"),
+        "txt": os.path.join(folder, "book.txt"),
+        "mobi": os.path.join(folder, "book.mobi"),
+        "cbz": os.path.join(folder, "book.cbz"),
+        "fb2": os.path.join(folder, "book.fb2"),
+    }
+    makers = {
+        "epub": lambda p: make_epub(p, params["chapters"], params["paragraphs"], params["images"]),
+        "pdf": lambda p: make_pdf(p, params["pdf_pages"]),
+        "txt": lambda p: make_txt(p, params["txt_mb"]),
+        "mobi": lambda p: make_mobi(p, params["mobi_paragraphs"]),
+        "cbz": lambda p: make_cbz(p, params["comic_pages"]),
+        "fb2": lambda p: make_fb2(p, params["chapters"], params["paragraphs"], params["images"]),
+    }
+    for kind, path in paths.items():
+        if not os.path.exists(path):
+            tmp = path + ".tmp" + os.path.splitext(path)[1]
+            makers[kind](tmp)
+            os.replace(tmp, path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh bộ sách mẫu cho benchmark")
+    parser.add_argument("root")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    args = parser.parse_args(argv)
+    for kind, path in build_corpus(args.root, args.size).items():
+        print(f"{kind:5} {os.path.getsize(path) / 1024:10.0f} KB  {path}")
+
+
+if __name__ == "__main__":
+    main()
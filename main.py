@@ -1,4 +1,41 @@
-from app.views.main_window import run_app
+import sys
+
+from app.utils import startup_profile, tracing
+
+
+def pop_option(name):
+    """Lấy và bỏ `name <giá trị>` khỏi sys.argv (Qt không biết các tham số này)"""
+    if name not in sys.argv:
+        return None
+    idx = sys.argv.index(name)
+    value = sys.argv[idx + 1] if idx + 1 < len(sys.argv) else None
+    del sys.argv[idx : idx + 2]
+    return value
+
 
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        startup_profile.enable()
+
+    # --trace trace.json: file Chrome/Perfetto; --log-file spans.jsonl: log có cấu trúc
+    trace_path = pop_option("--trace")
+    tracing.configure_logging(path=pop_option("--log-file"))
+    if trace_path:
+        tracing.start_trace(trace_path)
+
+    # --memory-mb 256: ngân sách chung cho các cache ảnh; --memory-debug: bật tracemalloc
+    budget_mb = pop_option("--memory-mb")
+    if budget_mb or "--memory-debug" in sys.argv:
+        from app.services.memory_governor import memory_governor
+
+        if budget_mb:
+            memory_governor.set_budget(int(float(budget_mb) * 1024 * 1024))
+        if "--memory-debug" in sys.argv:
+            sys.argv.remove("--memory-debug")
+            memory_governor.enable_debug()
+
+    # Import trong khối main: tiến trình worker (spawn) không phải nạp cả giao diện
+    from app.views.main_window import run_app
+
     run_app()